@@ -0,0 +1,237 @@
+"""
+Acta generation.
+
+Building the placeholder values (database reads) is kept apart from rendering
+the DOCX (pure CPU work on plain dicts), so the same code serves the job
+worker and bulk generation. Both actas run as background jobs; see ``jobs``.
+"""
+import base64
+import io
+import logging
+
+from django.conf import settings
+from django.db.models import F
+from docx.shared import Inches
+
+from .actas_batch import follow_up_meetings_for, generate_follow_up_actas
+from .blobstore import content_url, write_blob_field
+from .docx_templates import get_compiled_template
+from .jobs import JobError, job_handler, set_progress
+from .metrics import DOCX_RENDERS
+from .models import DocumentTemplate, FollowUpMeeting, Meeting
+from .signatures import normalise_signatures
+
+logger = logging.getLogger(__name__)
+
+DOCX_MIME_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+INITIAL_ACTA_JOB = 'acta_inicial'
+FOLLOW_UP_ACTA_JOB = 'acta_seguimiento'
+FOLLOW_UP_ACTA_BATCH_JOB = 'actas_seguimiento_lote'
+
+FOLLOW_UP_TEMPLATE_MISSING = "No se encontró la plantilla 'Acta Seguimiento'. Suba la plantilla primero."
+
+
+# ── Templates ──
+
+def _has_content(template):
+    return template is not None and bool(template.file_data_blob_id or template.file_data)
+
+
+def find_initial_template():
+    templates = DocumentTemplate.objects.defer('file_data')
+    template = templates.filter(name__icontains="Acta inicial", category="Acta Inicial").first()
+    if not template:
+        template = templates.filter(category="Acta Inicial").first()
+    return template if _has_content(template) else None
+
+
+def find_follow_up_template():
+    templates = DocumentTemplate.objects.defer('file_data').filter(category__icontains="seguimiento")
+    # Same row as .first(), but sorted on ``id + 0``: with a plain ORDER BY id
+    # LIMIT 1 the planner walks the primary key instead of reading the few
+    # matches through api_template_category_trgm_idx.
+    template = templates.order_by(F('pk') + 0).first()
+    return template if _has_content(template) else None
+
+
+# ── Context ──
+
+def initial_acta_context(meeting):
+    project = meeting.project
+    companies = ", ".join([c.name for c in project.companies.all()])
+
+    return {
+        "{Empresa}": companies,
+        "{fechaReunion}": meeting.start_date.strftime("%d/%m/%Y") if meeting.start_date else "",
+        "{centro}": project.work_center.name if project.work_center else "",
+        "{objetoContrato}": project.description if project.description else "",
+        "{fechaInicio}": project.start_date.strftime("%d/%m/%Y") if project.start_date else "",
+        "{responsable}": f"{project.contract_manager.first_name} {project.contract_manager.last_name or ''}".strip() if project.contract_manager else "",
+        "{contactoPrincipal}": f"{project.main_contact.first_name} {project.main_contact.last_name or ''}".strip() if project.main_contact else "",
+        "{tipoCentro}": project.work_center.type if project.work_center else "",
+    }
+
+
+def follow_up_acta_context(meeting):
+    """Returns ``(replacements, signatures)`` for a follow-up meeting."""
+    config = getattr(meeting, 'config', None)
+
+    centros = ", ".join([wc.name for wc in meeting.work_centers.all()])
+    provincias = ", ".join(meeting.provinces) if meeting.provinces else ""
+
+    replacements = {
+        "{fechaReunion}": meeting.date.strftime("%d/%m/%Y") if meeting.date else "",
+        "{horaReunión}": meeting.time.strftime("%H:%M") if meeting.time else "",
+        "{horaReunion}": meeting.time.strftime("%H:%M") if meeting.time else "",
+        "{revision}": config.revision_informacion or "" if config else "",
+        "{observacion}": config.observaciones_intercambio or "" if config else "",
+        "{concurrencia}": config.solapes_empresas or "" if config else "",
+        "{accidentes}": config.accidentes_trabajo or "" if config else "",
+        "{emergencia}": config.emergencia or "" if config else "",
+        "{temas}": config.otros_temas or "" if config else "",
+        "{preguntas}": config.ruegos_preguntas or "" if config else "",
+        "{numeroReunion}": config.numero_reunion if config else "",
+        "{anoReunion}": meeting.date.year if meeting.date else "",
+        "{lugar}": meeting.location or "",
+        "{centros}": centros,
+        "{provincias}": provincias,
+    }
+    # Rows saved before signatures were normalised on write still hold full-size images.
+    signatures = normalise_signatures(config.signatures) if config and config.signatures else []
+    return replacements, signatures
+
+
+# ── Rendering ──
+
+def _to_bytes(doc):
+    output_stream = io.BytesIO()
+    doc.save(output_stream)
+    return output_stream.getvalue()
+
+
+def render_initial_acta(compiled, replacements):
+    return _to_bytes(compiled.render(replacements))
+
+
+def render_follow_up_acta(compiled, replacements, signatures):
+    doc = compiled.render(replacements)
+
+    # Process {tablaFirmas}
+    found_p = None
+    for p in doc.paragraphs:
+        if "{tablaFirmas}" in p.text:
+            found_p = p
+            break
+
+    if found_p:
+        table = doc.add_table(rows=len(signatures) + 1, cols=4)
+        table.style = 'Table Grid'
+        table.autofit = False
+
+        # Set column widths
+        widths = [Inches(2.1), Inches(1.4), Inches(1.4), Inches(1.2)]
+        for i, width in enumerate(widths):
+            for cell in table.columns[i].cells:
+                cell.width = width
+
+        hdr_cells = table.rows[0].cells
+        hdr_cells[0].text = "Empresa"
+        hdr_cells[1].text = "Nombre"
+        hdr_cells[2].text = "Cargo"
+        hdr_cells[3].text = "Firma"
+
+        for i, sig in enumerate(signatures):
+            row_cells = table.rows[i + 1].cells
+            row_cells[0].text = sig.get('company', '')
+            row_cells[1].text = sig.get('name', '')
+            row_cells[2].text = sig.get('role', '')
+
+            sig_data = sig.get('data', '')
+            if sig_data and "," in sig_data:
+                try:
+                    img_bytes = base64.b64decode(sig_data.split(",")[1])
+                    r = row_cells[3].paragraphs[0].add_run()
+                    r.add_picture(io.BytesIO(img_bytes), width=Inches(1.2))
+                except Exception:
+                    logger.warning("Could not insert signature image", exc_info=True)
+
+        found_p._p.addnext(table._tbl)
+        found_p.clear()
+
+    return _to_bytes(doc)
+
+
+def store_acta(meeting, data):
+    update_fields = write_blob_field(meeting, 'document_data', data, DOCX_MIME_TYPE)
+    meeting.save(update_fields=update_fields)
+
+
+# ── Jobs ──
+
+def _result(meeting):
+    return {'model': meeting._meta.model_name, 'id': meeting.pk, 'url': content_url(meeting)}
+
+
+@job_handler(INITIAL_ACTA_JOB)
+def generate_initial_acta(job):
+    meeting = Meeting.objects.select_related(
+        'project__work_center', 'project__contract_manager', 'project__main_contact',
+    ).defer('document_data').filter(pk=job.payload['meeting_id']).first()
+    if meeting is None:
+        raise JobError("La reunión ya no existe.")
+
+    template = find_initial_template()
+    if template is None:
+        # Nothing to render; the meeting simply has no acta until a template is uploaded.
+        return None
+
+    compiled = get_compiled_template(template)
+    set_progress(job, 30)
+    data = render_initial_acta(compiled, initial_acta_context(meeting))
+    DOCX_RENDERS.labels(INITIAL_ACTA_JOB).inc()
+    set_progress(job, 80)
+    store_acta(meeting, data)
+    return _result(meeting)
+
+
+@job_handler(FOLLOW_UP_ACTA_JOB)
+def generate_follow_up_acta(job):
+    meeting = FollowUpMeeting.objects.select_related('config').defer('document_data').filter(
+        pk=job.payload['meeting_id']
+    ).first()
+    if meeting is None:
+        raise JobError("La reunión de seguimiento ya no existe.")
+
+    template = find_follow_up_template()
+    if template is None:
+        raise JobError(FOLLOW_UP_TEMPLATE_MISSING)
+
+    try:
+        compiled = get_compiled_template(template)
+    except Exception as e:
+        raise JobError(f"Error decodificando plantilla: {e}") from e
+    set_progress(job, 20)
+    replacements, signatures = follow_up_acta_context(meeting)
+    set_progress(job, 40)
+    data = render_follow_up_acta(compiled, replacements, signatures)
+    DOCX_RENDERS.labels(FOLLOW_UP_ACTA_JOB).inc()
+    set_progress(job, 80)
+    store_acta(meeting, data)
+    return _result(meeting)
+
+
+@job_handler(FOLLOW_UP_ACTA_BATCH_JOB)
+def generate_follow_up_acta_batch(job):
+    meetings = follow_up_meetings_for(
+        contract=job.payload.get('contract'),
+        date_from=job.payload.get('date_from'),
+        date_to=job.payload.get('date_to'),
+    )
+    report = generate_follow_up_actas(
+        meetings,
+        workers=settings.ACTA_BATCH_WORKERS,
+        progress=lambda percent: set_progress(job, percent),
+    )
+    DOCX_RENDERS.labels(FOLLOW_UP_ACTA_BATCH_JOB).inc(report['count'])
+    return report
@@ -0,0 +1,144 @@
+"""
+Bulk regeneration of follow-up actas.
+
+Placeholder values are gathered in the calling process with a handful of
+queries, rendering is spread over a ``ProcessPoolExecutor`` whose workers
+compile the template once at start-up, and the documents are written back
+with a single ``bulk_update``. A meeting whose acta fails to render is reported
+and left as it was; it does not stop the rest of the batch.
+
+Nothing here imports models at module level: with the ``spawn`` start method
+workers import this module before Django is set up.
+"""
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# Compiled template of the current pool worker, set by ``_init_worker``.
+_compiled = None
+
+
+def _init_worker(source):
+    global _compiled
+    from django.apps import apps
+    if not apps.ready:
+        import django
+        django.setup()
+
+    from .docx_templates import CompiledTemplate
+    _compiled = CompiledTemplate(source)
+
+
+def _render_item(compiled, item):
+    """Returns ``(pk, data, error)``; exactly one of ``data`` and ``error`` is None."""
+    from .actas import render_follow_up_acta
+
+    pk, replacements, signatures = item
+    try:
+        return pk, render_follow_up_acta(compiled, replacements, signatures), None
+    except Exception as e:
+        return pk, None, f"{type(e).__name__}: {e}"
+
+
+def _render(item):
+    return _render_item(_compiled, item)
+
+
+def default_workers():
+    return os.cpu_count() or 1
+
+
+def follow_up_meetings_for(contract=None, date_from=None, date_to=None):
+    from django.db.models import Prefetch
+    from .models import FollowUpMeeting, WorkCenter
+
+    meetings = FollowUpMeeting.objects.select_related('config').defer('document_data').prefetch_related(
+        Prefetch('work_centers', queryset=WorkCenter.objects.only('id', 'name')),
+    )
+    if contract is not None:
+        meetings = meetings.filter(contract_id=contract)
+    if date_from is not None:
+        meetings = meetings.filter(date__gte=date_from)
+    if date_to is not None:
+        meetings = meetings.filter(date__lte=date_to)
+    return meetings.order_by('id')
+
+
+def generate_follow_up_actas(meetings, workers=None, progress=None):
+    """
+    Renders and stores the acta of every meeting in ``meetings``. ``progress``,
+    if given, is called with the percentage done as results come in.
+    Returns a report dict whose ``failed`` list holds the meetings that could
+    not be rendered. Raises ``JobError`` if the template is missing.
+    """
+    from django.db import connections
+    from django.utils import timezone
+    from .actas import DOCX_MIME_TYPE, FOLLOW_UP_TEMPLATE_MISSING, find_follow_up_template, follow_up_acta_context
+    from .blobstore import empty_value, put_many
+    from .docx_templates import get_compiled_template
+    from .jobs import JobError
+    from .models import FollowUpMeeting
+
+    template = find_follow_up_template()
+    if template is None:
+        raise JobError(FOLLOW_UP_TEMPLATE_MISSING)
+    compiled = get_compiled_template(template)
+
+    started = time.perf_counter()
+    meetings = list(meetings)
+    items = [(meeting.pk, *follow_up_acta_context(meeting)) for meeting in meetings]
+    gathered = time.perf_counter()
+
+    workers = max(1, min(workers or default_workers(), len(items) or 1))
+    rendered = {}
+    failed = []
+
+    def collect(results):
+        for pk, data, error in results:
+            if error is None:
+                rendered[pk] = data
+            else:
+                logger.warning("Could not render the acta of follow-up meeting %s: %s", pk, error)
+                failed.append({'id': pk, 'error': error})
+            if progress is not None:
+                progress(90 * (len(rendered) + len(failed)) // len(items))
+
+    if workers == 1:
+        collect(_render_item(compiled, item) for item in items)
+    else:
+        # Forked workers must not inherit this process's database sockets.
+        for connection in connections.all(initialized_only=True):
+            if not connection.in_atomic_block:
+                connection.close()
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(compiled.source,)) as executor:
+            chunksize = max(1, len(items) // (workers * 4))
+            collect(executor.map(_render, items, chunksize=chunksize))
+    render_done = time.perf_counter()
+
+    meetings = [meeting for meeting in meetings if meeting.pk in rendered]
+    keys = put_many((rendered[meeting.pk], DOCX_MIME_TYPE) for meeting in meetings)
+    empty = empty_value(FollowUpMeeting, 'document_data')
+    now = timezone.now()
+    for meeting, key in zip(meetings, keys):
+        meeting.document_data = empty
+        meeting.document_data_blob_id = key
+        meeting.updated_at = now
+    FollowUpMeeting.objects.bulk_update(meetings, ['document_data', 'document_data_blob', 'updated_at'])
+    finished = time.perf_counter()
+
+    total = finished - started
+    return {
+        'count': len(rendered),
+        'failed': failed,
+        'workers': workers,
+        'bytes': sum(len(data) for data in rendered.values()),
+        'gather_seconds': round(gathered - started, 3),
+        'render_seconds': round(render_done - gathered, 3),
+        'store_seconds': round(finished - render_done, 3),
+        'total_seconds': round(total, 3),
+        'actas_per_second': round(len(items) / total, 1) if total else None,
+    }
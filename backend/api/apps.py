@@ -3,3 +3,8 @@ from django.apps import AppConfig
 
 class ApiConfig(AppConfig):
     name = 'api'
+
+    def ready(self):
+        # Importing actas and sqlstats registers their job handlers.
+        from . import actas, signals, sqlstats  # noqa: F401
+        signals.connect()
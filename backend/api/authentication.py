@@ -0,0 +1,54 @@
+"""
+JWT authentication with cached users.
+
+simplejwt loads the user by primary key on every request, and the frontend
+sends its requests in bursts. ``CachedJWTAuthentication`` keeps the user it
+resolves in the ``default`` cache for ``AUTH_USER_CACHE_SECONDS``, keyed by
+user id. Saving or deleting a user, which includes changing the password,
+drops the entry (see ``api.signals``).
+
+All workers share the entry only when the cache is shared (``REDIS_URL``).
+With the per-process fallback, another worker can keep serving a stale user
+until the entry expires.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+
+def user_cache_key(user_id):
+    return f'auth:user:{user_id}'
+
+
+def forget_user(user_id):
+    key = user_cache_key(user_id)
+    cache.delete(key)
+    # A request reading the old row before the commit could cache it again.
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is None:
+            return super().get_user(validated_token)
+
+        key = user_cache_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            # Only users that pass simplejwt's checks end up in the cache.
+            user = super().get_user(validated_token)
+            cache.set(key, user, settings.AUTH_USER_CACHE_SECONDS)
+            return user
+
+        # Depends on the token, not only on the user.
+        if api_settings.CHECK_REVOKE_TOKEN and validated_token.get(
+            api_settings.REVOKE_TOKEN_CLAIM
+        ) != get_md5_hash_password(user.password):
+            raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+        return user
@@ -0,0 +1,121 @@
+"""
+Typeahead suggestions for the pickers.
+
+``/api/autocomplete/<resource>/?q=`` returns at most ``limit`` ``{id, label}``
+pairs instead of the whole table. Every word of ``q`` has to appear in one of
+the resource's search fields, ignoring case and accents. Each of those
+fields has a trigram GIN index on ``Fold(field)``, the expression the words
+are compared with, so a match is an index scan however long the list gets.
+Labels that start with ``q`` come first.
+
+Answers are cached for ``AUTOCOMPLETE_CACHE_SECONDS`` under a per-resource
+generation that any save or delete of the resource bumps, so a row created in
+a form can be picked right away.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.db.models.lookups import Contains, StartsWith
+
+from .functions import Fold, fold
+from .models import Company, CompanyContact, User, WorkCenter
+
+AUTOCOMPLETE_MIN_LENGTH = 2
+AUTOCOMPLETE_DEFAULT_LIMIT = 10
+AUTOCOMPLETE_MAX_LIMIT = 50
+# Words of ``q`` past this many are ignored.
+AUTOCOMPLETE_MAX_WORDS = 4
+
+# resource: (model, search fields, label fields, {filter param: field})
+RESOURCES = {
+    'companies': (Company, ['name', 'cif'], ['name'], {}),
+    'contacts': (CompanyContact, ['first_name', 'last_name', 'email'], ['first_name', 'last_name'], {'company': 'company_id'}),
+    'workcenters': (WorkCenter, ['name'], ['name'], {'province': 'province', 'type': 'type'}),
+    'users': (User, ['name', 'email'], ['name'], {'role': 'role'}),
+}
+
+RESOURCE_OF = {model: resource for resource, (model, _, _, _) in RESOURCES.items()}
+
+
+def _generation_key(resource):
+    return f'autocomplete:{resource}:generation'
+
+
+def forget(resource):
+    """Makes every cached answer for ``resource`` stale."""
+    key = _generation_key(resource)
+
+    def bump():
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, None)
+
+    bump()
+    # A request reading the old rows before the commit could cache them again.
+    transaction.on_commit(bump)
+
+
+def parse_params(resource, params):
+    """``(q, limit, filters)`` from the query string, or raises ValueError with ``{param: [message]}``."""
+    _, _, _, filter_fields = RESOURCES[resource]
+    errors = {}
+    q = ' '.join(params.get('q', '').split())
+
+    limit = AUTOCOMPLETE_DEFAULT_LIMIT
+    value = params.get('limit')
+    if value is not None:
+        if not value.isdigit() or int(value) == 0:
+            errors['limit'] = ["Número no válido."]
+        else:
+            limit = min(int(value), AUTOCOMPLETE_MAX_LIMIT)
+
+    filters = {}
+    for param, field in filter_fields.items():
+        value = params.get(param)
+        if not value:
+            continue
+        if field.endswith('_id') and not value.isdigit():
+            errors[param] = ["Identificador no válido."]
+        filters[field] = value
+
+    if errors:
+        raise ValueError(errors)
+    return q, limit, filters
+
+
+def _label(row, label_fields):
+    return ' '.join(str(row[field]) for field in label_fields if row[field])
+
+
+def suggest(resource, q, limit=AUTOCOMPLETE_DEFAULT_LIMIT, filters=None):
+    """Up to ``limit`` ``{id, label}`` of ``resource`` matching ``q``, prefix matches first."""
+    if len(q) < AUTOCOMPLETE_MIN_LENGTH:
+        return []
+    model, search_fields, label_fields, _ = RESOURCES[resource]
+    rows = model.objects.filter(**(filters or {}))
+    for word in fold(q).split()[:AUTOCOMPLETE_MAX_WORDS]:
+        matches = Q()
+        for field in search_fields:
+            matches |= Q(Contains(Fold(field), word))
+        rows = rows.filter(matches)
+    rows = rows.annotate(
+        prefix=Case(When(StartsWith(Fold(label_fields[0]), fold(q)), then=Value(0)), default=Value(1),
+                    output_field=IntegerField()),
+    ).order_by('prefix', *label_fields, 'pk').values('pk', *label_fields)[:limit]
+    return [{'id': row['pk'], 'label': _label(row, label_fields)} for row in rows]
+
+
+def cached_suggest(resource, q, limit=AUTOCOMPLETE_DEFAULT_LIMIT, filters=None):
+    """``suggest``, answered from the cache when the same question was asked recently."""
+    generation = cache.get(_generation_key(resource), 0)
+    question = repr((fold(q), limit, sorted((filters or {}).items())))
+    key = f'autocomplete:{resource}:{generation}:{hashlib.sha256(question.encode()).hexdigest()}'
+    suggestions = cache.get(key)
+    if suggestions is None:
+        suggestions = suggest(resource, q, limit, filters)
+        cache.set(key, suggestions, settings.AUTOCOMPLETE_CACHE_SECONDS)
+    return suggestions
@@ -0,0 +1,350 @@
+"""
+Content-addressed storage for binary payloads.
+
+Documents, templates and generated actas used to live as base64 data URIs in
+TEXT columns. Their raw bytes are now written to a pluggable store keyed by
+their SHA-256 digest, and the models only keep a foreign key to a ``Blob`` row
+holding the digest, size and content type.
+"""
+import base64
+import binascii
+import hashlib
+import os
+import tempfile
+from functools import lru_cache
+from urllib.parse import urlparse
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import Case, F, TextField, Value, When
+from django.db.models.functions import Left
+from django.db.models.lookups import Exact
+from django.urls import Resolver404, resolve, reverse
+from django.utils.module_loading import import_string
+
+DEFAULT_CONTENT_TYPE = 'application/octet-stream'
+
+
+class BlobStore:
+    """Interface every blob backend implements."""
+
+    def exists(self, key):
+        raise NotImplementedError
+
+    def save(self, key, data):
+        raise NotImplementedError
+
+    def open(self, key):
+        """Returns a binary file-like object positioned at the start of the blob."""
+        raise NotImplementedError
+
+    def iter_range(self, key, start=0, length=None, chunk_size=64 * 1024):
+        """Yields the bytes of ``key`` from ``start``, at most ``length`` of them."""
+        with self.open(key) as fh:
+            if start:
+                fh.seek(start)
+            remaining = length
+            while remaining is None or remaining > 0:
+                chunk = fh.read(chunk_size if remaining is None else min(chunk_size, remaining))
+                if not chunk:
+                    break
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+
+    def delete(self, key):
+        raise NotImplementedError
+
+
+class LocalBlobStore(BlobStore):
+    """Keeps blobs on local disk, fanned out as ``ab/cd/abcd...``."""
+
+    def __init__(self, location):
+        self.location = str(location)
+
+    def path(self, key):
+        return os.path.join(self.location, key[:2], key[2:4], key)
+
+    def exists(self, key):
+        return os.path.exists(self.path(key))
+
+    def save(self, key, data):
+        path = self.path(key)
+        if os.path.exists(path):
+            return
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        # Write to a temporary file first so readers never see a partial blob.
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as fh:
+                fh.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    def open(self, key):
+        return open(self.path(key), 'rb')
+
+    def delete(self, key):
+        try:
+            os.unlink(self.path(key))
+        except FileNotFoundError:
+            pass
+
+
+class S3BlobStore(BlobStore):
+    """Keeps blobs in an S3-compatible bucket. Requires ``boto3``."""
+
+    def __init__(self, bucket, prefix='', endpoint_url=None, region_name=None,
+                 access_key_id=None, secret_access_key=None):
+        try:
+            import boto3
+        except ImportError as e:
+            raise ImproperlyConfigured("S3BlobStore requires the 'boto3' package.") from e
+        if not bucket:
+            raise ImproperlyConfigured("S3BlobStore requires a bucket name.")
+
+        self.bucket = bucket
+        self.prefix = prefix
+        self.client = boto3.client(
+            's3',
+            endpoint_url=endpoint_url or None,
+            region_name=region_name or None,
+            aws_access_key_id=access_key_id or None,
+            aws_secret_access_key=secret_access_key or None,
+        )
+
+    def object_key(self, key):
+        return f"{self.prefix}{key}"
+
+    def exists(self, key):
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self.object_key(key))
+        except self.client.exceptions.ClientError:
+            return False
+        return True
+
+    def save(self, key, data):
+        if self.exists(key):
+            return
+        self.client.put_object(Bucket=self.bucket, Key=self.object_key(key), Body=data)
+
+    def open(self, key):
+        return self.client.get_object(Bucket=self.bucket, Key=self.object_key(key))['Body']
+
+    def iter_range(self, key, start=0, length=None, chunk_size=64 * 1024):
+        if length == 0:
+            return
+        byte_range = f"bytes={start}-" if length is None else f"bytes={start}-{start + length - 1}"
+        body = self.client.get_object(Bucket=self.bucket, Key=self.object_key(key), Range=byte_range)['Body']
+        with body:
+            yield from body.iter_chunks(chunk_size)
+
+    def delete(self, key):
+        self.client.delete_object(Bucket=self.bucket, Key=self.object_key(key))
+
+
+@lru_cache(maxsize=None)
+def get_blob_store():
+    config = settings.BLOB_STORE
+    backend = import_string(config['BACKEND'])
+    return backend(**config.get('OPTIONS', {}))
+
+
+# ── Data URI helpers ──
+
+def parse_data_uri(value):
+    """
+    Splits a ``data:<mime>;base64,<payload>`` string into ``(content_type, bytes)``.
+    Returns None for anything that is not a base64 data URI.
+    """
+    if not isinstance(value, str) or not value.startswith('data:'):
+        return None
+    header, sep, payload = value.partition(',')
+    if not sep or not header.endswith(';base64'):
+        return None
+    content_type = header[len('data:'):].split(';')[0] or DEFAULT_CONTENT_TYPE
+    try:
+        return content_type, base64.b64decode(payload)
+    except (binascii.Error, ValueError):
+        return None
+
+
+def decode_base64_payload(value):
+    """Decodes a legacy column value, which may be a data URI or bare base64."""
+    if "," in value:
+        value = value.split(",")[1]
+    return base64.b64decode(value)
+
+
+# Leading bytes of the formats stored without a data URI header.
+MAGIC_CONTENT_TYPES = (
+    (b'%PDF', 'application/pdf'),
+    (b'PK\x03\x04', 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'),
+    (b'\x89PNG', 'image/png'),
+    (b'\xff\xd8\xff', 'image/jpeg'),
+)
+
+
+def sniff_content_type(data):
+    for magic, content_type in MAGIC_CONTENT_TYPES:
+        if data.startswith(magic):
+            return content_type
+    return DEFAULT_CONTENT_TYPE
+
+
+def parse_legacy_payload(value):
+    """
+    Like ``parse_data_uri``, but also accepts the bare base64 some old rows
+    hold, guessing its content type from the leading bytes. Plain URLs and
+    anything else that is not strictly valid base64 return None.
+    """
+    payload = parse_data_uri(value)
+    if payload is not None or not isinstance(value, str) or not value or value.startswith('data:'):
+        return payload
+    if value.startswith('/'):
+        # A relative path such as ``/api/documents/1/content/`` is valid base64 too.
+        try:
+            resolve(value)
+            return None
+        except Resolver404:
+            pass
+    try:
+        data = base64.b64decode(value, validate=True)
+    except (binascii.Error, ValueError):
+        return None
+    return sniff_content_type(data), data
+
+
+# ── Blob rows ──
+
+def put_bytes(data, content_type=None):
+    """Writes ``data`` to the store (if not already there) and returns its Blob row."""
+    from .models import Blob
+
+    key = hashlib.sha256(data).hexdigest()
+    get_blob_store().save(key, data)
+    blob, _ = Blob.objects.get_or_create(
+        sha256=key,
+        defaults={'size': len(data), 'content_type': content_type or DEFAULT_CONTENT_TYPE},
+    )
+    return blob
+
+
+def put_many(payloads):
+    """
+    Like ``put_bytes`` for a list of ``(data, content_type)`` pairs, inserting
+    all missing Blob rows in one statement. Returns the keys in input order.
+    """
+    from .models import Blob
+
+    store = get_blob_store()
+    keys = []
+    rows = {}
+    for data, content_type in payloads:
+        key = hashlib.sha256(data).hexdigest()
+        store.save(key, data)
+        keys.append(key)
+        rows.setdefault(key, Blob(sha256=key, size=len(data), content_type=content_type or DEFAULT_CONTENT_TYPE))
+    Blob.objects.bulk_create(rows.values(), ignore_conflicts=True)
+    return keys
+
+
+def blob_url(key, request=None):
+    url = reverse('blob-detail', args=[key])
+    return request.build_absolute_uri(url) if request is not None else url
+
+
+def content_url(instance, request=None):
+    url = reverse(f'{instance._meta.model_name}-content', args=[instance.pk])
+    return request.build_absolute_uri(url) if request is not None else url
+
+
+def is_own_content_url(value, instance):
+    """Whether ``value`` is the ``/content/`` link of ``instance`` itself, relative or absolute."""
+    return isinstance(value, str) and urlparse(value).path == content_url(instance)
+
+
+def blob_key_from_url(value):
+    """
+    Returns the digest referenced by one of our own blob or ``/content/`` URLs.
+    Content still in a legacy column has none until ``migrate_blobs`` moves it.
+    """
+    if not isinstance(value, str) or not ('blobs/' in value or 'content/' in value):
+        return None
+    try:
+        match = resolve(urlparse(value).path)
+    except Resolver404:
+        return None
+    if match.url_name == 'blob-detail':
+        return match.kwargs.get('pk')
+    # The viewset the route resolved to says which field it serves.
+    viewset = getattr(match.func, 'cls', None)
+    field = getattr(viewset, 'blob_field', None)
+    if field is None or 'pk' not in match.kwargs:
+        return None
+    rows = viewset.queryset.model._default_manager.filter(pk=match.kwargs['pk'])
+    return rows.values_list(f'{field}_blob', flat=True).first()
+
+
+# ── Model field helpers ──
+
+def defer_blob_fields(queryset):
+    """
+    Defers the legacy blob columns of ``queryset`` and annotates ``<field>_ref``:
+    the column value when it is empty or a plain ``http`` link, ``'data:'``
+    for any inline payload. Serializers use it to build links without pulling
+    the payloads over the wire: ``= ''`` is decided from the stored length and
+    ``LEFT(..., 4)`` only reads the start of the value, so neither detoasts a
+    large payload.
+    """
+    model = queryset.model
+    annotations = {
+        f'{field}_ref': Case(
+            When(**{f'{field}__isnull': True}, then=Value(None)),
+            When(**{field: ''}, then=Value('')),
+            When(Exact(Left(field, 4), 'http'), then=F(field)),
+            default=Value('data:'),
+            output_field=TextField(),
+        )
+        for field in model.BLOB_FIELDS
+    }
+    return queryset.defer(*model.BLOB_FIELDS).annotate(**annotations)
+
+
+def is_inline_payload(value):
+    """Whether a legacy column value is a payload to serve from ``/content/`` rather than a link."""
+    return bool(value) and not value.startswith('http')
+
+
+def empty_value(model, field):
+    return None if model._meta.get_field(field).null else ''
+
+
+def read_blob_field(instance, field):
+    """Returns the bytes behind ``field``, reading the blob store or the legacy column."""
+    key = getattr(instance, f'{field}_blob_id')
+    if key:
+        with get_blob_store().open(key) as fh:
+            return fh.read()
+    value = getattr(instance, field)
+    if not value:
+        return None
+    return decode_base64_payload(value)
+
+
+def write_blob_field(instance, field, data, content_type):
+    """
+    Stores ``data`` for ``field`` and clears the legacy column.
+    Returns the field names to pass to ``save(update_fields=...)``.
+    """
+    setattr(instance, f'{field}_blob', put_bytes(data, content_type))
+    setattr(instance, field, empty_value(type(instance), field))
+    update_fields = [field, f'{field}_blob']
+    # auto_now fields are only written when listed in update_fields.
+    if any(f.name == 'updated_at' for f in instance._meta.concrete_fields):
+        update_fields.append('updated_at')
+    return update_fields
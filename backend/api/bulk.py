@@ -0,0 +1,307 @@
+"""
+Bulk writes.
+
+``/api/<resource>/bulk/`` takes a list of objects: ``POST`` creates them,
+``PATCH`` updates them by ``id`` and, where the resource has a natural key,
+``PUT`` creates or updates them by that key. Every item is validated before
+anything is written; if one fails, the response lists the errors by position
+as DRF does for ``many=True`` and nothing is saved.
+
+The related ids of all the items are loaded with one query per model and
+unique fields are checked with one query per field. The rows are written with
+``bulk_create``/``bulk_update`` (``INSERT ... ON CONFLICT DO UPDATE`` for
+upserts) and one insert per many-to-many through table, in one transaction.
+Those send no signals, so ``after_write`` does for the whole batch what
+``api.signals`` does for each saved row.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.utils import model_meta
+from rest_framework.validators import UniqueValidator
+
+from .autocomplete import RESOURCE_OF as AUTOCOMPLETED, forget as forget_suggestions
+from .dashboard import SOURCES as DASHBOARD_SOURCES, mark_stale
+from .search import KIND_OF as SEARCHABLE, index_all
+from .serializers import PrimaryKeyField, PrimaryKeyListField
+from .sync import touch_embeddings
+
+BULK_MAX_ITEMS = 500
+
+CREATE = 'create'
+UPDATE = 'update'
+UPSERT = 'upsert'
+
+
+class BulkValidationError(Exception):
+    """Carries one error dict per item, empty for the valid ones."""
+
+    def __init__(self, errors):
+        super().__init__(errors)
+        self.errors = errors
+
+
+def _check_list(items):
+    if not isinstance(items, list):
+        raise serializers.ValidationError({'non_field_errors': ["Se esperaba una lista de elementos."]})
+    if not items:
+        raise serializers.ValidationError({'non_field_errors': ["La lista está vacía."]})
+    if len(items) > BULK_MAX_ITEMS:
+        raise serializers.ValidationError({'non_field_errors': [f"Como máximo {BULK_MAX_ITEMS} elementos por petición."]})
+
+
+def _primary_key_fields(fields):
+    for name, field in fields.items():
+        if field.read_only:
+            continue
+        if isinstance(field, PrimaryKeyListField):
+            yield name, field.child_relation, True
+        elif isinstance(field, PrimaryKeyField):
+            yield name, field, False
+
+
+def preload_related(fields, items):
+    """``{model: {pk: instance}}`` for every id the items give a ``PrimaryKeyField``, one query per model."""
+    wanted = defaultdict(set)
+    querysets = {}
+    for name, field, many in _primary_key_fields(fields):
+        model = field.get_queryset().model
+        querysets.setdefault(model, field.get_queryset())
+        for item in items:
+            value = item.get(name) if isinstance(item, dict) else None
+            for data in (value if many and isinstance(value, list) else [value]):
+                if data is None:
+                    continue
+                try:
+                    wanted[model].add(field.to_pk(data))
+                except serializers.ValidationError:
+                    pass  # Reported when the item is validated.
+    return {model: querysets[model].in_bulk(wanted[model]) for model in querysets}
+
+
+def _take_unique_validators(serializer):
+    """
+    Removes the ``UniqueValidator`` of each field, which would query once per
+    item, and returns ``{field name: (source, message)}`` for ``_check_unique``.
+    """
+    unique = {}
+    for name, field in serializer.fields.items():
+        validators = [v for v in field.validators if isinstance(v, UniqueValidator)]
+        if validators:
+            field.validators = [v for v in field.validators if not isinstance(v, UniqueValidator)]
+            unique[name] = (field.source, validators[0].message)
+    return unique
+
+
+def _check_unique(model, validated, errors, unique, upsert_field=None):
+    """Flags the valid items repeating a unique value, taken in the table or earlier in the list."""
+    for name, (source, message) in unique.items():
+        positions = defaultdict(list)
+        for index, serializer in enumerate(validated):
+            if not errors[index] and serializer.validated_data.get(source) is not None:
+                positions[serializer.validated_data[source]].append(index)
+        repeated = {value for value, indexes in positions.items() if len(indexes) > 1}
+        if source != upsert_field and positions:
+            # The upsert key is the conflict target: existing values are the rows to update.
+            taken = model.objects.filter(**{f'{source}__in': list(positions)})
+            own = [s.instance.pk for s in validated if s is not None and s.instance is not None]
+            if own:
+                taken = taken.exclude(pk__in=own)
+            repeated.update(taken.values_list(source, flat=True))
+        for value in repeated:
+            for index in positions[value]:
+                errors[index].setdefault(name, []).append(message)
+
+
+def validate(serializer_class, items, context, mode, instances=None, upsert_field=None):
+    """
+    One valid bound serializer per item, or raises ``BulkValidationError``.
+    ``instances`` maps the ids of the items to the rows they update.
+    """
+    context = {**context, 'preloaded': preload_related(serializer_class(context=context).fields, items)}
+    validated = []
+    errors = []
+    unique = {}
+    for item in items:
+        instance = None
+        if mode == UPDATE:
+            instance = instances.get(item.get('id')) if isinstance(item, dict) else None
+            if instance is None:
+                validated.append(None)
+                errors.append({'id': ["No existe ningún elemento con este id."]})
+                continue
+        serializer = serializer_class(instance, data=item, partial=mode == UPDATE, context=context)
+        unique = _take_unique_validators(serializer)
+        serializer.is_valid()
+        validated.append(serializer)
+        errors.append(dict(serializer.errors))
+
+    if mode == UPDATE:
+        # bulk_update() writes a row once, so an item repeating an id would be lost.
+        positions = defaultdict(list)
+        for index, serializer in enumerate(validated):
+            if serializer is not None:
+                positions[serializer.instance.pk].append(index)
+        for indexes in positions.values():
+            if len(indexes) > 1:
+                for index in indexes:
+                    errors[index].setdefault('id', []).append("Repetido en la lista.")
+    if upsert_field is not None:
+        # Existing values are the rows to update, but an upsert may not touch a row twice.
+        unique[upsert_field] = (upsert_field, "Repetido en la lista.")
+    _check_unique(serializer_class.Meta.model, validated, errors, unique, upsert_field)
+    if any(errors):
+        raise BulkValidationError(errors)
+    return validated
+
+
+def _split(serializer):
+    """The validated data of ``serializer`` as column values and many-to-many values."""
+    data = dict(serializer.validated_data)
+    if hasattr(serializer, '_store_blobs'):
+        data = serializer._store_blobs(data)
+    relations = model_meta.get_field_info(serializer.Meta.model).relations
+    many = {
+        name: data.pop(name) for name in list(data)
+        if name in relations and relations[name].to_many and not relations[name].reverse
+    }
+    return data, many
+
+
+def _field_names(model, data):
+    return {model._meta.get_field(name).name for name in data}
+
+
+def _set_many_to_many(model, rows, values, replace):
+    """Writes the many-to-many ``values`` of each row with one insert per through table."""
+    for name in {name for row_values in values for name in row_values}:
+        field = model._meta.get_field(name)
+        through = field.remote_field.through
+        source, target = field.m2m_field_name(), field.m2m_reverse_field_name()
+        owners = [(row, row_values[name]) for row, row_values in zip(rows, values) if name in row_values]
+        if replace:
+            through.objects.filter(**{f'{source}_id__in': [row.pk for row, _ in owners]}).delete()
+        through.objects.bulk_create([
+            through(**{f'{source}_id': row.pk, f'{target}_id': related.pk})
+            for row, related_objects in owners
+            for related in dict.fromkeys(related_objects)
+        ])
+
+
+def _build(model, validated):
+    rows = []
+    fields = []
+    values = []
+    for serializer in validated:
+        data, many = _split(serializer)
+        rows.append(model(**data))
+        fields.append(frozenset(_field_names(model, data)))
+        values.append(many)
+    return rows, fields, values
+
+
+def _create(model, rows, values):
+    model.objects.bulk_create(rows)
+    _set_many_to_many(model, rows, values, replace=False)
+
+
+def _update(model, validated):
+    rows = []
+    values = []
+    fields = set()
+    now = timezone.now()
+    for serializer in validated:
+        data, many = _split(serializer)
+        row = serializer.instance
+        for name, value in data.items():
+            setattr(row, name, value)
+        fields.update(_field_names(model, data))
+        if hasattr(row, 'updated_at'):
+            # bulk_update() skips pre_save(), which is what sets auto_now fields.
+            row.updated_at = now
+            fields.add('updated_at')
+        rows.append(row)
+        values.append(many)
+    if fields:
+        model.objects.bulk_update(rows, sorted(fields))
+    _set_many_to_many(model, rows, values, replace=True)
+
+
+def _upsert(model, rows, fields, values, upsert_field):
+    # Only the fields an item sends are overwritten, so items sending different fields go apart.
+    groups = defaultdict(list)
+    for row, row_fields in zip(rows, fields):
+        groups[row_fields].append(row)
+    for group_fields, group in groups.items():
+        update_fields = set(group_fields) - {upsert_field}
+        if hasattr(model, 'updated_at'):
+            update_fields.add('updated_at')
+        model.objects.bulk_create(
+            group, update_conflicts=True, unique_fields=[upsert_field], update_fields=sorted(update_fields),
+        )
+    _set_many_to_many(model, rows, values, replace=True)
+
+
+def _stored(model, rows, key):
+    """
+    ``{id(row): parent id}`` as stored before the write, for the ``rows``
+    already in the table by ``key``. The parent is the dashboard parent of
+    ``model``, ``None`` for the other models.
+    """
+    attname = model._meta.get_field(key).attname
+    existing = model.objects.filter(**{f'{attname}__in': [getattr(row, attname) for row in rows]})
+    if model in DASHBOARD_SOURCES:
+        stored = dict(existing.values_list(attname, f'{DASHBOARD_SOURCES[model][0]}_id'))
+    else:
+        stored = dict.fromkeys(existing.values_list(attname, flat=True))
+    return {id(row): stored[getattr(row, attname)] for row in rows if getattr(row, attname) in stored}
+
+
+def after_write(model, rows, previous_parents=None):
+    """What the ``post_save`` receivers in ``api.signals`` do, once for the whole batch."""
+    if model in DASHBOARD_SOURCES:
+        for row in rows:
+            mark_stale(row, (previous_parents or {}).get(row.pk))
+    if model in SEARCHABLE:
+        index_all(model, rows)
+    if model in AUTOCOMPLETED:
+        forget_suggestions(AUTOCOMPLETED[model])
+    touch_embeddings(model, [row.pk for row in rows])
+
+
+def write(serializer_class, items, context, mode, upsert_field=None):
+    """
+    Validates and saves ``items`` with ``serializer_class``; returns the rows in
+    the order of the items (on upserts, ``row._created`` tells whether the row
+    is new). Raises ``BulkValidationError`` when an item is
+    invalid, ``serializers.ValidationError`` when ``items`` is no usable list.
+    """
+    _check_list(items)
+    model = serializer_class.Meta.model
+    if mode != UPSERT:
+        upsert_field = None
+    instances = None
+    if mode == UPDATE:
+        ids = {item.get('id') for item in items if isinstance(item, dict) and isinstance(item.get('id'), int)}
+        instances = model._default_manager.in_bulk(ids)
+    validated = validate(serializer_class, items, context, mode, instances, upsert_field)
+
+    with transaction.atomic():
+        if mode == UPDATE:
+            rows = [serializer.instance for serializer in validated]
+            previous = _stored(model, rows, model._meta.pk.name) if model in DASHBOARD_SOURCES else {}
+            _update(model, validated)
+        else:
+            rows, fields, values = _build(model, validated)
+            if mode == CREATE:
+                previous = {}
+                _create(model, rows, values)
+            else:
+                previous = _stored(model, rows, upsert_field)
+                _upsert(model, rows, fields, values, upsert_field)
+                for row in rows:
+                    row._created = id(row) not in previous
+        after_write(model, rows, {row.pk: previous.get(id(row)) for row in rows})
+    return rows
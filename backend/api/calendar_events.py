@@ -0,0 +1,109 @@
+"""
+Calendar of initial and follow-up meetings.
+
+``/api/calendar/?from=&to=`` reads both tables with a range query on their
+date index (``api_meeting_start_idx``, ``api_followup_date_idx``), each
+already sorted by date, time and id, and merges the two streams into one
+list of small event dicts. The span is capped at ``CALENDAR_MAX_DAYS``, so
+the cost depends on the range asked for, not on the history.
+"""
+import heapq
+from datetime import timedelta
+
+from django.db.models import Exists, F, IntegerField, OuterRef, Q, Value
+from django.utils.dateparse import parse_date
+
+from .models import FollowUpMeeting, Meeting, Project, WorkCenter
+
+CALENDAR_MAX_DAYS = 366
+
+MEETING = 'meeting'
+FOLLOW_UP = 'follow_up'
+
+EVENT_FIELDS = ('kind', 'id', 'date', 'time', 'reason', 'status', 'type', 'location', 'contract_id', 'project_id')
+
+
+def parse_range(params):
+    """Returns ``(start, end)`` from ``from``/``to``, or raises ValueError with ``{param: [message]}``."""
+    errors = {}
+    bounds = []
+    for param in ('from', 'to'):
+        value = params.get(param)
+        day = parse_date(value) if value else None
+        if day is None:
+            errors[param] = ["Fecha obligatoria en formato AAAA-MM-DD."]
+        bounds.append(day)
+    if not errors:
+        start, end = bounds
+        if end < start:
+            errors['to'] = ["Debe ser igual o posterior a 'from'."]
+        elif end - start >= timedelta(days=CALENDAR_MAX_DAYS):
+            errors['to'] = [f"El intervalo no puede superar {CALENDAR_MAX_DAYS} días."]
+    if errors:
+        raise ValueError(errors)
+    return bounds
+
+
+def parse_filters(params):
+    """``work_center``, ``province`` and ``company`` as lists; raises ValueError like ``parse_range``."""
+    filters = {}
+    errors = {}
+    for param, name in (('work_center', 'work_centers'), ('province', 'provinces'), ('company', 'companies')):
+        value = params.get(param)
+        values = [v for v in value.split(',') if v != ''] if value else []
+        if param != 'province' and not all(v.isdigit() for v in values):
+            errors[param] = ["Identificadores no válidos."]
+        filters[name] = values
+    if errors:
+        raise ValueError(errors)
+    return filters
+
+
+def meeting_events(start, end, work_centers=(), provinces=(), companies=()):
+    meetings = Meeting.objects.filter(start_date__range=(start, end))
+    if work_centers:
+        meetings = meetings.filter(project__work_center_id__in=work_centers)
+    if provinces:
+        meetings = meetings.filter(project__work_center__province__in=provinces)
+    if companies:
+        meetings = meetings.filter(Exists(Project.companies.through.objects.filter(
+            project_id=OuterRef('project_id'), company_id__in=companies,
+        )))
+    return meetings.order_by('start_date', 'time', 'id').values(
+        'id', 'time', 'reason', 'status', 'type', 'location', 'project_id',
+        kind=Value(MEETING), date=F('start_date'), contract_id=F('project__contract_id'),
+    )
+
+
+def follow_up_events(start, end, work_centers=(), provinces=(), companies=()):
+    follow_ups = FollowUpMeeting.objects.filter(date__range=(start, end))
+    if work_centers:
+        follow_ups = follow_ups.filter(Exists(FollowUpMeeting.work_centers.through.objects.filter(
+            followupmeeting_id=OuterRef('pk'), workcenter_id__in=work_centers,
+        )))
+    if provinces:
+        # Listed on the meeting itself, or implied by one of its work centers.
+        listed = Q()
+        for province in provinces:
+            listed |= Q(provinces__contains=[province])
+        follow_ups = follow_ups.filter(listed | Exists(WorkCenter.objects.filter(
+            follow_up_meetings=OuterRef('pk'), province__in=provinces,
+        )))
+    if companies:
+        follow_ups = follow_ups.filter(Exists(FollowUpMeeting.companies.through.objects.filter(
+            followupmeeting_id=OuterRef('pk'), company_id__in=companies,
+        )))
+    return follow_ups.order_by('date', 'time', 'id').values(
+        'id', 'date', 'time', 'reason', 'status', 'type', 'location', 'contract_id',
+        kind=Value(FOLLOW_UP), project_id=Value(None, output_field=IntegerField()),
+    )
+
+
+def events(start, end, **filters):
+    """Both kinds of meeting between ``start`` and ``end`` (inclusive), in time order."""
+    merged = heapq.merge(
+        meeting_events(start, end, **filters),
+        follow_up_events(start, end, **filters),
+        key=lambda event: (event['date'], event['time'], event['kind'], event['id']),
+    )
+    return [{field: event[field] for field in EVENT_FIELDS} for event in merged]
@@ -0,0 +1,182 @@
+"""
+camelCase JSON for the API.
+
+Drop-in replacements for ``djangorestframework_camel_case``'s JSON renderer
+and parser. Key translations are memoized (an API has a few hundred distinct
+keys, so the regexes run once per key instead of once per key per row) and
+documents are encoded/decoded with ``orjson``.
+
+The renderer's output is byte-identical to ``CamelCaseJSONRenderer``'s: the
+few values ``orjson`` would write differently (datetimes, floats in exponent
+notation, integers beyond 64 bits, indented output, ...) send the whole
+response through the stock renderer instead.
+"""
+import json
+
+import orjson
+from django.conf import settings
+from django.utils.encoding import force_str
+from django.utils.functional import Promise
+from djangorestframework_camel_case.settings import api_settings as camel_case_settings
+from djangorestframework_camel_case.util import camelize_re, camel_to_underscore, underscore_to_camel
+from rest_framework import renderers
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.utils import encoders
+
+# Keys seen beyond this many are translated but no longer remembered, so
+# clients sending arbitrary keys cannot grow the caches without bound.
+MAX_CACHED_KEYS = 4096
+
+_camel_keys = {}
+_underscore_keys = {}
+
+
+def camel_key(key):
+    try:
+        return _camel_keys[key]
+    except KeyError:
+        pass
+    new_key = camelize_re.sub(underscore_to_camel, key) if '_' in key else key
+    if len(_camel_keys) < MAX_CACHED_KEYS:
+        _camel_keys[key] = new_key
+    return new_key
+
+
+def underscore_key(key):
+    try:
+        return _underscore_keys[key]
+    except KeyError:
+        pass
+    new_key = camel_to_underscore(key, **camel_case_settings.JSON_UNDERSCOREIZE)
+    if len(_underscore_keys) < MAX_CACHED_KEYS:
+        _underscore_keys[key] = new_key
+    return new_key
+
+
+class _NotPortable(Exception):
+    """Raised while walking a document ``orjson`` would not encode like ``json``."""
+
+
+def _check_float(value):
+    # Outside this range ``repr`` switches to exponent notation ("1e+16"), which orjson spells differently.
+    if value != 0 and not 1e-4 <= abs(value) < 1e16:
+        raise _NotPortable
+    return value
+
+
+def camelize(data, check_floats=False):
+    """
+    ``djangorestframework_camel_case.util.camelize`` with memoized keys. Like
+    the original, every non-string iterable comes out as a list.
+    """
+    data_type = type(data)
+    if data_type is str or data_type is int or data_type is bool or data is None:
+        return data
+    if data_type is float:
+        return _check_float(data) if check_floats else data
+    if isinstance(data, Promise):
+        data = force_str(data)
+    if isinstance(data, dict):
+        ignore_fields = camel_case_settings.JSON_UNDERSCOREIZE.get('ignore_fields') or ()
+        ignore_keys = camel_case_settings.JSON_UNDERSCOREIZE.get('ignore_keys') or ()
+        new_dict = {}
+        for key, value in data.items():
+            if isinstance(key, Promise):
+                key = force_str(key)
+            new_key = camel_key(key) if isinstance(key, str) else key
+            if ignore_fields and (key in ignore_fields or new_key in ignore_fields):
+                result = value
+            else:
+                result = camelize(value, check_floats)
+            if ignore_keys and (key in ignore_keys or new_key in ignore_keys):
+                new_dict[key] = result
+            else:
+                new_dict[new_key] = result
+        return new_dict
+    if isinstance(data, str):
+        return data
+    if isinstance(data, float) and check_floats:
+        _check_float(data)
+    try:
+        iterator = iter(data)
+    except TypeError:
+        return data
+    return [camelize(item, check_floats) for item in iterator]
+
+
+def underscoreize(data):
+    """Inverse of ``camelize`` for parsed JSON (only dicts, lists and scalars)."""
+    if type(data) is dict:
+        ignore_fields = camel_case_settings.JSON_UNDERSCOREIZE.get('ignore_fields') or ()
+        ignore_keys = camel_case_settings.JSON_UNDERSCOREIZE.get('ignore_keys') or ()
+        new_dict = {}
+        for key, value in data.items():
+            new_key = underscore_key(key)
+            if ignore_fields and (key in ignore_fields or new_key in ignore_fields):
+                result = value
+            else:
+                result = underscoreize(value)
+            if ignore_keys and (key in ignore_keys or new_key in ignore_keys):
+                new_dict[key] = result
+            else:
+                new_dict[new_key] = result
+        return new_dict
+    if type(data) is list:
+        return [underscoreize(item) for item in data]
+    return data
+
+
+_encoder = encoders.JSONEncoder()
+
+
+def _default(value):
+    # Whatever orjson cannot encode natively is converted the way DRF's encoder does.
+    result = _encoder.default(value)
+    if isinstance(result, float):
+        _check_float(result)
+    return result
+
+
+ORJSON_OPTIONS = (
+    orjson.OPT_NON_STR_KEYS
+    | orjson.OPT_PASSTHROUGH_DATETIME
+    | orjson.OPT_PASSTHROUGH_DATACLASS
+)
+
+
+class CamelCaseORJSONRenderer(renderers.JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if indent is None and self.compact and not self.ensure_ascii:
+            try:
+                ret = orjson.dumps(camelize(data, check_floats=True), default=_default, option=ORJSON_OPTIONS)
+            except (_NotPortable, TypeError, ValueError):
+                pass
+            else:
+                # Same escapes as DRF: these are valid JSON but break JavaScript string literals.
+                return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+
+        return super().render(camelize(data), accepted_media_type, renderer_context)
+
+
+class CamelCaseORJSONParser(JSONParser):
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+
+        try:
+            raw = stream.read()
+            if encoding.lower().replace('-', '') != 'utf8':
+                raw = raw.decode(encoding)
+            try:
+                data = orjson.loads(raw)
+            except orjson.JSONDecodeError:
+                # ``json`` also accepts NaN/Infinity and integers beyond 64 bits.
+                data = json.loads(raw)
+            return underscoreize(data)
+        except ValueError as exc:
+            raise ParseError("JSON parse error - %s" % str(exc))
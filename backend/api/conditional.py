@@ -0,0 +1,103 @@
+"""
+Conditional GET for the REST API.
+
+Responses carry a weak ETag derived from the rows' ``updated_at`` and a
+request with a matching ``If-None-Match`` gets a ``304`` before the queryset
+is loaded or serialized. Rows embedded by default touch their parents'
+``updated_at`` (see ``sync``), so a parent's version also covers them. Objects
+only nested on ``?expand=`` do not, so expanded responses carry no validators.
+"""
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+from .serializers import expanded_fields
+from .sync import has_updated_at
+
+
+def make_etag(*parts):
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode()).hexdigest()
+    return f'W/"{digest}"'
+
+
+def conditional_response(request, etag, last_modified=None):
+    """
+    Returns the ``304``/``412`` response the request's validators call for, or
+    None when the view should answer normally. ``last_modified`` is a datetime.
+    """
+    timestamp = int(last_modified.timestamp()) if last_modified is not None else None
+    response = get_conditional_response(request._request, etag=etag, last_modified=timestamp)
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
+
+
+def set_validators(response, etag, last_modified=None):
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    # Cached copies may be reused, but only after revalidating with us.
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+class ConditionalGetMixin:
+    """
+    ETags for ``list`` and ``retrieve``. A list's version is ``max(updated_at)``
+    plus the row count of the filtered queryset (the count catches deletions);
+    a detail's is the row's ``updated_at``. With ``last_modified_header`` set,
+    details also send and honour ``Last-Modified``.
+    """
+    last_modified_header = False
+
+    def _versioned(self, request):
+        return (
+            has_updated_at(self.get_queryset().model)
+            and not expanded_fields(self.get_serializer_class(), request)
+        )
+
+    def _variant(self, request):
+        # Filters, ordering, page and renderer all change the body.
+        return request.get_full_path(), request.accepted_renderer.format
+
+    def list(self, request, *args, **kwargs):
+        if not self._versioned(request):
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        version = queryset.order_by().aggregate(last_modified=Max('updated_at'), count=Count('pk'))
+        etag = make_etag(*self._variant(request), version['last_modified'], version['count'])
+
+        response = conditional_response(request, etag)
+        if response is None:
+            response = super().list(request, *args, **kwargs)
+            if response.status_code == 200:
+                set_validators(response, etag)
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        if not self._versioned(request):
+            return super().retrieve(request, *args, **kwargs)
+
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        updated_at = (
+            self.filter_queryset(self.get_queryset())
+            .filter(**{self.lookup_field: kwargs[lookup_url_kwarg]})
+            .prefetch_related(None).order_by()
+            .values_list('updated_at', flat=True).first()
+        )
+        if updated_at is None:
+            # Let the regular path produce the 404.
+            return super().retrieve(request, *args, **kwargs)
+
+        etag = make_etag(*self._variant(request), updated_at)
+        last_modified = updated_at if self.last_modified_header else None
+
+        response = conditional_response(request, etag, last_modified)
+        if response is None:
+            response = super().retrieve(request, *args, **kwargs)
+            if response.status_code == 200:
+                set_validators(response, etag, last_modified)
+        return response
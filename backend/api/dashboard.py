@@ -0,0 +1,169 @@
+"""
+Dashboard figures.
+
+``DashboardCounter`` holds, per contract, how many projects, documents,
+meetings and follow-up meetings are in each status. Saving or deleting one
+of them marks its contract's counters as stale; they are recounted with one
+``GROUP BY`` per metric when the transaction commits, so a cascade deleting
+a project with all its documents recounts each contract once.
+
+``/api/dashboard/`` adds the counters up for the contracts the user sees (all
+of them for managers, the ones they coordinate otherwise). Only the figures
+that move with the calendar, the upcoming meetings, are counted live.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from .models import Contract, DashboardCounter, FollowUpMeeting, Meeting, Project, ProjectDocument
+
+# metric: (model, path to the contract id, field counted by value)
+METRICS = {
+    'projects': (Project, 'contract_id', 'company_status'),
+    'documents': (ProjectDocument, 'project__contract_id', 'status'),
+    'meetings': (Meeting, 'project__contract_id', 'status'),
+    'follow_ups': (FollowUpMeeting, 'contract_id', 'status'),
+}
+
+# model: (its parent, contract or project; the metrics a change of it affects)
+SOURCES = {
+    Project: ('contract', ['projects', 'documents', 'meetings']),
+    ProjectDocument: ('project', ['documents']),
+    Meeting: ('project', ['meetings']),
+    FollowUpMeeting: ('contract', ['follow_ups']),
+}
+
+
+def recount(metric, contract_ids):
+    """Recomputes the counters of ``metric`` for the given contracts."""
+    if not contract_ids:
+        return
+    model, contract_path, field = METRICS[metric]
+    rows = (
+        model.objects.filter(**{f'{contract_path}__in': contract_ids})
+        .values_list(contract_path, field)
+        .annotate(total=Count('pk'))
+        .order_by()
+    )
+    counters = [
+        DashboardCounter(contract_id=contract_id, metric=metric, key=key, count=total)
+        for contract_id, key, total in rows
+    ]
+
+    kept = defaultdict(list)
+    for counter in counters:
+        kept[counter.contract_id].append(counter.key)
+    stale = Q()
+    for contract_id in contract_ids:
+        stale |= Q(contract_id=contract_id) & ~Q(key__in=kept[contract_id])
+    DashboardCounter.objects.filter(stale, metric=metric).delete()
+    DashboardCounter.objects.bulk_create(
+        counters, update_conflicts=True, unique_fields=['contract', 'metric', 'key'], update_fields=['count'],
+    )
+
+
+def recount_all():
+    """Rebuilds every counter."""
+    contract_ids = list(Contract.objects.values_list('pk', flat=True))
+    with transaction.atomic():
+        for metric in METRICS:
+            recount(metric, contract_ids)
+
+
+class _Pending:
+    """Contracts (directly or by project) whose counters a transaction made stale."""
+
+    def __init__(self):
+        self.contracts = defaultdict(set)
+        self.projects = defaultdict(set)
+        self.done = False
+
+    def __call__(self):
+        if self.done:
+            return
+        self.done = True
+        if self.projects:
+            project_ids = set().union(*self.projects.values())
+            contract_of = dict(Project.objects.filter(pk__in=project_ids).values_list('pk', 'contract_id'))
+            for metric, ids in self.projects.items():
+                self.contracts[metric].update(contract_of[pk] for pk in ids if pk in contract_of)
+        with transaction.atomic():
+            for metric, contract_ids in self.contracts.items():
+                recount(metric, contract_ids)
+
+
+def _pending(connection):
+    pending = getattr(connection, 'dashboard_pending', None)
+    if pending is None or pending.done:
+        pending = connection.dashboard_pending = _Pending()
+    return pending
+
+
+def affects_counters(instance, update_fields):
+    """Whether a save limited to ``update_fields`` may change the counters."""
+    if update_fields is None:
+        return True
+    parent, metrics = SOURCES[type(instance)]
+    counted = {METRICS[metric][2] for metric in metrics if METRICS[metric][0] is type(instance)}
+    return not {parent, f'{parent}_id', *counted}.isdisjoint(update_fields)
+
+
+def mark_stale(instance, previous=None):
+    """Queues a recount for the contract of ``instance`` (and of ``previous``, its old parent id)."""
+    parent, metrics = SOURCES[type(instance)]
+    parents = {getattr(instance, f'{parent}_id'), previous} - {None}
+    connection = transaction.get_connection()
+    pending = _pending(connection)
+    target = pending.contracts if parent == 'contract' else pending.projects
+    for metric in metrics:
+        target[metric].update(parents)
+    if connection.in_atomic_block:
+        # Registered on every change: rolling back a savepoint only drops the
+        # callbacks made inside it, and the first one left recounts for all.
+        # What a rolled back transaction collected is recounted by the next
+        # one, which is wasted work but never a wrong figure.
+        connection.on_commit(pending)
+    else:
+        pending()
+
+
+def previous_parent(instance):
+    """The parent id stored for ``instance`` before this save, when it may have changed."""
+    if instance._state.adding or instance.pk is None:
+        return None
+    parent, _ = SOURCES[type(instance)]
+    return type(instance).objects.filter(pk=instance.pk).values_list(f'{parent}_id', flat=True).first()
+
+
+def summary(user):
+    """The dashboard figures visible to ``user``."""
+    today = timezone.localdate()
+    counters = DashboardCounter.objects.all()
+    contracts = Contract.objects.all()
+    meetings = Meeting.objects.filter(status='PROGRAMADA', start_date__gte=today)
+    follow_ups = FollowUpMeeting.objects.filter(status='PROGRAMADA', date__gte=today)
+    if user.role != 'MANAGER':
+        counters = counters.filter(contract__coordinator=user)
+        contracts = contracts.filter(coordinator=user)
+        meetings = meetings.filter(project__contract__coordinator=user)
+        follow_ups = follow_ups.filter(contract__coordinator=user)
+
+    by_status = {metric: {} for metric in METRICS}
+    for metric, key, total in counters.values_list('metric', 'key').annotate(total=Sum('count')).order_by():
+        by_status[metric][key] = total
+
+    return {
+        'contracts': contracts.count(),
+        'projects': {'total': sum(by_status['projects'].values()), 'by_status': by_status['projects']},
+        'documents': {'total': sum(by_status['documents'].values()), 'by_status': by_status['documents']},
+        'meetings': {
+            'total': sum(by_status['meetings'].values()), 'by_status': by_status['meetings'],
+            'upcoming': meetings.count(),
+        },
+        'follow_ups': {
+            'total': sum(by_status['follow_ups'].values()), 'by_status': by_status['follow_ups'],
+            'upcoming': follow_ups.count(),
+        },
+    }
@@ -0,0 +1,121 @@
+from django.core.exceptions import FieldDoesNotExist, ValidationError as DjangoValidationError
+from django.db import models
+from django.db.models.constants import LOOKUP_SEP
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from djangorestframework_camel_case.util import camel_to_underscore
+from rest_framework import serializers
+from rest_framework.filters import BaseFilterBackend, OrderingFilter
+
+
+def _spans_many(model, lookup):
+    """True when ``lookup`` traverses a to-many relation (and may duplicate rows)."""
+    for part in lookup.split(LOOKUP_SEP):
+        try:
+            field = model._meta.get_field(part)
+        except FieldDoesNotExist:
+            return False
+        if field.many_to_many or field.one_to_many:
+            return True
+        if not field.is_relation:
+            return False
+        model = field.related_model
+    return False
+
+
+def _range_filter(model, field, op, value):
+    """Builds the lookup for one date bound; plain dates on datetime fields compare by day."""
+    # parse_datetime() also takes a plain date as midnight, so dates are tried first.
+    day = parse_date(value)
+    if day is not None:
+        if isinstance(model._meta.get_field(field), models.DateTimeField):
+            return {f'{field}__date__{op}': day}
+        return {f'{field}__{op}': day}
+    moment = parse_datetime(value)
+    if moment is None:
+        raise ValueError(value)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return {f'{field}__{op}': moment}
+
+
+def underscored_params(request):
+    """
+    The query parameters keyed by their snake_case name, so the client may send
+    ``startDateFrom`` like it sends every other name. The first spelling wins.
+    """
+    params = {}
+    for key, value in request.query_params.items():
+        params.setdefault(camel_to_underscore(key), value)
+    return params
+
+
+class QueryParamFilterBackend(BaseFilterBackend):
+    """
+    Server-side filtering driven by two view attributes:
+
+    * ``filter_fields`` maps a query parameter to an ORM lookup. Comma separated
+      values become an ``__in`` filter: ``?status=PROGRAMADA,EN_CURSO``.
+    * ``date_range_fields`` maps a parameter prefix to a date/datetime field and
+      accepts inclusive ``<prefix>_from`` / ``<prefix>_to`` bounds.
+
+    Parameters may be given in camelCase or snake_case.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        params = underscored_params(request)
+        filters = {}
+        errors = {}
+
+        for param, lookup in getattr(view, 'filter_fields', {}).items():
+            value = params.get(param)
+            if value in (None, ''):
+                continue
+            values = [v for v in value.split(',') if v != '']
+            if len(values) > 1:
+                filters[f'{lookup}__in'] = values
+            else:
+                filters[lookup] = values[0]
+
+        for param, field in getattr(view, 'date_range_fields', {}).items():
+            for suffix, op in (('from', 'gte'), ('to', 'lte')):
+                value = params.get(f'{param}_{suffix}')
+                if not value:
+                    continue
+                try:
+                    filters.update(_range_filter(queryset.model, field, op, value))
+                except ValueError:
+                    errors[f'{param}_{suffix}'] = ["Fecha no válida. Use el formato AAAA-MM-DD."]
+
+        if errors:
+            raise serializers.ValidationError(errors)
+        if not filters:
+            return queryset
+
+        try:
+            queryset = queryset.filter(**filters)
+        except (ValueError, DjangoValidationError) as e:
+            raise serializers.ValidationError({'detail': [str(e)]})
+
+        if any(_spans_many(queryset.model, lookup) for lookup in filters):
+            queryset = queryset.distinct()
+        return queryset
+
+
+class StableOrderingFilter(OrderingFilter):
+    """
+    ``?ordering=`` restricted to the view's ``ordering_fields``, always ending
+    on the primary key so cursor pages are deterministic. Field names may be
+    given in camelCase: ``?ordering=-startDate``.
+    """
+    ordering_fields = ['id']
+
+    def remove_invalid_fields(self, queryset, fields, view, request):
+        fields = [camel_to_underscore(field) for field in fields]
+        return super().remove_invalid_fields(queryset, fields, view, request)
+
+    def get_ordering(self, request, queryset, view):
+        ordering = list(super().get_ordering(request, queryset, view) or ['-id'])
+        if not any(field.lstrip('-') in ('id', 'pk') for field in ordering):
+            ordering.append('-id' if ordering[0].startswith('-') else 'id')
+        return ordering
@@ -0,0 +1,25 @@
+"""
+Database functions shared by model indexes and queries.
+"""
+from django.db.models import CharField, Func
+
+ACCENTED = 'áàâäãéèêëíìîïóòôöõúùûüñçÁÀÂÄÃÉÈÊËÍÌÎÏÓÒÔÖÕÚÙÛÜÑÇ'
+PLAIN = 'aaaaaeeeeiiiiooooouuuuncAAAAAEEEEIIIIOOOOOUUUUNC'
+
+_FOLD_TABLE = str.maketrans(ACCENTED, PLAIN)
+
+
+class Fold(Func):
+    """
+    ``expression`` in upper case without Spanish accents, for case and accent
+    insensitive matching. Unlike ``unaccent()`` it is immutable and needs no
+    extension, so it can be indexed; and unlike ``UPPER()`` alone it does not
+    depend on the database ctype, which under ``C`` leaves "é" alone.
+    """
+    template = f"UPPER(TRANSLATE(%(expressions)s, '{ACCENTED}', '{PLAIN}'))"
+    output_field = CharField()
+
+
+def fold(text):
+    """What ``Fold`` does, for the value compared with it."""
+    return text.translate(_FOLD_TABLE).upper()
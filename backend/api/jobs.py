@@ -0,0 +1,169 @@
+"""
+Database-backed background jobs.
+
+Requests that would otherwise do slow work inline (rendering actas, embedding
+signature images) store a ``Job`` row instead and answer ``202 Accepted``.
+``manage.py run_jobs`` claims pending rows with ``SELECT ... FOR UPDATE SKIP
+LOCKED``, so several workers can poll the same table without a broker and
+without handing the same job out twice.
+"""
+import datetime
+import logging
+import os
+import socket
+import traceback
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .metrics import JOB_FAILURES
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+PENDING = 'PENDIENTE'
+RUNNING = 'EN_CURSO'
+DONE = 'COMPLETADO'
+FAILED = 'ERROR'
+
+# Seconds to wait before retry N (1-based); the last value is reused.
+RETRY_DELAYS = (10, 60, 300)
+
+_handlers = {}
+# Kinds the app queues for itself (statistics, ...): hidden from the API and
+# deleted as soon as they succeed, so their rows do not pile up.
+INTERNAL_KINDS = set()
+
+
+class JobError(Exception):
+    """A failure that retrying will not fix; the job is marked as failed at once."""
+
+
+def job_handler(kind, internal=False):
+    """
+    Registers ``func(job)`` as the handler for jobs of ``kind``. Its return
+    value becomes ``job.result``. See ``INTERNAL_KINDS`` for ``internal``.
+    """
+    def decorator(func):
+        _handlers[kind] = func
+        if internal:
+            INTERNAL_KINDS.add(kind)
+        return func
+    return decorator
+
+
+def get_handler(kind):
+    return _handlers.get(kind)
+
+
+def worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def enqueue(kind, **payload):
+    """
+    Creates a pending job. Inside a transaction the row only becomes visible to
+    workers on commit, so objects created alongside it are already there.
+    """
+    if kind not in _handlers:
+        raise ValueError(f"Unknown job kind: {kind}")
+    return Job.objects.create(kind=kind, payload=payload)
+
+
+def claim_next(worker=None):
+    """Locks and marks as running the oldest due job, or returns None."""
+    now = timezone.now()
+    with transaction.atomic():
+        job = (
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(status=PENDING, run_after__lte=now)
+            .order_by('run_after', 'id')
+            .first()
+        )
+        if job is None:
+            return None
+        job.status = RUNNING
+        job.attempts += 1
+        job.locked_by = worker or worker_name()
+        job.locked_at = now
+        job.started_at = job.started_at or now
+        job.save(update_fields=['status', 'attempts', 'locked_by', 'locked_at', 'started_at'])
+    return job
+
+
+def set_progress(job, progress):
+    """
+    Records progress (0-100) without touching the rest of the row. It doubles
+    as the heartbeat ``requeue_stale`` goes by, so long handlers should call
+    it now and then.
+    """
+    job.progress = max(0, min(100, int(progress)))
+    job.locked_at = timezone.now()
+    Job.objects.filter(pk=job.pk, locked_by=job.locked_by).update(progress=job.progress, locked_at=job.locked_at)
+
+
+def _finish(job, owner, **changes):
+    """
+    Writes the outcome of a run, unless the job was requeued as stale in the
+    meantime and now belongs to another worker (or none).
+    """
+    updated = Job.objects.filter(pk=job.pk, status=RUNNING, locked_by=owner).update(
+        locked_by=None, locked_at=None, **changes,
+    )
+    if not updated:
+        logger.warning("Job %s (%s) lost its lock; its outcome is discarded", job.pk, job.kind)
+        return job
+    for field, value in changes.items():
+        setattr(job, field, value)
+    job.locked_by = None
+    job.locked_at = None
+    return job
+
+
+def run_job(job):
+    """Runs a claimed job and records its outcome. Never raises."""
+    owner = job.locked_by
+    handler = get_handler(job.kind)
+    try:
+        if handler is None:
+            raise JobError(f"No hay ningún manejador registrado para '{job.kind}'.")
+        result = handler(job)
+    except Exception as e:
+        logger.exception("Job %s (%s) failed", job.pk, job.kind)
+        JOB_FAILURES.labels(job.kind).inc()
+        error = "".join(traceback.format_exception_only(type(e), e)).strip()
+        if isinstance(e, JobError) or job.attempts >= job.max_attempts:
+            return _finish(job, owner, status=FAILED, error=error, finished_at=timezone.now())
+        delay = RETRY_DELAYS[min(job.attempts, len(RETRY_DELAYS)) - 1]
+        return _finish(job, owner, status=PENDING, error=error,
+                       run_after=timezone.now() + datetime.timedelta(seconds=delay))
+
+    if job.kind in INTERNAL_KINDS:
+        Job.objects.filter(pk=job.pk, status=RUNNING, locked_by=owner).delete()
+        job.status = DONE
+        job.result = result
+        return job
+    return _finish(job, owner, status=DONE, progress=100, result=result, error=None, finished_at=timezone.now())
+
+
+def requeue_stale(timeout):
+    """
+    Returns to the queue jobs whose worker has held them for longer than
+    ``timeout`` seconds, e.g. because the process was killed mid-render. Jobs
+    that already used all their attempts are marked as failed instead.
+    """
+    now = timezone.now()
+    stale = Job.objects.filter(status=RUNNING, locked_at__lt=now - datetime.timedelta(seconds=timeout))
+    stale.filter(attempts__gte=F('max_attempts')).update(
+        status=FAILED, error="El proceso que ejecutaba la tarea dejó de responder.",
+        locked_by=None, locked_at=None, finished_at=now,
+    )
+    return stale.update(status=PENDING, locked_by=None, locked_at=None, run_after=now)
+
+
+def prune_finished(age):
+    """Deletes jobs that finished (or failed) more than ``age`` seconds ago."""
+    horizon = timezone.now() - datetime.timedelta(seconds=age)
+    deleted, _ = Job.objects.filter(status__in=[DONE, FAILED], finished_at__lt=horizon).delete()
+    return deleted
@@ -0,0 +1,189 @@
+import io
+import time
+
+from django.core.management.base import BaseCommand
+from docx import Document
+
+from api.docx_templates import CompiledTemplate
+
+REPLACEMENTS = {
+    "{fechaReunion}": "17/10/2026",
+    "{horaReunion}": "10:30",
+    "{revision}": "Se revisa la documentación aportada por las empresas concurrentes.",
+    "{observacion}": "Sin observaciones relevantes.",
+    "{concurrencia}": "No se detectan solapes entre empresas.",
+    "{accidentes}": "No se han producido accidentes de trabajo.",
+    "{emergencia}": "Se recuerda el plan de emergencia del centro.",
+    "{temas}": "Ninguno.",
+    "{preguntas}": "Ninguna.",
+    "{numeroReunion}": 4,
+    "{anoReunion}": 2026,
+    "{lugar}": "Oficinas centrales",
+    "{centros}": "Embalse de la Concepción, Oficina Málaga",
+    "{provincias}": "MÁLAGA, SEVILLA",
+}
+
+
+# ── Previous implementation, kept as the benchmark baseline ──
+
+def replace_in_paragraph(para, replacements_dict):
+    """
+    Replaces placeholder keys in a paragraph while preserving run-level formatting.
+    """
+    full_text = para.text
+    if not any(key in full_text for key in replacements_dict):
+        return
+
+    runs = list(para.runs)
+    if not runs:
+        return
+
+    run_spans = []
+    pos = 0
+    for run in runs:
+        run_spans.append((pos, pos + len(run.text), run))
+        pos += len(run.text)
+
+    for key, val in replacements_dict.items():
+        search_start = 0
+        while True:
+            idx = full_text.find(key, search_start)
+            if idx == -1:
+                break
+            key_end = idx + len(key)
+
+            overlapping = [
+                (s, e, r) for (s, e, r) in run_spans
+                if s < key_end and e > idx
+            ]
+
+            if overlapping:
+                first_s, first_e, first_run = overlapping[0]
+
+                if len(overlapping) > 1:
+                    merged = "".join(r.text for (_, _, r) in overlapping)
+                    first_run.text = merged
+                    for (_, _, r) in overlapping[1:]:
+                        r._element.getparent().remove(r._element)
+
+                first_run.text = first_run.text.replace(key, str(val))
+
+                run_spans = []
+                pos2 = 0
+                for r in para.runs:
+                    run_spans.append((pos2, pos2 + len(r.text), r))
+                    pos2 += len(r.text)
+                full_text = para.text
+
+            search_start = idx + 1
+
+
+def replace_in_blocks(blocks, replacements_dict):
+    for p in blocks.paragraphs:
+        replace_in_paragraph(p, replacements_dict)
+    for table in blocks.tables:
+        for row in table.rows:
+            for cell in row.cells:
+                for p in cell.paragraphs:
+                    replace_in_paragraph(p, replacements_dict)
+
+
+def legacy_render(source, replacements):
+    doc = Document(io.BytesIO(source))
+    replace_in_blocks(doc, replacements)
+    for section in doc.sections:
+        replace_in_blocks(section.header, replacements)
+        replace_in_blocks(section.footer, replacements)
+    return doc
+
+
+def add_split_placeholder(paragraph, label, key):
+    """Writes ``label`` followed by ``key`` broken across runs, as Word often saves it."""
+    paragraph.add_run(label)
+    middle = len(key) // 2
+    paragraph.add_run(key[:middle]).bold = True
+    paragraph.add_run(key[middle:]).italic = True
+
+
+def build_acta_template(sections=12, table_rows=30):
+    """A follow-up acta shaped like the production template, with split placeholders."""
+    doc = Document()
+    section = doc.sections[0]
+    add_split_placeholder(section.header.paragraphs[0], "Acta de seguimiento nº ", "{numeroReunion}")
+    section.header.add_paragraph().add_run("Año {anoReunion} - {provincias}")
+    section.footer.paragraphs[0].add_run("Reunión celebrada en {lugar} el {fechaReunion}")
+
+    doc.add_heading("ACTA DE REUNIÓN DE COORDINACIÓN DE ACTIVIDADES EMPRESARIALES", level=1)
+    add_split_placeholder(doc.add_paragraph(), "Fecha: ", "{fechaReunion}")
+    add_split_placeholder(doc.add_paragraph(), "Hora: ", "{horaReunion}")
+    add_split_placeholder(doc.add_paragraph(), "Lugar: ", "{lugar}")
+    add_split_placeholder(doc.add_paragraph(), "Centros de trabajo: ", "{centros}")
+
+    keys = ["{revision}", "{observacion}", "{concurrencia}", "{accidentes}", "{emergencia}", "{temas}", "{preguntas}"]
+    for n in range(sections):
+        doc.add_heading(f"{n + 1}. Punto del orden del día", level=2)
+        for _ in range(6):
+            doc.add_paragraph(
+                "Texto fijo del acta que describe las obligaciones de coordinación "
+                "previstas en el Real Decreto 171/2004 para las empresas concurrentes."
+            )
+        add_split_placeholder(doc.add_paragraph(), "Conclusión: ", keys[n % len(keys)])
+
+    table = doc.add_table(rows=table_rows, cols=3)
+    for i, row in enumerate(table.rows):
+        row.cells[0].text = f"Centro {i}"
+        add_split_placeholder(row.cells[1].paragraphs[0], "", "{centros}")
+        row.cells[2].text = "Provincia: {provincias}"
+
+    doc.add_paragraph("{tablaFirmas}")
+    output = io.BytesIO()
+    doc.save(output)
+    return output.getvalue()
+
+
+def document_text(doc):
+    texts = [p.text for p in doc.paragraphs]
+    for table in doc.tables:
+        for row in table.rows:
+            texts.extend(cell.text for cell in row.cells)
+    for section in doc.sections:
+        texts.extend(p.text for p in section.header.paragraphs)
+        texts.extend(p.text for p in section.footer.paragraphs)
+    return texts
+
+
+class Command(BaseCommand):
+    help = "Compares the compiled DOCX template engine with the previous run-by-run replacement."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=30)
+        parser.add_argument('--sections', type=int, default=12)
+        parser.add_argument('--table-rows', type=int, default=30)
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        source = build_acta_template(options['sections'], options['table_rows'])
+
+        started = time.perf_counter()
+        compiled = CompiledTemplate(source)
+        compile_time = time.perf_counter() - started
+
+        if document_text(legacy_render(source, REPLACEMENTS)) != document_text(compiled.render(REPLACEMENTS)):
+            self.stderr.write(self.style.ERROR("Rendered text differs between implementations."))
+            return
+
+        timings = {}
+        for name, render in (
+            ('legacy', lambda: legacy_render(source, REPLACEMENTS)),
+            ('compiled', lambda: compiled.render(REPLACEMENTS)),
+        ):
+            started = time.perf_counter()
+            for _ in range(iterations):
+                render().save(io.BytesIO())
+            timings[name] = (time.perf_counter() - started) / iterations
+
+        self.stdout.write(f"Template: {len(source) / 1024:.1f} KiB, {len(compiled.placeholders)} distinct placeholders")
+        self.stdout.write(f"Compile (once):  {compile_time * 1000:8.2f} ms")
+        self.stdout.write(f"Legacy render:   {timings['legacy'] * 1000:8.2f} ms/acta")
+        self.stdout.write(f"Compiled render: {timings['compiled'] * 1000:8.2f} ms/acta")
+        self.stdout.write(self.style.SUCCESS(f"Speed-up: {timings['legacy'] / timings['compiled']:.1f}x"))
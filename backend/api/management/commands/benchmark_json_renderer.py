@@ -0,0 +1,116 @@
+import io
+import time
+
+from django.core.management.base import BaseCommand
+from djangorestframework_camel_case.parser import CamelCaseJSONParser
+from djangorestframework_camel_case.render import CamelCaseJSONRenderer
+
+from api.camel_case import CamelCaseORJSONParser, CamelCaseORJSONRenderer
+
+
+def contact_row(index):
+    return {
+        'id': index,
+        'first_name': f'Contacto {index}',
+        'last_name': 'Pérez García',
+        'email': f'contacto{index}@example.com',
+        'phone': '600000000',
+        'position': 'Técnico de prevención',
+        'company': index // 3,
+        'updated_at': '2026-10-17T10:30:00.123456Z',
+    }
+
+
+def project_row(index, companies=3, contacts=3):
+    """A ``/projects/?expand=...`` row, shaped like ``ProjectSerializer``'s output."""
+    company_rows = [
+        {
+            'id': index * companies + n,
+            'name': f'Empresa {index}-{n}',
+            'cif': f'B{index:06d}{n:02d}',
+            'address': 'Calle Larios 1, Málaga',
+            'status': 'ACTIVA',
+            'updated_at': '2026-10-17T10:30:00Z',
+            'contacts': [contact_row(index * 100 + n * 10 + c) for c in range(contacts)],
+        }
+        for n in range(companies)
+    ]
+    return {
+        'id': index,
+        'code': f'P-{index:05d}',
+        'description': 'Mantenimiento de instalaciones hidráulicas y obra civil asociada',
+        'start_date': '2026-01-01',
+        'end_date': '2026-12-31',
+        'fecha_solicitud': '2025-12-15',
+        'created_at': '2025-12-15T09:00:00Z',
+        'company_status': 'ACTIVA',
+        'documentation_status': 'PENDIENTE',
+        'contract': {
+            'id': index % 20, 'code': f'C-{index % 20}', 'description': 'Contrato marco',
+            'client_name': 'Cliente', 'contact_name': 'Responsable', 'contact_email': 'r@example.com',
+            'contact_phone': '900000000', 'start_date': '2026-01-01', 'end_date': '2026-12-31',
+            'amount': '125000.00', 'coordinator_id': 1,
+        },
+        'work_center': {
+            'id': index % 50, 'name': f'Centro {index % 50}', 'type': 'PRESA', 'address': 'Ctra. A-7',
+            'zip_code': '29001', 'phone': '900000000', 'province': 'MÁLAGA',
+            'risk_info_url': f'/api/workcenters/{index % 50}/content/', 'risk_info_file_name': 'riesgos.pdf',
+        },
+        'manager': {'id': 1, 'email': 'tecnico@example.com', 'name': 'Técnico', 'role': 'TECNICO',
+                    'avatar': None, 'phone': None, 'cif': None},
+        'companies': company_rows,
+        'contacts': [contact_row(index * 100 + c) for c in range(contacts)],
+        'contract_id': index % 20,
+        'work_center_id': index % 50,
+        'manager_id': 1,
+        'company_ids': [row['id'] for row in company_rows],
+        'contact_ids': [index * 100 + c for c in range(contacts)],
+        'main_contact_id': index * 100,
+        'contract_manager_id': None,
+    }
+
+
+class Command(BaseCommand):
+    help = "Compares the orjson camelCase renderer/parser with djangorestframework_camel_case's on a large /projects/ page."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000)
+        parser.add_argument('--iterations', type=int, default=20)
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        data = {'next': None, 'previous': None, 'results': [project_row(i) for i in range(options['rows'])]}
+
+        legacy_renderer, renderer = CamelCaseJSONRenderer(), CamelCaseORJSONRenderer()
+        body = legacy_renderer.render(data)
+        if renderer.render(data) != body:
+            self.stderr.write(self.style.ERROR("Rendered bytes differ between implementations."))
+            return
+
+        legacy_parser, parser = CamelCaseJSONParser(), CamelCaseORJSONParser()
+        if parser.parse(io.BytesIO(body)) != legacy_parser.parse(io.BytesIO(body)):
+            self.stderr.write(self.style.ERROR("Parsed data differs between implementations."))
+            return
+
+        def timed(call):
+            started = time.perf_counter()
+            for _ in range(iterations):
+                call()
+            return (time.perf_counter() - started) / iterations
+
+        timings = {
+            'legacy_render': timed(lambda: legacy_renderer.render(data)),
+            'render': timed(lambda: renderer.render(data)),
+            'legacy_parse': timed(lambda: legacy_parser.parse(io.BytesIO(body))),
+            'parse': timed(lambda: parser.parse(io.BytesIO(body))),
+        }
+
+        self.stdout.write(f"Page: {len(data['results'])} projects, {len(body) / 1024:.1f} KiB")
+        self.stdout.write(f"Legacy render: {timings['legacy_render'] * 1000:8.2f} ms")
+        self.stdout.write(f"orjson render: {timings['render'] * 1000:8.2f} ms")
+        self.stdout.write(f"Legacy parse:  {timings['legacy_parse'] * 1000:8.2f} ms")
+        self.stdout.write(f"orjson parse:  {timings['parse'] * 1000:8.2f} ms")
+        self.stdout.write(self.style.SUCCESS(
+            f"Speed-up: render {timings['legacy_render'] / timings['render']:.1f}x, "
+            f"parse {timings['legacy_parse'] / timings['parse']:.1f}x"
+        ))
@@ -0,0 +1,50 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.actas_batch import default_workers, follow_up_meetings_for, generate_follow_up_actas
+from api.jobs import JobError
+
+
+class Command(BaseCommand):
+    help = (
+        "Regenerates the actas of the follow-up meetings of a contract and/or a "
+        "date range, rendering them in parallel on a process pool."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--contract', type=int, help="Contract id.")
+        parser.add_argument('--from', dest='date_from', type=datetime.date.fromisoformat,
+                            help="First meeting date (YYYY-MM-DD), inclusive.")
+        parser.add_argument('--to', dest='date_to', type=datetime.date.fromisoformat,
+                            help="Last meeting date (YYYY-MM-DD), inclusive.")
+        parser.add_argument('--workers', type=int, default=default_workers(),
+                            help="Rendering processes (default: one per CPU).")
+
+    def handle(self, *args, **options):
+        if not (options['contract'] or options['date_from'] or options['date_to']):
+            raise CommandError("Give --contract and/or --from/--to.")
+
+        meetings = follow_up_meetings_for(
+            contract=options['contract'], date_from=options['date_from'], date_to=options['date_to'],
+        )
+        try:
+            report = generate_follow_up_actas(meetings, workers=options['workers'])
+        except JobError as e:
+            raise CommandError(str(e))
+
+        if not report['count'] and not report['failed']:
+            self.stdout.write("No follow-up meetings match.")
+            return
+        for failure in report['failed']:
+            self.stderr.write(f"Meeting {failure['id']}: {failure['error']}")
+        self.stdout.write(
+            f"Actas:      {report['count']} ({report['bytes'] / 1024:.0f} KiB)\n"
+            f"Failed:     {len(report['failed'])}\n"
+            f"Workers:    {report['workers']}\n"
+            f"Gather:     {report['gather_seconds']:.3f}s\n"
+            f"Render:     {report['render_seconds']:.3f}s\n"
+            f"Store:      {report['store_seconds']:.3f}s\n"
+            f"Total:      {report['total_seconds']:.3f}s\n"
+            f"Throughput: {report['actas_per_second']} actas/s"
+        )
@@ -0,0 +1,78 @@
+import time
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+
+from api.blobstore import empty_value, parse_legacy_payload, put_bytes
+
+
+class Command(BaseCommand):
+    help = (
+        "Moves base64 payloads stored in TEXT columns into the blob store: data "
+        "URIs, and the bare base64 older rows hold. Plain URLs are left alone. "
+        "Rows are processed in primary key order, in small batches, each row "
+        "with its own short UPDATE, so the command can be interrupted and "
+        "re-run at any time without locking the tables."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--model', action='append', dest='models',
+                            help="Limit to a model label such as 'api.ProjectDocument'. Repeatable.")
+        parser.add_argument('--batch-size', type=int, default=50)
+        parser.add_argument('--sleep', type=float, default=0.0,
+                            help="Seconds to pause between batches to throttle the load.")
+        parser.add_argument('--start-after', type=int, default=0,
+                            help="Resume after this primary key.")
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        if options['models']:
+            try:
+                models = [apps.get_model(label) for label in options['models']]
+            except (LookupError, ValueError) as e:
+                raise CommandError(str(e))
+        else:
+            models = [m for m in apps.get_app_config('api').get_models() if getattr(m, 'BLOB_FIELDS', None)]
+
+        for model in models:
+            for field in getattr(model, 'BLOB_FIELDS', ()):
+                self.migrate_field(model, field, options)
+
+    def migrate_field(self, model, field, options):
+        label = f"{model._meta.label}.{field}"
+        # Bare base64 has no prefix to filter on, so every non-empty legacy value is read.
+        pending = model.objects.filter(**{f'{field}_blob__isnull': True}).exclude(
+            **{f'{field}__isnull': True}).exclude(**{field: ''})
+        empty = empty_value(model, field)
+        last_pk = options['start_after']
+        moved = skipped = 0
+
+        while True:
+            batch = list(
+                pending.filter(pk__gt=last_pk).order_by('pk').values_list('pk', field)[:options['batch_size']]
+            )
+            if not batch:
+                break
+
+            for pk, value in batch:
+                payload = parse_legacy_payload(value)
+                if payload is None:
+                    skipped += 1
+                    continue
+                if options['dry_run']:
+                    moved += 1
+                    continue
+
+                content_type, data = payload
+                blob = put_bytes(data, content_type)
+                # Only touch the row if nobody changed it since we read it.
+                moved += model.objects.filter(**{
+                    'pk': pk, f'{field}_blob__isnull': True, field: value,
+                }).update(**{f'{field}_blob': blob, field: empty})
+
+            last_pk = batch[-1][0]
+            self.stdout.write(f"{label}: {moved} moved, {skipped} skipped (last pk {last_pk})")
+            if options['sleep']:
+                time.sleep(options['sleep'])
+
+        self.stdout.write(self.style.SUCCESS(f"{label}: done, {moved} moved, {skipped} skipped."))
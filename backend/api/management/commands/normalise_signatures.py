@@ -0,0 +1,61 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.models import FollowUpMeetingConfig, Meeting, ProjectDocument
+from api.signatures import normalise_signatures
+
+MODELS = (ProjectDocument, Meeting, FollowUpMeetingConfig)
+
+
+def _size(signatures):
+    return len(json.dumps(signatures))
+
+
+class Command(BaseCommand):
+    help = (
+        "Normalises the signature images already stored in the 'signatures' "
+        "column (see api.signatures). Rows are processed in primary key order, "
+        "in small batches, and only rewritten if nobody changed them meanwhile."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50)
+        parser.add_argument('--sleep', type=float, default=0.0,
+                            help="Seconds to pause between batches to throttle the load.")
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        for model in MODELS:
+            self.normalise_model(model, options)
+
+    def normalise_model(self, model, options):
+        label = model._meta.label
+        pending = model.objects.exclude(signatures=[])
+        last_pk = 0
+        updated = before = after = 0
+
+        while True:
+            batch = list(
+                pending.filter(pk__gt=last_pk).order_by('pk').values_list('pk', 'signatures')[:options['batch_size']]
+            )
+            if not batch:
+                break
+
+            for pk, signatures in batch:
+                normalised = normalise_signatures(signatures)
+                before += _size(signatures)
+                after += _size(normalised)
+                if normalised == signatures or options['dry_run']:
+                    continue
+                # update() leaves updated_at alone: the signatures look the same to clients.
+                updated += model.objects.filter(pk=pk, signatures=signatures).update(signatures=normalised)
+
+            last_pk = batch[-1][0]
+            if options['sleep']:
+                time.sleep(options['sleep'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{label}: {updated} rows updated, signatures {before / 1024:.1f} KiB -> {after / 1024:.1f} KiB."
+        ))
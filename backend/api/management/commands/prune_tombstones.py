@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from api.models import Tombstone
+from api.sync import tombstone_horizon
+
+
+class Command(BaseCommand):
+    help = (
+        "Deletes tombstones older than SYNC_TOMBSTONE_RETENTION_DAYS. Clients "
+        "whose sync cursor is older than that get a full resync instead."
+    )
+
+    def handle(self, *args, **options):
+        deleted, _ = Tombstone.objects.filter(deleted_at__lt=tombstone_horizon()).delete()
+        self.stdout.write(f"Deleted {deleted} tombstone(s)")
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from api.dashboard import recount_all
+from api.models import DashboardCounter
+
+
+class Command(BaseCommand):
+    help = "Recounts every dashboard counter from the source tables (see api.dashboard)."
+
+    def handle(self, *args, **options):
+        recount_all()
+        self.stdout.write(self.style.SUCCESS(f"{DashboardCounter.objects.count()} counters rebuilt."))
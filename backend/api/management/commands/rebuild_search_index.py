@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from api.search import KINDS, rebuild
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuilds the full-text search entries from the source tables (see api.search), "
+        "e.g. after rows were changed with queryset updates that bypass the signals."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--type', choices=list(KINDS), action='append', dest='kinds',
+                            help="Only this kind of entry; may be repeated.")
+
+    def handle(self, *args, **options):
+        for kind in options['kinds'] or KINDS:
+            total = rebuild(kind)
+            self.stdout.write(self.style.SUCCESS(f"{kind}: {total} entries rebuilt."))
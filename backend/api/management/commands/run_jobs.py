@@ -0,0 +1,73 @@
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from api.jobs import claim_next, prune_finished, requeue_stale, run_job, worker_name
+
+
+class Command(BaseCommand):
+    help = (
+        "Runs queued background jobs (acta generation, ...). Several workers can "
+        "run side by side: each job is claimed with SKIP LOCKED by exactly one."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--poll-interval', type=float, default=1.0,
+                            help="Seconds to sleep when the queue is empty.")
+        parser.add_argument('--stale-after', type=int, default=900,
+                            help="Requeue jobs held by a worker for longer than this many seconds.")
+        parser.add_argument('--keep-finished', type=int, default=7 * 24 * 3600,
+                            help="Delete finished and failed jobs older than this many seconds.")
+        parser.add_argument('--max-jobs', type=int, default=0,
+                            help="Exit after running this many jobs (0 = run forever).")
+        parser.add_argument('--once', action='store_true',
+                            help="Drain the queue and exit instead of polling.")
+
+    def handle(self, *args, **options):
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        name = worker_name()
+        self.stdout.write(f"Worker {name} waiting for jobs")
+        processed = 0
+        last_stale_check = 0.0
+        last_prune = 0.0
+
+        while not self.stopping:
+            close_old_connections()
+
+            now = time.monotonic()
+            if now - last_stale_check >= 60:
+                requeued = requeue_stale(options['stale_after'])
+                if requeued:
+                    self.stdout.write(f"Requeued {requeued} stale job(s)")
+                last_stale_check = now
+            if now - last_prune >= 3600:
+                pruned = prune_finished(options['keep_finished'])
+                if pruned:
+                    self.stdout.write(f"Deleted {pruned} finished job(s)")
+                last_prune = now
+
+            job = claim_next(name)
+            if job is None:
+                if options['once']:
+                    break
+                time.sleep(options['poll_interval'])
+                continue
+
+            started = time.monotonic()
+            run_job(job)
+            self.stdout.write(
+                f"Job {job.pk} {job.kind}: {job.status} in {time.monotonic() - started:.2f}s"
+            )
+
+            processed += 1
+            if options['max_jobs'] and processed >= options['max_jobs']:
+                break
+
+    def stop(self, signum, frame):
+        # Finish the current job, then exit.
+        self.stopping = True
@@ -0,0 +1,55 @@
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from api.outbox import requeue_stale, send_pending
+
+
+class Command(BaseCommand):
+    help = (
+        "Delivers queued notification emails. Each batch is sent over a single "
+        "SMTP connection; failures are retried with backoff."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50)
+        parser.add_argument('--poll-interval', type=float, default=2.0,
+                            help="Seconds to sleep when the outbox is empty.")
+        parser.add_argument('--stale-after', type=int, default=600,
+                            help="Requeue messages left as being sent for longer than this many seconds.")
+        parser.add_argument('--once', action='store_true',
+                            help="Drain the outbox and exit instead of polling.")
+
+    def handle(self, *args, **options):
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        last_stale_check = 0.0
+        while not self.stopping:
+            close_old_connections()
+
+            now = time.monotonic()
+            if now - last_stale_check >= 60:
+                requeued = requeue_stale(options['stale_after'])
+                if requeued:
+                    self.stdout.write(f"Requeued {requeued} stale message(s)")
+                last_stale_check = now
+
+            started = time.monotonic()
+            sent, failed = send_pending(options['batch_size'])
+            if sent or failed:
+                self.stdout.write(
+                    f"Sent {sent}, failed {failed} in {time.monotonic() - started:.2f}s"
+                )
+                continue
+
+            if options['once']:
+                break
+            time.sleep(options['poll_interval'])
+
+    def stop(self, signum, frame):
+        # Finish the current batch, then exit.
+        self.stopping = True
@@ -0,0 +1,57 @@
+from django.core.management.base import BaseCommand
+from django.db.models import ExpressionWrapper, F, FloatField
+
+from api.models import SqlFingerprint
+from api.sqlstats import flush
+
+ORDERINGS = {
+    'total': '-total_ms',
+    'calls': '-calls',
+    'mean': '-mean_ms',
+    'max': '-max_ms',
+    'slow': '-slow_calls',
+}
+
+
+class Command(BaseCommand):
+    help = "Lists the SQL fingerprints that cost the most, per view (see api.sqlstats)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=20)
+        parser.add_argument('--order', choices=sorted(ORDERINGS), default='total')
+        parser.add_argument('--view', help="Only statements issued by this view (e.g. project-list).")
+        parser.add_argument('--explain', action='store_true', help="Print the captured plans too.")
+        parser.add_argument('--sql-width', type=int, default=160, help="Characters of SQL to show; 0 for all.")
+        parser.add_argument('--reset', action='store_true', help="Delete all statistics instead.")
+
+    def handle(self, *args, **options):
+        if options['reset']:
+            deleted, _ = SqlFingerprint.objects.all().delete()
+            self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} fingerprints."))
+            return
+
+        # Totals still pending in this process (only relevant when run from a shell).
+        flush()
+
+        rows = SqlFingerprint.objects.annotate(
+            mean_ms=ExpressionWrapper(F('total_ms') / F('calls'), output_field=FloatField()),
+        ).filter(calls__gt=0)
+        if options['view']:
+            rows = rows.filter(view=options['view'])
+        rows = rows.order_by(ORDERINGS[options['order']])[:options['limit']]
+
+        width = options['sql_width']
+        self.stdout.write(
+            f"{'fingerprint':16} {'calls':>9} {'total ms':>11} {'mean ms':>9} {'max ms':>9} {'slow':>6}  view"
+        )
+        for row in rows:
+            self.stdout.write(
+                f"{row.fingerprint:16} {row.calls:>9} {row.total_ms:>11.1f} {row.mean_ms:>9.2f} "
+                f"{row.max_ms:>9.1f} {row.slow_calls:>6}  {row.view}"
+            )
+            sql = row.sql if not width or len(row.sql) <= width else row.sql[:width] + "..."
+            self.stdout.write(f"    {sql}")
+            if options['explain'] and row.explain:
+                self.stdout.write(f"    Plan ({row.explained_at:%Y-%m-%d %H:%M}):")
+                for line in row.explain.splitlines():
+                    self.stdout.write(f"      {line}")
@@ -0,0 +1,128 @@
+"""
+Prometheus metrics.
+
+``MetricsMiddleware`` records latency, SQL queries and response size per
+route; the counters below are bumped where actas are rendered and emails
+sent. ``/api/metrics/`` exposes everything in the Prometheus text format to
+scrapers sending ``METRICS_TOKEN``.
+
+With several processes (gunicorn workers, ``run_jobs``, ``send_outbox``) set
+``PROMETHEUS_MULTIPROC_DIR`` to a directory shared by all of them and emptied
+on deploy: each process then writes its samples to memory-mapped files there
+and a scrape merges them, without any process talking to another.
+"""
+import os
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest,
+)
+from prometheus_client import multiprocess
+
+UNMATCHED_ROUTE = '<unmatched>'
+
+REQUEST_SECONDS = Histogram(
+    'cae_http_request_duration_seconds', 'Time spent answering a request.',
+    ['method', 'route', 'status'],
+)
+REQUEST_QUERIES = Histogram(
+    'cae_http_request_db_queries', 'SQL queries issued while answering a request.',
+    ['method', 'route'], buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144, float('inf')),
+)
+REQUEST_DB_SECONDS = Histogram(
+    'cae_http_request_db_duration_seconds', 'Time spent in SQL queries while answering a request.',
+    ['method', 'route'], buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, float('inf')),
+)
+RESPONSE_BYTES = Histogram(
+    'cae_http_response_bytes', 'Size of response bodies.',
+    ['method', 'route'], buckets=tuple(4 ** n * 256 for n in range(10)) + (float('inf'),),
+)
+
+DOCX_RENDERS = Counter('cae_docx_renders', 'Actas rendered, by job kind.', ['kind'])
+JOB_FAILURES = Counter('cae_job_failures', 'Background job attempts that failed, by job kind.', ['kind'])
+EMAILS_SENT = Counter('cae_emails_sent', 'Outbox messages delivered.')
+EMAIL_FAILURES = Counter('cae_email_failures', 'Outbox delivery attempts that failed.')
+REQUEST_FAILURES = Counter(
+    'cae_request_failures', 'Acta and notification requests rejected before being queued.', ['action'],
+)
+
+
+def route_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return UNMATCHED_ROUTE
+    # Router view names ("project-detail") keep the label set small, unlike raw paths.
+    return match.view_name or match.route or UNMATCHED_ROUTE
+
+
+def _response_size(response):
+    if not response.streaming:
+        return len(response.content)
+    length = response.get('Content-Length')
+    return int(length) if length else None
+
+
+class _QueryTimer:
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - started
+
+
+class MetricsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timer = _QueryTimer()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(timer))
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - started
+
+        route = route_name(request)
+        if route == 'metrics':
+            return response
+
+        method = request.method
+        REQUEST_SECONDS.labels(method, route, str(response.status_code)).observe(elapsed)
+        REQUEST_QUERIES.labels(method, route).observe(timer.count)
+        REQUEST_DB_SECONDS.labels(method, route).observe(timer.seconds)
+        size = _response_size(response)
+        if size is not None:
+            RESPONSE_BYTES.labels(method, route).observe(size)
+        return response
+
+
+def _authorized(request):
+    token = settings.METRICS_TOKEN
+    if not token:
+        # Without a token the endpoint is only open on development servers.
+        return settings.DEBUG
+    return constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {token}')
+
+
+def metrics_view(request):
+    if not _authorized(request):
+        return HttpResponseForbidden()
+
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return HttpResponse(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
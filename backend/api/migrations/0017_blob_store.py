@@ -0,0 +1,57 @@
+# Generated by Django 6.0.2 on 2026-10-17 09:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0016_followupmeetingconfig_signatures'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Blob',
+            fields=[
+                ('sha256', models.CharField(max_length=64, primary_key=True, serialize=False, verbose_name='SHA-256')),
+                ('size', models.BigIntegerField(verbose_name='Tamaño')),
+                ('content_type', models.CharField(default='application/octet-stream', max_length=255, verbose_name='Tipo de contenido')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Fichero binario',
+                'verbose_name_plural': 'Ficheros binarios',
+            },
+        ),
+        migrations.AddField(
+            model_name='documenttemplate',
+            name='file_data_blob',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='api.blob'),
+        ),
+        migrations.AddField(
+            model_name='followupmeeting',
+            name='document_data_blob',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='api.blob'),
+        ),
+        migrations.AddField(
+            model_name='meeting',
+            name='document_data_blob',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='api.blob'),
+        ),
+        migrations.AddField(
+            model_name='meetingdocument',
+            name='file_data_blob',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='api.blob'),
+        ),
+        migrations.AddField(
+            model_name='projectdocument',
+            name='url_blob',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='api.blob'),
+        ),
+        migrations.AddField(
+            model_name='workcenter',
+            name='risk_info_url_blob',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='api.blob'),
+        ),
+    ]
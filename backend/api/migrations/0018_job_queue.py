@@ -0,0 +1,39 @@
+# Generated by Django 6.0.2 on 2026-10-17 15:40
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0017_blob_store'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=100, verbose_name='Tipo')),
+                ('payload', models.JSONField(blank=True, default=dict, verbose_name='Parámetros')),
+                ('status', models.CharField(choices=[('PENDIENTE', 'PENDIENTE'), ('EN_CURSO', 'EN_CURSO'), ('COMPLETADO', 'COMPLETADO'), ('ERROR', 'ERROR')], default='PENDIENTE', max_length=20, verbose_name='Estado')),
+                ('progress', models.PositiveSmallIntegerField(default=0, verbose_name='Progreso')),
+                ('result', models.JSONField(blank=True, null=True, verbose_name='Resultado')),
+                ('error', models.TextField(blank=True, null=True, verbose_name='Error')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='Intentos')),
+                ('max_attempts', models.PositiveIntegerField(default=3, verbose_name='Intentos máximos')),
+                ('run_after', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Ejecutar a partir de')),
+                ('locked_by', models.CharField(blank=True, max_length=255, null=True, verbose_name='Worker')),
+                ('locked_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Tarea en segundo plano',
+                'verbose_name_plural': 'Tareas en segundo plano',
+                'indexes': [models.Index(fields=['status', 'run_after'], name='api_job_status_run_after_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 6.0.2 on 2026-10-17 16:10
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0018_job_queue'),
+        ('contenttypes', '0002_remove_content_type_name'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmailOutbox',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('subject', models.CharField(max_length=998, verbose_name='Asunto')),
+                ('body', models.TextField(verbose_name='Mensaje')),
+                ('from_email', models.CharField(max_length=255, verbose_name='Remitente')),
+                ('recipients', models.JSONField(default=list, verbose_name='Destinatarios')),
+                ('status', models.CharField(choices=[('PENDIENTE', 'PENDIENTE'), ('ENVIANDO', 'ENVIANDO'), ('ENVIADO', 'ENVIADO'), ('ERROR', 'ERROR')], default='PENDIENTE', max_length=20, verbose_name='Estado')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='Intentos')),
+                ('max_attempts', models.PositiveIntegerField(default=5, verbose_name='Intentos máximos')),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Próximo intento')),
+                ('last_error', models.TextField(blank=True, null=True, verbose_name='Último error')),
+                ('locked_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('sent_at', models.DateTimeField(blank=True, null=True, verbose_name='Enviado')),
+                ('source_id', models.PositiveBigIntegerField(blank=True, null=True)),
+                ('source_type', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='contenttypes.contenttype')),
+            ],
+            options={
+                'verbose_name': 'Correo saliente',
+                'verbose_name_plural': 'Correos salientes',
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='api_outbox_status_next_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 6.0.2 on 2026-10-17 12:40
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0020_sync_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SqlFingerprint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fingerprint', models.CharField(max_length=40, verbose_name='Huella')),
+                ('view', models.CharField(max_length=200, verbose_name='Vista')),
+                ('sql', models.TextField(verbose_name='SQL normalizado')),
+                ('calls', models.BigIntegerField(default=0, verbose_name='Ejecuciones')),
+                ('total_ms', models.FloatField(default=0, verbose_name='Tiempo total (ms)')),
+                ('max_ms', models.FloatField(default=0, verbose_name='Tiempo máximo (ms)')),
+                ('slow_calls', models.BigIntegerField(default=0, verbose_name='Ejecuciones lentas')),
+                ('explain', models.TextField(blank=True, null=True, verbose_name='Plan de ejecución')),
+                ('explained_at', models.DateTimeField(blank=True, null=True)),
+                ('first_seen', models.DateTimeField(auto_now_add=True)),
+                ('last_seen', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': 'Consulta SQL',
+                'verbose_name_plural': 'Consultas SQL',
+                'constraints': [models.UniqueConstraint(fields=('fingerprint', 'view'), name='api_sqlfp_fingerprint_view_uniq')],
+            },
+        ),
+    ]
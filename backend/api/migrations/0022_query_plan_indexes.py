@@ -0,0 +1,62 @@
+# Generated by Django 6.0.2 on 2026-10-17 13:20
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+import django.db.models.deletion
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0021_sql_fingerprints'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name='documenttemplate',
+            index=models.Index(fields=['category'], name='api_template_category_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='documenttemplate',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('category'), name='gin_trgm_ops'), name='api_template_category_trgm_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='followupmeeting',
+            index=models.Index(fields=['contract', 'date'], name='api_followup_contract_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='followupmeeting',
+            index=models.Index(fields=['created_at', 'id'], name='api_followup_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='meeting',
+            index=models.Index(fields=['project', 'start_date'], name='api_meeting_project_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='meeting',
+            index=models.Index(fields=['status', 'start_date'], name='api_meeting_status_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='projectdocument',
+            index=models.Index(fields=['project', 'status', 'category'], name='api_doc_project_status_cat_idx'),
+        ),
+        # The composite indexes above start with these columns; their own indexes are redundant.
+        migrations.AlterField(
+            model_name='followupmeeting',
+            name='contract',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='follow_up_meetings', to='api.contract'),
+        ),
+        migrations.AlterField(
+            model_name='meeting',
+            name='project',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='meetings', to='api.project'),
+        ),
+        migrations.AlterField(
+            model_name='projectdocument',
+            name='project',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='documents', to='api.project'),
+        ),
+    ]
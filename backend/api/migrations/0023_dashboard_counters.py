@@ -0,0 +1,52 @@
+# Generated by Django 6.0.2 on 2026-10-17 16:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+# Same shape as api.dashboard.METRICS, on the historical models.
+METRICS = {
+    'projects': ('Project', 'contract_id', 'company_status'),
+    'documents': ('ProjectDocument', 'project__contract_id', 'status'),
+    'meetings': ('Meeting', 'project__contract_id', 'status'),
+    'follow_ups': ('FollowUpMeeting', 'contract_id', 'status'),
+}
+
+
+def count_existing_rows(apps, schema_editor):
+    DashboardCounter = apps.get_model('api', 'DashboardCounter')
+    for metric, (model_name, contract_path, field) in METRICS.items():
+        rows = (
+            apps.get_model('api', model_name).objects.values_list(contract_path, field)
+            .annotate(total=Count('pk')).order_by()
+        )
+        DashboardCounter.objects.bulk_create(
+            DashboardCounter(contract_id=contract_id, metric=metric, key=key, count=total)
+            for contract_id, key, total in rows
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0022_query_plan_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DashboardCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('metric', models.CharField(choices=[('projects', 'Proyectos'), ('documents', 'Documentos'), ('meetings', 'Reuniones'), ('follow_ups', 'Reuniones de seguimiento')], max_length=20, verbose_name='Indicador')),
+                ('key', models.CharField(max_length=20, verbose_name='Estado')),
+                ('count', models.PositiveIntegerField(default=0, verbose_name='Total')),
+                ('contract', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='api.contract')),
+            ],
+            options={
+                'verbose_name': 'Contador del panel',
+                'verbose_name_plural': 'Contadores del panel',
+                'constraints': [models.UniqueConstraint(fields=('contract', 'metric', 'key'), name='api_dashcounter_uniq')],
+            },
+        ),
+        migrations.RunPython(count_existing_rows, migrations.RunPython.noop),
+    ]
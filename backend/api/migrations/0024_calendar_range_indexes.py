@@ -0,0 +1,21 @@
+# Generated by Django 6.0.2 on 2026-10-17 16:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0023_dashboard_counters'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='followupmeeting',
+            index=models.Index(fields=['date', 'time', 'id'], name='api_followup_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='meeting',
+            index=models.Index(fields=['start_date', 'time', 'id'], name='api_meeting_start_idx'),
+        ),
+    ]
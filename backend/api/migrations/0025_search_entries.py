@@ -0,0 +1,95 @@
+# Generated by Django 6.0.2 on 2026-10-17 18:20
+
+import re
+import unicodedata
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations, models
+from django.db.models import Value
+
+# Same shape as api.search.KINDS, on the historical models: (model, parent or None, {weight: fields}).
+KINDS = {
+    'project': ('Project', 'contract', {'A': ['code'], 'B': ['description']}),
+    'contract': ('Contract', None, {'A': ['code', 'client_name'], 'B': ['description']}),
+    'company': ('Company', None, {'A': ['name'], 'B': ['cif']}),
+    'contact': ('CompanyContact', 'company', {'A': ['first_name', 'last_name'], 'B': ['email']}),
+    'document': ('ProjectDocument', 'project', {'A': ['name'], 'B': ['category']}),
+}
+SEARCH_CONFIG = 'spanish'
+BATCH_SIZE = 500
+TITLE_LENGTH = SUBTITLE_LENGTH = 255
+EMAIL_SEPARATORS = re.compile(r'[@._+-]+')
+
+
+def searchable(value):
+    decomposed = unicodedata.normalize('NFKD', value)
+    text = ''.join(char for char in decomposed if not unicodedata.combining(char))
+    if '@' in text:
+        text = f'{text} {EMAIL_SEPARATORS.sub(" ", text)}'
+    return text
+
+
+def join(row, fields, length):
+    return ' '.join(str(row[field]) for field in fields if row[field])[:length]
+
+
+def entry(SearchEntry, kind, row):
+    _, parent, weights = KINDS[kind]
+    vector = None
+    for weight, fields in weights.items():
+        text = ' '.join(searchable(str(row[field])) for field in fields if row[field])
+        part = SearchVector(Value(text), config=SEARCH_CONFIG, weight=weight)
+        vector = part if vector is None else vector + part
+    return SearchEntry(
+        kind=kind, object_id=row['pk'], parent_id=row[f'{parent}_id'] if parent else None,
+        title=join(row, weights['A'], TITLE_LENGTH), subtitle=join(row, weights['B'], SUBTITLE_LENGTH),
+        vector=vector,
+    )
+
+
+def index_existing_rows(apps, schema_editor):
+    SearchEntry = apps.get_model('api', 'SearchEntry')
+    for kind, (model_name, parent, weights) in KINDS.items():
+        fields = ['pk'] + [field for names in weights.values() for field in names]
+        if parent:
+            fields.append(f'{parent}_id')
+        rows = apps.get_model('api', model_name).objects.order_by('pk').values(*fields)
+        batch = []
+        for row in rows.iterator(chunk_size=BATCH_SIZE):
+            batch.append(entry(SearchEntry, kind, row))
+            if len(batch) == BATCH_SIZE:
+                SearchEntry.objects.bulk_create(batch)
+                batch = []
+        if batch:
+            SearchEntry.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0024_calendar_range_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('project', 'Proyecto'), ('contract', 'Contrato'), ('company', 'Empresa'), ('contact', 'Contacto'), ('document', 'Documento')], max_length=20, verbose_name='Tipo')),
+                ('object_id', models.BigIntegerField(verbose_name='Identificador')),
+                ('parent_id', models.BigIntegerField(blank=True, null=True, verbose_name='Identificador del padre')),
+                ('title', models.CharField(max_length=255, verbose_name='Título')),
+                ('subtitle', models.CharField(blank=True, default='', max_length=255, verbose_name='Detalle')),
+                ('vector', django.contrib.postgres.search.SearchVectorField()),
+            ],
+            options={
+                'verbose_name': 'Entrada del buscador',
+                'verbose_name_plural': 'Entradas del buscador',
+                'indexes': [django.contrib.postgres.indexes.GinIndex(fields=['vector'], name='api_searchentry_vector_idx')],
+                'constraints': [models.UniqueConstraint(fields=('kind', 'object_id'), name='api_searchentry_uniq')],
+            },
+        ),
+        migrations.RunPython(index_existing_rows, migrations.RunPython.noop),
+    ]
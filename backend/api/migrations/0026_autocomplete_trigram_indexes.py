@@ -0,0 +1,48 @@
+# Generated by Django 6.0.2 on 2026-10-17 19:05
+
+import api.functions
+import django.contrib.postgres.indexes
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0025_search_entries'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='company',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(api.functions.Fold('name'), name='gin_trgm_ops'), name='api_company_name_trgm_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='company',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(api.functions.Fold('cif'), name='gin_trgm_ops'), name='api_company_cif_trgm_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='companycontact',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(api.functions.Fold('first_name'), name='gin_trgm_ops'), name='api_contact_first_trgm_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='companycontact',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(api.functions.Fold('last_name'), name='gin_trgm_ops'), name='api_contact_last_trgm_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='companycontact',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(api.functions.Fold('email'), name='gin_trgm_ops'), name='api_contact_email_trgm_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(api.functions.Fold('name'), name='gin_trgm_ops'), name='api_user_name_trgm_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(api.functions.Fold('email'), name='gin_trgm_ops'), name='api_user_email_trgm_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='workcenter',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(api.functions.Fold('name'), name='gin_trgm_ops'), name='api_workcenter_name_trgm_idx'),
+        ),
+    ]
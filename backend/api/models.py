@@ -1,5 +1,13 @@
 from django.contrib.auth.models import AbstractUser, BaseUserManager
+from django.contrib.contenttypes.fields import GenericForeignKey
+from django.contrib.contenttypes.models import ContentType
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.db.models.functions import Upper
+from django.utils import timezone
+
+from .functions import Fold
 
 class CustomUserManager(BaseUserManager):
     def create_user(self, email, password=None, **extra_fields):
@@ -36,6 +44,7 @@ class User(AbstractUser):
     phone = models.CharField("Teléfono", max_length=20, null=True, blank=True)
     cif = models.CharField("CIF", max_length=20, null=True, blank=True)
     email = models.EmailField("Correo electrónico", unique=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = []
@@ -45,21 +54,46 @@ class User(AbstractUser):
     class Meta:
         verbose_name = "Usuario"
         verbose_name_plural = "Usuarios"
+        # Typeahead matching (see autocomplete).
+        indexes = [
+            GinIndex(OpClass(Fold('name'), name='gin_trgm_ops'), name='api_user_name_trgm_idx'),
+            GinIndex(OpClass(Fold('email'), name='gin_trgm_ops'), name='api_user_email_trgm_idx'),
+        ]
 
     def __str__(self):
         return f"{self.name} ({self.get_role_display()})"
 
 
+class Blob(models.Model):
+    sha256 = models.CharField("SHA-256", max_length=64, primary_key=True)
+    size = models.BigIntegerField("Tamaño")
+    content_type = models.CharField("Tipo de contenido", max_length=255, default='application/octet-stream')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Fichero binario"
+        verbose_name_plural = "Ficheros binarios"
+
+    def __str__(self):
+        return self.sha256
+
+
 class Company(models.Model):
     name = models.CharField("Razón Social", max_length=255)
     cif = models.CharField("CIF", max_length=20, null=True, blank=True)
     email = models.EmailField("Correo electrónico", null=True, blank=True)
     phone = models.CharField("Teléfono", max_length=20, null=True, blank=True)
     avatar = models.ImageField("Logo", upload_to='company_logos/', null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     class Meta:
         verbose_name = "Empresa"
         verbose_name_plural = "Empresas"
+        # Typeahead matching (see autocomplete).
+        indexes = [
+            GinIndex(OpClass(Fold('name'), name='gin_trgm_ops'), name='api_company_name_trgm_idx'),
+            GinIndex(OpClass(Fold('cif'), name='gin_trgm_ops'), name='api_company_cif_trgm_idx'),
+        ]
 
     def __str__(self):
         return self.name
@@ -71,10 +105,17 @@ class CompanyContact(models.Model):
     email = models.EmailField("Correo electrónico")
     position = models.CharField("Cargo", max_length=100, null=True, blank=True)
     phone = models.CharField("Teléfono", max_length=20, null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     class Meta:
         verbose_name = "Contacto de Empresa"
         verbose_name_plural = "Contactos de Empresa"
+        # Typeahead matching (see autocomplete).
+        indexes = [
+            GinIndex(OpClass(Fold('first_name'), name='gin_trgm_ops'), name='api_contact_first_trgm_idx'),
+            GinIndex(OpClass(Fold('last_name'), name='gin_trgm_ops'), name='api_contact_last_trgm_idx'),
+            GinIndex(OpClass(Fold('email'), name='gin_trgm_ops'), name='api_contact_email_trgm_idx'),
+        ]
 
 
 class Contract(models.Model):
@@ -88,6 +129,7 @@ class Contract(models.Model):
     contact_phone = models.CharField("Teléfono de contacto", max_length=20, null=True, blank=True)
     amount = models.DecimalField("Importe", max_digits=12, decimal_places=2)
     coordinator = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='coordinated_contracts')
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     class Meta:
         verbose_name = "Contrato"
@@ -113,10 +155,18 @@ class WorkCenter(models.Model):
     province = models.CharField("Provincia", max_length=50, choices=PROVINCE_CHOICES)
     risk_info_url = models.TextField("URL/Base64 de Riesgos", null=True, blank=True)
     risk_info_file_name = models.CharField(max_length=255, null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+    risk_info_url_blob = models.ForeignKey(Blob, on_delete=models.PROTECT, null=True, blank=True, related_name='+')
+
+    BLOB_FIELDS = ('risk_info_url',)
 
     class Meta:
         verbose_name = "Centro de Trabajo"
         verbose_name_plural = "Centros de Trabajo"
+        # Typeahead matching (see autocomplete).
+        indexes = [
+            GinIndex(OpClass(Fold('name'), name='gin_trgm_ops'), name='api_workcenter_name_trgm_idx'),
+        ]
 
 
 class Project(models.Model):
@@ -137,6 +187,7 @@ class Project(models.Model):
     companies = models.ManyToManyField(Company, related_name='projects')
     fecha_solicitud = models.DateField()
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
     contacts = models.ManyToManyField(CompanyContact, related_name='projects')
     main_contact = models.ForeignKey(CompanyContact, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
     contract_manager = models.ForeignKey(CompanyContact, on_delete=models.SET_NULL, null=True, blank=True, related_name='project_contract_managers')
@@ -154,19 +205,27 @@ class ProjectDocument(models.Model):
         ('ACEPTADO', 'ACEPTADO'), ('RECHAZADO', 'RECHAZADO')
     ]
 
-    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='documents')
+    # Indexed by api_doc_project_status_cat_idx, which starts with this column.
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='documents', db_index=False)
     name = models.CharField(max_length=255)
     url = models.TextField("URL/Base64 del documento")
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='BORRADOR')
     category = models.CharField(max_length=100, null=True, blank=True)
     uploaded_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True)
     uploaded_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
     status_date = models.DateTimeField(null=True, blank=True)
     signatures = models.JSONField(default=list, blank=True)
+    url_blob = models.ForeignKey(Blob, on_delete=models.PROTECT, null=True, blank=True, related_name='+')
+
+    BLOB_FIELDS = ('url',)
 
     class Meta:
         verbose_name = "Documento de Proyecto"
         verbose_name_plural = "Documentos de Proyecto"
+        indexes = [
+            models.Index(fields=['project', 'status', 'category'], name='api_doc_project_status_cat_idx'),
+        ]
 
 
 class Meeting(models.Model):
@@ -178,7 +237,8 @@ class Meeting(models.Model):
         ('PRESENCIAL', 'PRESENCIAL'), ('ONLINE', 'ONLINE')
     ]
 
-    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='meetings')
+    # Indexed by api_meeting_project_start_idx, which starts with this column.
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='meetings', db_index=False)
     start_date = models.DateField()
     end_date = models.DateField()
     time = models.TimeField()
@@ -194,16 +254,29 @@ class Meeting(models.Model):
     document_data = models.TextField(null=True, blank=True)
     signatures = models.JSONField(default=list, blank=True)
     is_notified = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+    document_data_blob = models.ForeignKey(Blob, on_delete=models.PROTECT, null=True, blank=True, related_name='+')
+
+    BLOB_FIELDS = ('document_data',)
 
     class Meta:
         verbose_name = "Reunión"
         verbose_name_plural = "Reuniones"
+        indexes = [
+            models.Index(fields=['project', 'start_date'], name='api_meeting_project_start_idx'),
+            models.Index(fields=['status', 'start_date'], name='api_meeting_status_start_idx'),
+            models.Index(fields=['start_date', 'time', 'id'], name='api_meeting_start_idx'),
+        ]
 
 class MeetingDocument(models.Model):
     meeting = models.ForeignKey(Meeting, on_delete=models.CASCADE, related_name='documents')
     name = models.CharField(max_length=255)
     file_data = models.TextField("Base64 Document Data")
     uploaded_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+    file_data_blob = models.ForeignKey(Blob, on_delete=models.PROTECT, null=True, blank=True, related_name='+')
+
+    BLOB_FIELDS = ('file_data',)
 
     class Meta:
         verbose_name = "Documento de Reunión"
@@ -214,11 +287,19 @@ class DocumentTemplate(models.Model):
     category = models.CharField(max_length=100)
     file_data = models.TextField(help_text="Base64 encoded data")
     file_name = models.CharField(max_length=255)
-    updated_at = models.DateTimeField(auto_now=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+    file_data_blob = models.ForeignKey(Blob, on_delete=models.PROTECT, null=True, blank=True, related_name='+')
+
+    BLOB_FIELDS = ('file_data',)
 
     class Meta:
         verbose_name = "Plantilla de Documento"
         verbose_name_plural = "Plantillas de Documentos"
+        indexes = [
+            models.Index(fields=['category'], name='api_template_category_idx'),
+            # ``category__icontains`` compiles to UPPER(category) LIKE '%...%'; only trigrams can serve it.
+            GinIndex(OpClass(Upper('category'), name='gin_trgm_ops'), name='api_template_category_trgm_idx'),
+        ]
 
 
 class FollowUpMeeting(models.Model):
@@ -230,7 +311,8 @@ class FollowUpMeeting(models.Model):
         ('PRESENCIAL', 'PRESENCIAL'), ('ONLINE', 'ONLINE')
     ]
 
-    contract = models.ForeignKey(Contract, on_delete=models.CASCADE, related_name='follow_up_meetings')
+    # Indexed by api_followup_contract_date_idx, which starts with this column.
+    contract = models.ForeignKey(Contract, on_delete=models.CASCADE, related_name='follow_up_meetings', db_index=False)
     reason = models.CharField("Motivo", max_length=255)
     date = models.DateField("Fecha")
     time = models.TimeField("Hora")
@@ -242,13 +324,23 @@ class FollowUpMeeting(models.Model):
     work_centers = models.ManyToManyField(WorkCenter, related_name='follow_up_meetings', blank=True)
     companies = models.ManyToManyField(Company, related_name='follow_up_meetings', blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
     document_data = models.TextField("Acta generada (Base64)", null=True, blank=True)
     notification_contacts = models.ManyToManyField(CompanyContact, blank=True, related_name='followup_notifications')
     is_notified = models.BooleanField(default=False)
+    document_data_blob = models.ForeignKey(Blob, on_delete=models.PROTECT, null=True, blank=True, related_name='+')
+
+    BLOB_FIELDS = ('document_data',)
 
     class Meta:
         verbose_name = "Reunión de Seguimiento"
         verbose_name_plural = "Reuniones de Seguimiento"
+        indexes = [
+            models.Index(fields=['contract', 'date'], name='api_followup_contract_date_idx'),
+            models.Index(fields=['date', 'time', 'id'], name='api_followup_date_idx'),
+            # The list's default ordering (-created_at, -id).
+            models.Index(fields=['created_at', 'id'], name='api_followup_created_idx'),
+        ]
 
 
 class FollowUpMeetingConfig(models.Model):
@@ -262,7 +354,166 @@ class FollowUpMeetingConfig(models.Model):
     otros_temas = models.TextField("Otros temas", null=True, blank=True)
     ruegos_preguntas = models.TextField("Ruegos y preguntas", null=True, blank=True)
     signatures = models.JSONField("Firmas", default=list, blank=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     class Meta:
         verbose_name = "Configuración de Acta de Seguimiento"
         verbose_name_plural = "Configuraciones de Acta de Seguimiento"
+
+
+class Job(models.Model):
+    STATUS_CHOICES = [
+        ('PENDIENTE', 'PENDIENTE'), ('EN_CURSO', 'EN_CURSO'),
+        ('COMPLETADO', 'COMPLETADO'), ('ERROR', 'ERROR')
+    ]
+
+    kind = models.CharField("Tipo", max_length=100)
+    payload = models.JSONField("Parámetros", default=dict, blank=True)
+    status = models.CharField("Estado", max_length=20, choices=STATUS_CHOICES, default='PENDIENTE')
+    progress = models.PositiveSmallIntegerField("Progreso", default=0)
+    result = models.JSONField("Resultado", null=True, blank=True)
+    error = models.TextField("Error", null=True, blank=True)
+    attempts = models.PositiveIntegerField("Intentos", default=0)
+    max_attempts = models.PositiveIntegerField("Intentos máximos", default=3)
+    run_after = models.DateTimeField("Ejecutar a partir de", default=timezone.now)
+    locked_by = models.CharField("Worker", max_length=255, null=True, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Tarea en segundo plano"
+        verbose_name_plural = "Tareas en segundo plano"
+        indexes = [
+            models.Index(fields=['status', 'run_after'], name='api_job_status_run_after_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} #{self.pk} ({self.status})"
+
+
+class EmailOutbox(models.Model):
+    STATUS_CHOICES = [
+        ('PENDIENTE', 'PENDIENTE'), ('ENVIANDO', 'ENVIANDO'),
+        ('ENVIADO', 'ENVIADO'), ('ERROR', 'ERROR')
+    ]
+
+    subject = models.CharField("Asunto", max_length=998)
+    body = models.TextField("Mensaje")
+    from_email = models.CharField("Remitente", max_length=255)
+    recipients = models.JSONField("Destinatarios", default=list)
+    status = models.CharField("Estado", max_length=20, choices=STATUS_CHOICES, default='PENDIENTE')
+    attempts = models.PositiveIntegerField("Intentos", default=0)
+    max_attempts = models.PositiveIntegerField("Intentos máximos", default=5)
+    next_attempt_at = models.DateTimeField("Próximo intento", default=timezone.now)
+    last_error = models.TextField("Último error", null=True, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField("Enviado", null=True, blank=True)
+    # The meeting being notified; its ``is_notified`` flag is set once the message is sent.
+    source_type = models.ForeignKey(ContentType, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    source_id = models.PositiveBigIntegerField(null=True, blank=True)
+    source = GenericForeignKey('source_type', 'source_id')
+
+    class Meta:
+        verbose_name = "Correo saliente"
+        verbose_name_plural = "Correos salientes"
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='api_outbox_status_next_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} ({self.status})"
+
+
+class Tombstone(models.Model):
+    """Records a deleted row so that ``/api/sync/`` can tell clients to drop it."""
+    resource = models.CharField("Recurso", max_length=50)
+    object_id = models.BigIntegerField("Identificador")
+    deleted_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        verbose_name = "Registro eliminado"
+        verbose_name_plural = "Registros eliminados"
+
+    def __str__(self):
+        return f"{self.resource} #{self.object_id}"
+
+
+class SqlFingerprint(models.Model):
+    """Aggregated timings of one normalised SQL statement issued by one view (see ``sqlstats``)."""
+    fingerprint = models.CharField("Huella", max_length=40)
+    view = models.CharField("Vista", max_length=200)
+    sql = models.TextField("SQL normalizado")
+    calls = models.BigIntegerField("Ejecuciones", default=0)
+    total_ms = models.FloatField("Tiempo total (ms)", default=0)
+    max_ms = models.FloatField("Tiempo máximo (ms)", default=0)
+    slow_calls = models.BigIntegerField("Ejecuciones lentas", default=0)
+    explain = models.TextField("Plan de ejecución", null=True, blank=True)
+    explained_at = models.DateTimeField(null=True, blank=True)
+    first_seen = models.DateTimeField(auto_now_add=True)
+    last_seen = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name = "Consulta SQL"
+        verbose_name_plural = "Consultas SQL"
+        constraints = [
+            models.UniqueConstraint(fields=['fingerprint', 'view'], name='api_sqlfp_fingerprint_view_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.fingerprint} ({self.view})"
+
+
+class DashboardCounter(models.Model):
+    """How many rows of one kind a contract has in one status (see ``dashboard``)."""
+    METRIC_CHOICES = [
+        ('projects', 'Proyectos'), ('documents', 'Documentos'),
+        ('meetings', 'Reuniones'), ('follow_ups', 'Reuniones de seguimiento'),
+    ]
+
+    # Indexed by api_dashcounter_uniq, which starts with this column.
+    contract = models.ForeignKey(Contract, on_delete=models.CASCADE, related_name='+', db_index=False)
+    metric = models.CharField("Indicador", max_length=20, choices=METRIC_CHOICES)
+    key = models.CharField("Estado", max_length=20)
+    count = models.PositiveIntegerField("Total", default=0)
+
+    class Meta:
+        verbose_name = "Contador del panel"
+        verbose_name_plural = "Contadores del panel"
+        constraints = [
+            models.UniqueConstraint(fields=['contract', 'metric', 'key'], name='api_dashcounter_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.contract_id} {self.metric}={self.key}: {self.count}"
+
+
+class SearchEntry(models.Model):
+    """The searchable text of one project, contract, company, contact or document (see ``search``)."""
+    KIND_CHOICES = [
+        ('project', 'Proyecto'), ('contract', 'Contrato'), ('company', 'Empresa'),
+        ('contact', 'Contacto'), ('document', 'Documento'),
+    ]
+
+    kind = models.CharField("Tipo", max_length=20, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField("Identificador")
+    # Contract of a project, company of a contact, project of a document.
+    parent_id = models.BigIntegerField("Identificador del padre", null=True, blank=True)
+    title = models.CharField("Título", max_length=255)
+    subtitle = models.CharField("Detalle", max_length=255, blank=True, default='')
+    vector = SearchVectorField()
+
+    class Meta:
+        verbose_name = "Entrada del buscador"
+        verbose_name_plural = "Entradas del buscador"
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'object_id'], name='api_searchentry_uniq'),
+        ]
+        indexes = [
+            GinIndex(fields=['vector'], name='api_searchentry_vector_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} #{self.object_id}: {self.title}"
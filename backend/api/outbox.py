@@ -0,0 +1,163 @@
+"""
+Outgoing email.
+
+Notify endpoints write an ``EmailOutbox`` row and return at once; ``manage.py
+send_outbox`` delivers pending rows in batches over a single SMTP connection
+per batch (one TLS handshake and login instead of one per message) and
+retries failures with backoff.
+"""
+import datetime
+import logging
+import smtplib
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .metrics import EMAIL_FAILURES, EMAILS_SENT
+from .models import EmailOutbox
+
+logger = logging.getLogger(__name__)
+
+PENDING = 'PENDIENTE'
+SENDING = 'ENVIANDO'
+SENT = 'ENVIADO'
+FAILED = 'ERROR'
+
+# Seconds to wait before retry N (1-based); the last value is reused.
+RETRY_DELAYS = (30, 120, 600, 1800)
+
+
+def queue_email(subject, body, recipients, source=None, from_email=None):
+    """Stores a message for the sender worker and returns the outbox row."""
+    outbox = EmailOutbox(
+        subject=subject,
+        body=body,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        recipients=list(recipients),
+    )
+    if source is not None:
+        outbox.source_type = ContentType.objects.get_for_model(source)
+        outbox.source_id = source.pk
+    outbox.save()
+    return outbox
+
+
+def claim_batch(batch_size):
+    """Marks up to ``batch_size`` due messages as being sent and returns them."""
+    now = timezone.now()
+    with transaction.atomic():
+        batch = list(
+            EmailOutbox.objects.select_for_update(skip_locked=True)
+            .filter(status=PENDING, next_attempt_at__lte=now)
+            .order_by('next_attempt_at', 'id')[:batch_size]
+        )
+        if batch:
+            EmailOutbox.objects.filter(pk__in=[m.pk for m in batch]).update(
+                status=SENDING, locked_at=now, attempts=F('attempts') + 1,
+            )
+    for message in batch:
+        message.status = SENDING
+        message.locked_at = now
+        message.attempts += 1
+    return batch
+
+
+def _mark_sent(message):
+    EMAILS_SENT.inc()
+    message.status = SENT
+    message.sent_at = timezone.now()
+    message.last_error = None
+    message.locked_at = None
+    message.save(update_fields=['status', 'sent_at', 'last_error', 'locked_at'])
+
+    if message.source_type_id:
+        model = message.source_type.model_class()
+        if model is not None and any(f.name == 'is_notified' for f in model._meta.fields):
+            changes = {'is_notified': True}
+            if any(f.name == 'updated_at' for f in model._meta.fields):
+                changes['updated_at'] = timezone.now()
+            model.objects.filter(pk=message.source_id).update(**changes)
+
+
+def _mark_failed(message, error):
+    EMAIL_FAILURES.inc()
+    message.last_error = f"{type(error).__name__}: {error}"
+    message.locked_at = None
+    if message.attempts >= message.max_attempts:
+        message.status = FAILED
+    else:
+        delay = RETRY_DELAYS[min(message.attempts, len(RETRY_DELAYS)) - 1]
+        message.status = PENDING
+        message.next_attempt_at = timezone.now() + datetime.timedelta(seconds=delay)
+    message.save(update_fields=['status', 'last_error', 'locked_at', 'next_attempt_at'])
+
+
+def _is_disconnect(error):
+    if isinstance(error, smtplib.SMTPServerDisconnected):
+        return True
+    # Socket errors; SMTPException also derives from OSError but leaves the session usable.
+    return isinstance(error, OSError) and not isinstance(error, smtplib.SMTPException)
+
+
+def send_pending(batch_size=50):
+    """
+    Sends one batch of due messages. Returns ``(sent, failed)``; ``(0, 0)``
+    means the outbox is empty.
+    """
+    batch = claim_batch(batch_size)
+    if not batch:
+        return 0, 0
+
+    sent = failed = 0
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception as e:
+        logger.warning("Could not connect to the mail server: %s", e)
+        for message in batch:
+            _mark_failed(message, e)
+        return 0, len(batch)
+
+    try:
+        for index, message in enumerate(batch):
+            email = EmailMessage(
+                subject=message.subject,
+                body=message.body,
+                from_email=message.from_email,
+                to=message.recipients,
+                connection=connection,
+            )
+            try:
+                connection.send_messages([email])
+            except Exception as e:
+                logger.warning("Could not send outbox message %s: %s", message.pk, e)
+                _mark_failed(message, e)
+                failed += 1
+                if _is_disconnect(e):
+                    # The relay dropped the session; open a fresh one for the rest of the batch.
+                    connection.close()
+                    try:
+                        connection.open()
+                    except Exception as connect_error:
+                        for pending in batch[index + 1:]:
+                            _mark_failed(pending, connect_error)
+                        failed += len(batch) - index - 1
+                        break
+            else:
+                _mark_sent(message)
+                sent += 1
+    finally:
+        connection.close()
+    return sent, failed
+
+
+def requeue_stale(timeout):
+    """Returns to the queue messages left as being sent by a worker that died."""
+    cutoff = timezone.now() - datetime.timedelta(seconds=timeout)
+    return EmailOutbox.objects.filter(status=SENDING, locked_at__lt=cutoff).update(
+        status=PENDING, locked_at=None, next_attempt_at=timezone.now(),
+    )
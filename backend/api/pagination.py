@@ -0,0 +1,13 @@
+from rest_framework.pagination import CursorPagination
+
+
+class StableCursorPagination(CursorPagination):
+    """
+    Keyset pagination over an indexed, unchanging ordering (``-id`` unless the
+    view or the ``?ordering=`` parameter says otherwise), so page cost stays
+    flat however deep the client walks.
+    """
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+    ordering = '-id'
@@ -0,0 +1,165 @@
+"""
+On-demand request profiling for staff.
+
+A staff user adding ``?profile=1`` (or sending ``X-Profile: 1``) gets, instead
+of the normal body, a plain-text report of the request run under ``cProfile``:
+the SQL executed, the top functions by own and cumulative time, and the call
+tree. With ``PROFILE_DIR`` set the report and the raw ``pstats`` dump are also
+written there (``X-Profile-File`` names them) so runs can be diffed later.
+
+Requests without the switch only pay for one dictionary lookup.
+"""
+import cProfile
+import os
+import pstats
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse
+from django.utils import timezone
+from django.utils.text import slugify
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+
+from .authentication import CachedJWTAuthentication
+
+TOP_FUNCTIONS = 30
+TREE_MIN_SHARE = 0.01
+TREE_MAX_DEPTH = 40
+TREE_MAX_CHILDREN = 8
+
+
+def _wants_profile(request):
+    return request.GET.get('profile') == '1' or request.META.get('HTTP_X_PROFILE') == '1'
+
+
+def _is_staff(request):
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        # API clients authenticate with JWT, which DRF only checks inside the view.
+        try:
+            authenticated = CachedJWTAuthentication().authenticate(request)
+        except (AuthenticationFailed, InvalidToken, TokenError):
+            return False
+        user = authenticated[0] if authenticated else None
+    return user is not None and user.is_active and user.is_staff
+
+
+class _QueryLog:
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((sql, time.perf_counter() - started))
+
+
+def _label(func):
+    return pstats.func_std_string(func)
+
+
+def _function_table(stats, sort_key, title):
+    rows = sorted(stats.stats.items(), key=lambda item: item[1][sort_key], reverse=True)[:TOP_FUNCTIONS]
+    lines = [f"== {title} ==", f"{'ncalls':>10} {'tottime':>10} {'cumtime':>10}  function"]
+    for func, (primitive_calls, calls, own, cumulative, _) in rows:
+        ncalls = str(calls) if calls == primitive_calls else f"{calls}/{primitive_calls}"
+        lines.append(f"{ncalls:>10} {own * 1000:>8.2f}ms {cumulative * 1000:>8.2f}ms  {_label(func)}")
+    return lines
+
+
+def _call_tree(stats, total):
+    callees = {}
+    for func, (_, _, _, _, callers) in stats.stats.items():
+        for caller, (_, _, _, cumulative) in callers.items():
+            callees.setdefault(caller, []).append((cumulative, func))
+    roots = [(entry[3], func) for func, entry in stats.stats.items() if not entry[4]]
+
+    lines = [f"== Call tree (calls >= {TREE_MIN_SHARE:.0%} of the request) =="]
+
+    def walk(cumulative, func, depth, path):
+        if total and cumulative / total < TREE_MIN_SHARE:
+            return
+        lines.append(f"{cumulative * 1000:>9.2f}ms {cumulative / total if total else 0:>6.1%}  {'  ' * depth}{_label(func)}")
+        if depth >= TREE_MAX_DEPTH or func in path:
+            return
+        children = sorted(callees.get(func, ()), key=lambda child: child[0], reverse=True)[:TREE_MAX_CHILDREN]
+        for child_cumulative, child in children:
+            walk(child_cumulative, child, depth + 1, path | {func})
+
+    for cumulative, func in sorted(roots, key=lambda root: root[0], reverse=True):
+        walk(cumulative, func, 0, frozenset())
+    return lines
+
+
+def build_report(request, response, profiler, query_log, elapsed):
+    stats = pstats.Stats(profiler)
+    sql_seconds = sum(seconds for _, seconds in query_log.queries)
+    lines = [
+        f"{request.method} {request.get_full_path()} -> {response.status_code} in {elapsed * 1000:.2f}ms",
+        f"SQL: {len(query_log.queries)} queries, {sql_seconds * 1000:.2f}ms",
+        f"Profiled at {timezone.now().isoformat()}",
+        "",
+        "== SQL (in execution order) ==",
+    ]
+    repeated = Counter(sql for sql, _ in query_log.queries)
+    for sql, seconds in query_log.queries:
+        suffix = f"  [x{repeated[sql]}]" if repeated[sql] > 1 else ""
+        lines.append(f"{seconds * 1000:>9.2f}ms  {sql}{suffix}")
+    lines.append("")
+    lines.extend(_function_table(stats, 2, "Top functions by own time"))
+    lines.append("")
+    lines.extend(_function_table(stats, 3, "Top functions by cumulative time"))
+    lines.append("")
+    lines.extend(_call_tree(stats, elapsed))
+    return "\n".join(lines) + "\n"
+
+
+def _store(request, profiler, report):
+    directory = settings.PROFILE_DIR
+    os.makedirs(directory, exist_ok=True)
+    name = f"{timezone.now():%Y%m%d-%H%M%S-%f}-{request.method.lower()}-{slugify(request.path)[:80]}"
+    profiler.dump_stats(os.path.join(directory, f"{name}.prof"))
+    with open(os.path.join(directory, f"{name}.txt"), "w", encoding="utf-8") as fh:
+        fh.write(report)
+    return name
+
+
+class ProfilerMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not _wants_profile(request) or not _is_staff(request):
+            return self.get_response(request)
+
+        query_log = _QueryLog()
+        profiler = cProfile.Profile()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(query_log))
+            started = time.perf_counter()
+            profiler.enable()
+            try:
+                response = self.get_response(request)
+                if response.streaming:
+                    # Streamed bodies are produced after the view returns; count them too.
+                    for _ in response:
+                        pass
+            finally:
+                profiler.disable()
+            elapsed = time.perf_counter() - started
+
+        report = build_report(request, response, profiler, query_log, elapsed)
+        profiled = HttpResponse(report, content_type='text/plain; charset=utf-8')
+        profiled['X-Profiled-Status'] = str(response.status_code)
+        profiled['Cache-Control'] = 'no-store'
+        if settings.PROFILE_DIR:
+            profiled['X-Profile-File'] = _store(request, profiler, report)
+        response.close()
+        return profiled
@@ -0,0 +1,116 @@
+"""
+Resized variants of uploaded images (user avatars and company logos).
+
+Uploads are stored under the SHA-256 of their content. The API never links
+to the original: serializers expose one URL per variant in ``RENDITIONS``
+and format in ``FORMATS``, each carrying a version taken from the content
+hash. A variant is rendered the first time it is requested and cached on
+disk in ``IMAGE_RENDITIONS_ROOT``, so the response never changes for a URL
+and is served as immutable.
+"""
+import hashlib
+import io
+import os
+import re
+
+from django.conf import settings
+from django.urls import reverse
+from PIL import Image, ImageOps
+
+from .blobstore import LocalBlobStore
+
+# Longest side, in pixels, of each variant. Images are never enlarged.
+RENDITIONS = {
+    'thumb': 64,
+    'small': 128,
+    'medium': 256,
+}
+
+FORMATS = {
+    'webp': 'image/webp',
+    'png': 'image/png',
+}
+
+WEBP_QUALITY = 82
+
+_CONTENT_HASHED_RE = re.compile(r'^([0-9a-f]{64})')
+VERSION_LENGTH = 32
+
+
+def name_by_content(field_file):
+    """
+    Renames a pending upload to the SHA-256 of its bytes (keeping the
+    extension). Run before the model is saved; the field's ``upload_to``
+    still supplies the directory.
+    """
+    if not field_file or field_file._committed:
+        return
+    digest = hashlib.sha256()
+    for chunk in field_file.chunks():
+        digest.update(chunk)
+    field_file.seek(0)
+    extension = os.path.splitext(field_file.name)[1].lower()
+    field_file.name = f'{digest.hexdigest()}{extension}'
+
+
+def source_version(name):
+    """Version of a stored image, used in its variant URLs."""
+    stem = os.path.basename(name)
+    match = _CONTENT_HASHED_RE.match(stem)
+    if match:
+        return match.group(1)[:VERSION_LENGTH]
+    # Uploaded before names were content hashes. Storage never reuses the
+    # name of an existing file, so the name identifies the content.
+    return hashlib.sha256(name.encode()).hexdigest()[:VERSION_LENGTH]
+
+
+def rendition_urls(field_file, request=None):
+    """``{format: {variant: url}}`` for an image field, or None when it is empty."""
+    if not field_file:
+        return None
+    instance = field_file.instance
+    version = source_version(field_file.name)
+    urls = {}
+    for fmt in FORMATS:
+        urls[fmt] = {}
+        for variant in RENDITIONS:
+            url = reverse(f'{instance._meta.model_name}-rendition', kwargs={
+                'pk': instance.pk, 'field': field_file.field.name,
+                'version': version, 'variant': variant, 'fmt': fmt,
+            })
+            urls[fmt][variant] = request.build_absolute_uri(url) if request is not None else url
+    return urls
+
+
+def get_rendition_store():
+    return LocalBlobStore(settings.IMAGE_RENDITIONS_ROOT)
+
+
+def render(data, variant, fmt):
+    """Returns the bytes of ``variant`` of the image in ``data``, encoded as ``fmt``."""
+    output = io.BytesIO()
+    with Image.open(io.BytesIO(data)) as source:
+        image = ImageOps.exif_transpose(source)
+        size = RENDITIONS[variant]
+        image.thumbnail((size, size), Image.Resampling.LANCZOS)
+        has_alpha = image.mode in ('RGBA', 'LA', 'PA') or 'transparency' in image.info
+        image = image.convert('RGBA' if has_alpha else 'RGB')
+        if fmt == 'webp':
+            image.save(output, format='WEBP', quality=WEBP_QUALITY, method=6)
+        else:
+            image.save(output, format='PNG', optimize=True)
+    return output.getvalue()
+
+
+def get_rendition(field_file, variant, fmt):
+    """Returns the bytes of a variant, rendering and caching it on first use."""
+    store = get_rendition_store()
+    key = f'{source_version(field_file.name)}-{variant}.{fmt}'
+    if store.exists(key):
+        with store.open(key) as fh:
+            return fh.read()
+
+    with field_file.open('rb') as fh:
+        data = render(fh.read(), variant, fmt)
+    store.save(key, data)
+    return data
@@ -0,0 +1,189 @@
+"""
+Full-text search over projects, contracts, companies, contacts and documents.
+
+Every searchable row has a ``SearchEntry`` holding its title, a short detail
+line and its text as a weighted ``tsvector`` under a GIN index, kept up to
+date by signals when the row is saved or deleted. ``/api/search/?q=`` is one
+``@@`` query over that table ranked with ``ts_rank``, so it neither joins
+nor scans the source tables.
+
+Matching ignores accents: both the indexed text and the query are folded to
+plain ASCII letters in Python before they reach the ``spanish`` text search
+configuration, which would otherwise stem "García" and "Garcia" apart.
+"""
+import re
+import unicodedata
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db.models import F, Value
+
+from .models import Company, CompanyContact, Contract, Project, ProjectDocument, SearchEntry
+
+SEARCH_CONFIG = 'spanish'
+SEARCH_DEFAULT_LIMIT = 20
+SEARCH_MAX_LIMIT = 100
+REBUILD_BATCH_SIZE = 500
+
+# kind: (model, parent or None, {weight: fields}). The A fields make the title, the B fields the detail.
+KINDS = {
+    'project': (Project, 'contract', {'A': ['code'], 'B': ['description']}),
+    'contract': (Contract, None, {'A': ['code', 'client_name'], 'B': ['description']}),
+    'company': (Company, None, {'A': ['name'], 'B': ['cif']}),
+    'contact': (CompanyContact, 'company', {'A': ['first_name', 'last_name'], 'B': ['email']}),
+    'document': (ProjectDocument, 'project', {'A': ['name'], 'B': ['category']}),
+}
+
+KIND_OF = {model: kind for kind, (model, _, _) in KINDS.items()}
+
+_TITLE_LENGTH = SearchEntry._meta.get_field('title').max_length
+_SUBTITLE_LENGTH = SearchEntry._meta.get_field('subtitle').max_length
+_EMAIL_SEPARATORS = re.compile(r'[@._+-]+')
+
+
+def strip_accents(text):
+    """
+    ``text`` without accents or diacritics ("Peñíscola" -> "Peniscola"), case
+    kept. Unlike ``functions.fold`` it covers every script, as it never has to
+    match a SQL expression.
+    """
+    decomposed = unicodedata.normalize('NFKD', text)
+    return ''.join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def _searchable(value):
+    text = strip_accents(value)
+    if '@' in text:
+        # The parser keeps an address as one token; add its parts so "perez" finds it.
+        text = f'{text} {_EMAIL_SEPARATORS.sub(" ", text)}'
+    return text
+
+
+def _join(row, fields, length):
+    return ' '.join(str(row[field]) for field in fields if row[field])[:length]
+
+
+def source_fields(kind):
+    """The columns of the source model an entry of ``kind`` is built from."""
+    _, parent, weights = KINDS[kind]
+    fields = ['pk'] + [field for names in weights.values() for field in names]
+    return fields + [f'{parent}_id'] if parent else fields
+
+
+def entry_values(kind, row):
+    """The fields of the ``SearchEntry`` for ``row``, a dict holding ``source_fields(kind)``."""
+    _, parent, weights = KINDS[kind]
+    vector = None
+    for weight, fields in weights.items():
+        text = ' '.join(_searchable(str(row[field])) for field in fields if row[field])
+        part = SearchVector(Value(text), config=SEARCH_CONFIG, weight=weight)
+        vector = part if vector is None else vector + part
+    return {
+        'kind': kind,
+        'object_id': row['pk'],
+        'parent_id': row[f'{parent}_id'] if parent else None,
+        'title': _join(row, weights['A'], _TITLE_LENGTH),
+        'subtitle': _join(row, weights.get('B', ()), _SUBTITLE_LENGTH),
+        'vector': vector,
+    }
+
+
+def save_entries(entries, model=SearchEntry):
+    model.objects.bulk_create(
+        entries, update_conflicts=True, unique_fields=['kind', 'object_id'],
+        update_fields=['parent_id', 'title', 'subtitle', 'vector'],
+    )
+
+
+def affects_entry(instance, update_fields):
+    """Whether a save limited to ``update_fields`` may change the entry of ``instance``."""
+    if update_fields is None:
+        return True
+    fields = set(source_fields(KIND_OF[type(instance)]))
+    fields.update(field[:-3] for field in list(fields) if field.endswith('_id'))
+    return not fields.isdisjoint(update_fields)
+
+
+def index(instance):
+    index_all(type(instance), [instance])
+
+
+def index_all(model, instances):
+    """Creates or refreshes the entries of ``instances`` with one statement."""
+    kind = KIND_OF[model]
+    fields = source_fields(kind)
+    save_entries([
+        SearchEntry(**entry_values(kind, {field: getattr(instance, field) for field in fields}))
+        for instance in instances
+    ])
+
+
+def unindex(instance):
+    SearchEntry.objects.filter(kind=KIND_OF[type(instance)], object_id=instance.pk).delete()
+
+
+def rebuild(kind, batch_size=REBUILD_BATCH_SIZE):
+    """Re-creates every entry of ``kind``; returns how many there are."""
+    model = KINDS[kind][0]
+    fields = source_fields(kind)
+    total = 0
+    last_pk = 0
+    while True:
+        rows = list(model.objects.filter(pk__gt=last_pk).order_by('pk').values(*fields)[:batch_size])
+        if not rows:
+            break
+        save_entries([SearchEntry(**entry_values(kind, row)) for row in rows])
+        total += len(rows)
+        last_pk = rows[-1]['pk']
+    SearchEntry.objects.filter(kind=kind).exclude(object_id__in=model.objects.values('pk')).delete()
+    return total
+
+
+def parse_params(params):
+    """``(q, kinds, limit, offset)`` from the query string, or raises ValueError with ``{param: [message]}``."""
+    errors = {}
+    q = params.get('q', '').strip()
+    if not q:
+        errors['q'] = ["Texto de búsqueda obligatorio."]
+
+    value = params.get('type')
+    kinds = [kind for kind in value.split(',') if kind] if value else []
+    if any(kind not in KINDS for kind in kinds):
+        errors['type'] = [f"Tipos válidos: {', '.join(KINDS)}."]
+
+    numbers = {}
+    for param, default, maximum in (('limit', SEARCH_DEFAULT_LIMIT, SEARCH_MAX_LIMIT), ('offset', 0, None)):
+        value = params.get(param)
+        if value is None:
+            numbers[param] = default
+        elif not value.isdigit() or (param == 'limit' and int(value) == 0):
+            errors[param] = ["Número no válido."]
+        else:
+            numbers[param] = min(int(value), maximum) if maximum else int(value)
+
+    if errors:
+        raise ValueError(errors)
+    return q, kinds, numbers['limit'], numbers['offset']
+
+
+def search(q, kinds=(), limit=SEARCH_DEFAULT_LIMIT, offset=0):
+    """
+    The entries matching ``q`` (web search syntax: quoted phrases, ``or``,
+    ``-word``), best first. Returns one page and whether another follows.
+    """
+    query = SearchQuery(strip_accents(q), config=SEARCH_CONFIG, search_type='websearch')
+    entries = SearchEntry.objects.filter(vector=query)
+    if kinds:
+        entries = entries.filter(kind__in=kinds)
+    rows = list(
+        entries.annotate(rank=SearchRank(F('vector'), query))
+        .order_by('-rank', 'kind', 'object_id')
+        .values('kind', 'object_id', 'parent_id', 'title', 'subtitle', 'rank')[offset:offset + limit + 1]
+    )
+    results = [
+        {
+            'type': row['kind'], 'id': row['object_id'], 'parent_id': row['parent_id'],
+            'title': row['title'], 'subtitle': row['subtitle'], 'rank': round(row['rank'], 6),
+        }
+        for row in rows[:limit]
+    ]
+    return results, len(rows) > limit
@@ -1,12 +1,228 @@
 from rest_framework import serializers
+from djangorestframework_camel_case.util import camel_to_underscore
+from django.core.exceptions import ValidationError as DjangoValidationError
+from rest_framework.fields import empty
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.relations import MANY_RELATION_KWARGS
+from .blobstore import (
+    blob_key_from_url, content_url, empty_value, is_inline_payload, is_own_content_url, parse_data_uri, put_bytes,
+)
+from .renditions import rendition_urls
+from .signatures import normalise_signatures
 from .models import (
-    User, Company, CompanyContact, Contract, WorkCenter, 
+    Blob, User, Company, CompanyContact, Contract, WorkCenter, 
     Project, ProjectDocument, Meeting, DocumentTemplate, MeetingDocument,
-    FollowUpMeeting, FollowUpMeetingConfig
+    FollowUpMeeting, FollowUpMeetingConfig, Job, EmailOutbox
 )
 
-class UserSerializer(serializers.ModelSerializer):
+class BlobContentField(serializers.Field):
+    """
+    Accepts a data URI (or one of our own content URLs) and renders a link to
+    the object's ``/content/`` route instead of the payload.
+
+    Querysets should go through ``defer_blob_fields`` so that rendering the
+    link never loads the payload column itself.
+    """
+    default_error_messages = {
+        'invalid': 'Not a valid string.',
+    }
+
+    def __init__(self, **kwargs):
+        kwargs['source'] = '*'
+        super().__init__(**kwargs)
+
+    def run_validation(self, data=empty):
+        if data is None and self.allow_null:
+            return {self.field_name: None}
+        return super().run_validation(data)
+
+    def to_internal_value(self, data):
+        if not isinstance(data, str):
+            self.fail('invalid')
+        return {self.field_name: data}
+
+    def to_representation(self, instance):
+        field = self.field_name
+        request = self.context.get('request')
+        if getattr(instance, f'{field}_blob_id'):
+            return content_url(instance, request)
+        ref = getattr(instance, f'{field}_ref') if hasattr(instance, f'{field}_ref') else getattr(instance, field)
+        if is_inline_payload(ref):
+            return content_url(instance, request)
+        return ref
+
+
+class ImageRenditionsField(serializers.ImageField):
+    """
+    Accepts an image upload and renders the URLs of its resized variants,
+    ``{format: {variant: url}}``, instead of a link to the original.
+    """
+
+    def run_validation(self, data=empty):
+        # Clients echo back the URLs they were given: the image stays as it is.
+        if isinstance(data, dict):
+            raise serializers.SkipField()
+        return super().run_validation(data)
+
+    def to_representation(self, value):
+        return rendition_urls(value, self.context.get('request'))
+
+
+class PrimaryKeyField(serializers.PrimaryKeyRelatedField):
+    """
+    ``PrimaryKeyRelatedField`` that takes its instances from
+    ``context['preloaded']`` when the caller loaded them already (see
+    ``bulk.preload_related``). With ``many=True`` the ids are resolved with
+    one query instead of one per id.
+    """
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {'child_relation': cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return PrimaryKeyListField(**list_kwargs)
+
+    def to_pk(self, data):
+        """``data`` as a primary key value, or fails with ``incorrect_type``."""
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            return self.get_queryset().model._meta.pk.to_python(data)
+        except DjangoValidationError:
+            self.fail('incorrect_type', data_type=type(data).__name__)
+
+    def preloaded(self):
+        return self.context.get('preloaded', {}).get(self.get_queryset().model)
+
+    def lookup(self, objects, data):
+        try:
+            return objects[self.to_pk(data)]
+        except KeyError:
+            self.fail('does_not_exist', pk_value=data)
+
+    def to_internal_value(self, data):
+        objects = self.preloaded()
+        if objects is None:
+            return super().to_internal_value(data)
+        return self.lookup(objects, data)
+
+
+class PrimaryKeyListField(serializers.ManyRelatedField):
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+        child = self.child_relation
+        objects = child.preloaded()
+        if objects is None:
+            objects = child.get_queryset().in_bulk({child.to_pk(item) for item in data})
+        return [child.lookup(objects, item) for item in data]
+
+
+def _query_param_names(request, param):
+    value = request.query_params.get(param)
+    if value is None:
+        return None
+    return {camel_to_underscore(name.strip()) for name in value.split(',') if name.strip()}
+
+
+def expanded_fields(serializer_class, request):
+    """Names of the ``Meta.expandable_fields`` of ``serializer_class`` that ``request`` asks for."""
+    expandable = set(getattr(serializer_class.Meta, 'expandable_fields', ()))
+    requested = (_query_param_names(request, 'expand') or set()) | (_query_param_names(request, 'fields') or set())
+    return expandable & requested
+
+
+class DynamicFieldsMixin:
+    """
+    Sparse fieldsets for reads. On the top-level serializer of a GET request,
+    ``?fields=id,code`` keeps only the listed fields and ``?expand=contract``
+    adds nested fields named in ``Meta.expandable_fields``, which are left
+    out otherwise. Names may be given in camelCase or snake_case.
+    """
+
+    def _is_root(self):
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        return parent is None
+
+    def get_fields(self):
+        fields = super().get_fields()
+        expandable = set(getattr(self.Meta, 'expandable_fields', ()))
+        only = None
+        expand = set()
+
+        request = self.context.get('request')
+        if request is not None and request.method in SAFE_METHODS and self._is_root():
+            only = _query_param_names(request, 'fields')
+            expand = _query_param_names(request, 'expand') or set()
+
+        for name in list(fields):
+            requested = name in expand or (only is not None and name in only)
+            if (name in expandable and not requested) or (only is not None and not requested):
+                del fields[name]
+        return fields
+
+
+class BlobFieldsMixin:
+    """
+    Moves data-URI payloads of the model's ``BLOB_FIELDS`` into the blob store
+    on write, and exposes them as links to the ``/content/`` route on read.
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        for name in self.Meta.model.BLOB_FIELDS:
+            if name in fields:
+                fields[name] = BlobContentField(
+                    required=fields[name].required, allow_null=fields[name].allow_null
+                )
+        return fields
+
+    def _store_blobs(self, validated_data):
+        model = self.Meta.model
+        for field in model.BLOB_FIELDS:
+            if field not in validated_data:
+                continue
+            value = validated_data[field]
+            payload = parse_data_uri(value)
+            if payload:
+                content_type, data = payload
+                validated_data[f'{field}_blob'] = put_bytes(data, content_type)
+                validated_data[field] = empty_value(model, field)
+                continue
+
+            # Clients echo back the content URLs they were given.
+            key = blob_key_from_url(value)
+            if key and Blob.objects.filter(pk=key).exists():
+                validated_data[f'{field}_blob_id'] = key
+                validated_data[field] = empty_value(model, field)
+            elif self.instance is not None and is_own_content_url(value, self.instance):
+                # Its payload is still in the column, waiting for ``migrate_blobs``.
+                del validated_data[field]
+            else:
+                validated_data[f'{field}_blob'] = None
+        return validated_data
+
+    def create(self, validated_data):
+        return super().create(self._store_blobs(validated_data))
+
+    def update(self, instance, validated_data):
+        instance = super().update(instance, self._store_blobs(validated_data))
+        # The ``<field>_ref`` annotated by ``defer_blob_fields`` describes the old value.
+        for field in self.Meta.model.BLOB_FIELDS:
+            if field in validated_data:
+                instance.__dict__.pop(f'{field}_ref', None)
+        return instance
+
+
+class UserSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, required=False)
+    avatar = ImageRenditionsField(required=False, allow_null=True)
 
     class Meta:
         model = User
@@ -19,13 +235,16 @@ class UserSerializer(serializers.ModelSerializer):
         return user
 
 
-class CompanyContactSerializer(serializers.ModelSerializer):
+class CompanyContactSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    serializer_related_field = PrimaryKeyField
+
     class Meta:
         model = CompanyContact
         fields = '__all__'
 
-class CompanySerializer(serializers.ModelSerializer):
+class CompanySerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     contacts = CompanyContactSerializer(many=True, read_only=True)
+    avatar = ImageRenditionsField(required=False, allow_null=True)
     
     class Meta:
         model = Company
@@ -34,8 +253,8 @@ class CompanySerializer(serializers.ModelSerializer):
 
 
 
-class ContractSerializer(serializers.ModelSerializer):
-    coordinator_id = serializers.PrimaryKeyRelatedField(
+class ContractSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    coordinator_id = PrimaryKeyField(
         queryset=User.objects.all(), source='coordinator', required=False, allow_null=True
     )
     
@@ -48,17 +267,24 @@ class ContractSerializer(serializers.ModelSerializer):
         ]
 
 
-class WorkCenterSerializer(serializers.ModelSerializer):
+class WorkCenterSerializer(DynamicFieldsMixin, BlobFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = WorkCenter
-        fields = '__all__'
+        exclude = ['risk_info_url_blob']
+
+
+class SignaturesMixin:
+    """Crops, scales down and quantises the images in ``signatures`` on write."""
 
+    def validate_signatures(self, value):
+        return normalise_signatures(value)
 
-class ProjectDocumentSerializer(serializers.ModelSerializer):
-    project_id = serializers.PrimaryKeyRelatedField(
+
+class ProjectDocumentSerializer(DynamicFieldsMixin, BlobFieldsMixin, serializers.ModelSerializer):
+    project_id = PrimaryKeyField(
         queryset=Project.objects.all(), source='project'
     )
-    uploaded_by_id = serializers.PrimaryKeyRelatedField(
+    uploaded_by_id = PrimaryKeyField(
         queryset=User.objects.all(), source='uploaded_by', required=False, allow_null=True
     )
 
@@ -67,16 +293,17 @@ class ProjectDocumentSerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'url', 'status', 'category', 'uploaded_at', 'status_date', 'project_id', 'uploaded_by_id']
 
 
-class MeetingDocumentSerializer(serializers.ModelSerializer):
+class MeetingDocumentSerializer(DynamicFieldsMixin, BlobFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = MeetingDocument
         fields = ['id', 'meeting', 'name', 'file_data', 'uploaded_at']
 
-class MeetingSerializer(serializers.ModelSerializer):
-    project_id = serializers.PrimaryKeyRelatedField(
+class MeetingSerializer(DynamicFieldsMixin, BlobFieldsMixin, SignaturesMixin, serializers.ModelSerializer):
+    project_id = PrimaryKeyField(
         queryset=Project.objects.all(), source='project'
     )
     documents = MeetingDocumentSerializer(many=True, read_only=True)
+    serializer_related_field = PrimaryKeyField
 
     class Meta:
         model = Meeting
@@ -87,60 +314,31 @@ class MeetingSerializer(serializers.ModelSerializer):
         ]
 
 
-class DocumentTemplateSerializer(serializers.ModelSerializer):
+class DocumentTemplateSerializer(DynamicFieldsMixin, BlobFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = DocumentTemplate
-        fields = '__all__'
+        exclude = ['file_data_blob']
+
 
+class FollowUpMeetingConfigSerializer(DynamicFieldsMixin, SignaturesMixin, serializers.ModelSerializer):
+    serializer_related_field = PrimaryKeyField
 
-class FollowUpMeetingConfigSerializer(serializers.ModelSerializer):
     class Meta:
         model = FollowUpMeetingConfig
         fields = '__all__'
 
-    def to_representation(self, instance):
-        ret = super().to_representation(instance)
-        # Map snake_case to camelCase
-        mapping = {
-            'numero_reunion': 'numeroReunion',
-            'revision_informacion': 'revisionInformacion',
-            'observaciones_intercambio': 'observacionesIntercambio',
-            'solapes_empresas': 'solapesEmpresas',
-            'accidentes_trabajo': 'accidentesTrabajo',
-            'ruegos_preguntas': 'ruegosPreguntas',
-        }
-        for snake, camel in mapping.items():
-            if snake in ret:
-                ret[camel] = ret.pop(snake)
-        return ret
-
-    def to_internal_value(self, data):
-        # Map camelCase back to snake_case
-        mapping = {
-            'numeroReunion': 'numero_reunion',
-            'revisionInformacion': 'revision_informacion',
-            'observacionesIntercambio': 'observaciones_intercambio',
-            'solapes_empresas': 'solapes_empresas',
-            'accidentesTrabajo': 'accidentes_trabajo',
-            'ruegosPreguntas': 'ruegos_preguntas',
-        }
-        for camel, snake in mapping.items():
-            if camel in data:
-                data[snake] = data.pop(camel)
-        return super().to_internal_value(data)
-
 
-class FollowUpMeetingSerializer(serializers.ModelSerializer):
-    contract_id = serializers.PrimaryKeyRelatedField(
+class FollowUpMeetingSerializer(DynamicFieldsMixin, BlobFieldsMixin, serializers.ModelSerializer):
+    contract_id = PrimaryKeyField(
         queryset=Contract.objects.all(), source='contract'
     )
-    work_center_ids = serializers.PrimaryKeyRelatedField(
+    work_center_ids = PrimaryKeyField(
         queryset=WorkCenter.objects.all(), source='work_centers', many=True
     )
-    company_ids = serializers.PrimaryKeyRelatedField(
+    company_ids = PrimaryKeyField(
         queryset=Company.objects.all(), source='companies', many=True
     )
-    notification_contacts = serializers.PrimaryKeyRelatedField(
+    notification_contacts = PrimaryKeyField(
         queryset=CompanyContact.objects.all(), many=True, required=False
     )
     config = FollowUpMeetingConfigSerializer(read_only=True)
@@ -154,25 +352,9 @@ class FollowUpMeetingSerializer(serializers.ModelSerializer):
             'notification_contacts', 'is_notified'
         ]
 
-    def to_representation(self, instance):
-        ret = super().to_representation(instance)
-        # Map document_data to documentData for the frontend
-        if 'document_data' in ret:
-            ret['documentData'] = ret.pop('document_data')
-        if 'is_notified' in ret:
-            ret['isNotified'] = ret.pop('is_notified')
-        return ret
-
-    def to_internal_value(self, data):
-        if 'documentData' in data:
-            data['document_data'] = data.pop('documentData')
-        if 'isNotified' in data:
-            data['is_notified'] = data.pop('isNotified')
-        return super().to_internal_value(data)
 
-
-class ProjectSerializer(serializers.ModelSerializer):
-    # Nested representation for read operations to provide full objects
+class ProjectSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    # Nested representation for read operations to provide full objects (see expandable_fields)
     contract = ContractSerializer(read_only=True)
     work_center = WorkCenterSerializer(read_only=True)
     manager = UserSerializer(read_only=True)
@@ -180,25 +362,25 @@ class ProjectSerializer(serializers.ModelSerializer):
     contacts = CompanyContactSerializer(many=True, read_only=True)
     
     # Include IDs in read/write operations
-    contract_id = serializers.PrimaryKeyRelatedField(
+    contract_id = PrimaryKeyField(
         queryset=Contract.objects.all(), source='contract'
     )
-    work_center_id = serializers.PrimaryKeyRelatedField(
+    work_center_id = PrimaryKeyField(
         queryset=WorkCenter.objects.all(), source='work_center'
     )
-    manager_id = serializers.PrimaryKeyRelatedField(
+    manager_id = PrimaryKeyField(
         queryset=User.objects.all(), source='manager'
     )
-    company_ids = serializers.PrimaryKeyRelatedField(
+    company_ids = PrimaryKeyField(
         queryset=Company.objects.all(), source='companies', many=True
     )
-    contact_ids = serializers.PrimaryKeyRelatedField(
+    contact_ids = PrimaryKeyField(
         queryset=CompanyContact.objects.all(), source='contacts', many=True
     )
-    main_contact_id = serializers.PrimaryKeyRelatedField(
+    main_contact_id = PrimaryKeyField(
         queryset=CompanyContact.objects.all(), source='main_contact', required=False, allow_null=True
     )
-    contract_manager_id = serializers.PrimaryKeyRelatedField(
+    contract_manager_id = PrimaryKeyField(
         queryset=CompanyContact.objects.all(), source='contract_manager', required=False, allow_null=True
     )
 
@@ -211,3 +393,57 @@ class ProjectSerializer(serializers.ModelSerializer):
             'contract_id', 'work_center_id', 'manager_id', 'company_ids', 'contact_ids',
             'main_contact_id', 'contract_manager_id'
         ]
+        # Embedded objects are only rendered on request: ``?expand=contract,companies``.
+        expandable_fields = ['contract', 'work_center', 'manager', 'companies', 'contacts']
+
+
+class JobSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    url = serializers.HyperlinkedIdentityField(view_name='job-detail')
+    result_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Job
+        fields = [
+            'id', 'url', 'kind', 'status', 'progress', 'error', 'result', 'result_url',
+            'attempts', 'created_at', 'started_at', 'finished_at'
+        ]
+
+    def get_result_url(self, obj):
+        url = (obj.result or {}).get('url')
+        if not url:
+            return None
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request is not None else url
+
+
+class ActaBatchSerializer(serializers.Serializer):
+    """Selects the follow-up meetings whose actas are regenerated in bulk."""
+    contract = PrimaryKeyField(queryset=Contract.objects.all(), required=False, allow_null=True)
+    date_from = serializers.DateField(required=False, allow_null=True)
+    date_to = serializers.DateField(required=False, allow_null=True)
+
+    def validate(self, attrs):
+        if not any(attrs.get(key) for key in ('contract', 'date_from', 'date_to')):
+            raise serializers.ValidationError("Indique un contrato o un rango de fechas.")
+        if attrs.get('date_from') and attrs.get('date_to') and attrs['date_from'] > attrs['date_to']:
+            raise serializers.ValidationError({'date_to': ["La fecha final es anterior a la inicial."]})
+        return attrs
+
+    def job_payload(self):
+        data = self.validated_data
+        return {
+            'contract': data['contract'].pk if data.get('contract') else None,
+            'date_from': data['date_from'].isoformat() if data.get('date_from') else None,
+            'date_to': data['date_to'].isoformat() if data.get('date_to') else None,
+        }
+
+
+class EmailOutboxSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    url = serializers.HyperlinkedIdentityField(view_name='emailoutbox-detail')
+
+    class Meta:
+        model = EmailOutbox
+        fields = [
+            'id', 'url', 'subject', 'recipients', 'status', 'attempts',
+            'next_attempt_at', 'last_error', 'created_at', 'sent_at'
+        ]
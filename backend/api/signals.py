@@ -0,0 +1,120 @@
+from django.apps import apps
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .authentication import forget_user
+from .autocomplete import RESOURCE_OF as AUTOCOMPLETED, forget as forget_suggestions
+from .dashboard import SOURCES as DASHBOARD_SOURCES, affects_counters, mark_stale, previous_parent
+from .docx_templates import template_cache
+from .models import Company, DocumentTemplate, User
+from .renditions import name_by_content
+from .search import KIND_OF as SEARCHABLE, affects_entry, index as index_for_search, unindex
+from .sync import EMBEDDED_IN, SYNCED_MODELS, has_updated_at, record_deletion, touch, touch_embedding
+
+
+@receiver([post_save, post_delete], sender=DocumentTemplate)
+def invalidate_compiled_template(sender, instance, **kwargs):
+    template_cache.invalidate(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    # Covers password changes too: set_password() is always followed by save().
+    forget_user(instance.pk)
+
+
+@receiver(pre_save, sender=User)
+@receiver(pre_save, sender=Company)
+def name_avatar_by_content(sender, instance, raw=False, **kwargs):
+    if not raw:
+        name_by_content(instance.avatar)
+
+
+def remember_dashboard_parent(sender, instance, raw=False, update_fields=None, **kwargs):
+    if not raw and affects_counters(instance, update_fields):
+        # The parent may change with this save; both contracts need recounting then.
+        instance._dashboard_parent = previous_parent(instance)
+
+
+def mark_dashboard_stale_on_save(sender, instance, raw=False, update_fields=None, **kwargs):
+    if not raw and affects_counters(instance, update_fields):
+        mark_stale(instance, getattr(instance, '_dashboard_parent', None))
+
+
+def mark_dashboard_stale_on_delete(sender, instance, **kwargs):
+    mark_stale(instance)
+
+
+def invalidate_suggestions(sender, instance, raw=False, **kwargs):
+    if not raw:
+        forget_suggestions(AUTOCOMPLETED[sender])
+
+
+def update_search_entry(sender, instance, raw=False, update_fields=None, **kwargs):
+    if not raw and affects_entry(instance, update_fields):
+        index_for_search(instance)
+
+
+def delete_search_entry(sender, instance, **kwargs):
+    unindex(instance)
+
+
+def touch_embedding_on_save(sender, instance, raw=False, **kwargs):
+    if not raw:
+        touch_embedding(instance)
+
+
+def touch_embedding_on_delete(sender, instance, **kwargs):
+    # Before the delete, while the relations to the parents still exist.
+    touch_embedding(instance)
+
+
+def record_tombstone(sender, instance, **kwargs):
+    record_deletion(instance)
+
+
+def touch_m2m_owner(sender, instance, action, reverse, model, pk_set, **kwargs):
+    """``updated_at`` does not move when only a many-to-many relation changes."""
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if not reverse:
+        if has_updated_at(type(instance)):
+            touch(type(instance).objects.filter(pk=instance.pk))
+        return
+    if not has_updated_at(model):
+        return
+    if action == 'pre_clear':
+        field = next(f for f in model._meta.many_to_many if f.remote_field.through is sender)
+        touch(model.objects.filter(**{field.name: instance.pk}))
+    elif pk_set:
+        touch(model.objects.filter(pk__in=pk_set))
+
+
+def connect():
+    """
+    Connects the receivers above to the models they serve only. A receiver
+    without a sender would make ``has_listeners()`` true for every model, and
+    Django would then load and signal row by row on every cascade and
+    queryset ``.delete()`` instead of deleting in one statement.
+    """
+    per_model = [
+        (DASHBOARD_SOURCES, pre_save, remember_dashboard_parent),
+        (DASHBOARD_SOURCES, post_save, mark_dashboard_stale_on_save),
+        (DASHBOARD_SOURCES, post_delete, mark_dashboard_stale_on_delete),
+        (AUTOCOMPLETED, post_save, invalidate_suggestions),
+        (AUTOCOMPLETED, post_delete, invalidate_suggestions),
+        (SEARCHABLE, post_save, update_search_entry),
+        (SEARCHABLE, post_delete, delete_search_entry),
+        (EMBEDDED_IN, post_save, touch_embedding_on_save),
+        (EMBEDDED_IN, pre_delete, touch_embedding_on_delete),
+        (SYNCED_MODELS, post_delete, record_tombstone),
+    ]
+    for models, signal, receiver_func in per_model:
+        for model in models:
+            signal.connect(receiver_func, sender=model)
+
+    tracked = set(SYNCED_MODELS) | set(EMBEDDED_IN) | set(DASHBOARD_SOURCES) | set(SEARCHABLE) | set(AUTOCOMPLETED)
+    for model in apps.get_app_config('api').get_models():
+        for field in model._meta.many_to_many:
+            if model in tracked or field.related_model in tracked:
+                m2m_changed.connect(touch_m2m_owner, sender=field.remote_field.through)
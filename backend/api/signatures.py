@@ -0,0 +1,116 @@
+"""
+Signature images.
+
+``SignaturePad`` sends the whole canvas as a full-size PNG data URI, mostly
+white space, and every update of a meeting sends all its signatures again.
+They are normalised when they come in: cropped to the ink, scaled down to
+``SIGNATURE_DPI`` at the width the actas print them, and quantised to a
+small-palette PNG. The result depends only on the input bytes, so it is
+remembered by SHA-256 and already normalised payloads are left as they are.
+"""
+import base64
+import hashlib
+import io
+import logging
+
+from PIL import Image, ImageChops, UnidentifiedImageError
+
+from .blobstore import parse_data_uri
+
+logger = logging.getLogger(__name__)
+
+# Width of the "Firma" column image in the follow-up acta (see actas.py).
+SIGNATURE_WIDTH_INCHES = 1.2
+SIGNATURE_DPI = 300
+SIGNATURE_MAX_WIDTH = round(SIGNATURE_WIDTH_INCHES * SIGNATURE_DPI)
+SIGNATURE_COLOURS = 16
+# Pixels lighter than this on every channel count as paper when cropping.
+PAPER_THRESHOLD = 245
+CROP_MARGIN = 4
+
+MAX_CACHED_SIGNATURES = 1024
+
+_normalised = {}
+
+
+def _on_white(image):
+    if image.mode in ('RGBA', 'LA', 'PA') or (image.mode == 'P' and 'transparency' in image.info):
+        image = image.convert('RGBA')
+        background = Image.new('RGBA', image.size, 'white')
+        return Image.alpha_composite(background, image).convert('RGB')
+    return image.convert('RGB')
+
+
+def _ink_box(image):
+    ink = ImageChops.invert(image.convert('L')).point(lambda value: 255 if value > 255 - PAPER_THRESHOLD else 0)
+    box = ink.getbbox()
+    if box is None:
+        return None
+    left, top, right, bottom = box
+    return (
+        max(left - CROP_MARGIN, 0), max(top - CROP_MARGIN, 0),
+        min(right + CROP_MARGIN, image.width), min(bottom + CROP_MARGIN, image.height),
+    )
+
+
+def normalise_image(data):
+    """Returns the PNG bytes of a normalised signature, or None if ``data`` is no image."""
+    try:
+        image = Image.open(io.BytesIO(data))
+        image.load()
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError):
+        return None
+
+    image = _on_white(image)
+    box = _ink_box(image)
+    if box is not None:
+        image = image.crop(box)
+    if image.width > SIGNATURE_MAX_WIDTH:
+        height = max(round(image.height * SIGNATURE_MAX_WIDTH / image.width), 1)
+        image = image.resize((SIGNATURE_MAX_WIDTH, height), Image.Resampling.LANCZOS)
+    image = image.quantize(colors=SIGNATURE_COLOURS, method=Image.Quantize.MEDIANCUT, dither=Image.Dither.NONE)
+
+    output = io.BytesIO()
+    image.save(output, format='PNG', optimize=True, dpi=(SIGNATURE_DPI, SIGNATURE_DPI))
+    return output.getvalue()
+
+
+def _remember(digest, value):
+    if len(_normalised) < MAX_CACHED_SIGNATURES:
+        _normalised[digest] = value
+
+
+def normalise_data_uri(value):
+    """Normalises a signature data URI; anything else is returned unchanged."""
+    payload = parse_data_uri(value)
+    if payload is None or not payload[0].startswith('image/'):
+        return value
+
+    digest = hashlib.sha256(payload[1]).hexdigest()
+    try:
+        return _normalised[digest]
+    except KeyError:
+        pass
+
+    png = normalise_image(payload[1])
+    if png is None:
+        logger.warning("Could not normalise signature image %s", digest)
+        result = value
+    else:
+        result = 'data:image/png;base64,' + base64.b64encode(png).decode('ascii')
+        # Sending the normalised signature back (as every meeting update does) is free.
+        _remember(hashlib.sha256(png).hexdigest(), result)
+    _remember(digest, result)
+    return result
+
+
+def normalise_signatures(signatures):
+    """Returns ``signatures`` with the ``data`` image of each entry normalised."""
+    if not isinstance(signatures, list):
+        return signatures
+    normalised = []
+    for signature in signatures:
+        if isinstance(signature, dict) and isinstance(signature.get('data'), str):
+            signature = {**signature, 'data': normalise_data_uri(signature['data'])}
+        normalised.append(signature)
+    return normalised
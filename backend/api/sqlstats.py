@@ -0,0 +1,262 @@
+"""
+SQL statistics per view.
+
+``SqlStatsMiddleware`` times every statement a request issues, normalises it
+into a fingerprint (literals, placeholders and ``IN``/``VALUES`` lists folded)
+and aggregates calls and time per fingerprint and view in memory. Every
+``SQL_STATS_FLUSH_SECONDS`` the totals are handed to the job queue in one
+row, and ``manage.py run_jobs`` adds them to the ``SqlFingerprint`` rows that
+``manage.py sql_top`` reports on.
+
+Statements slower than ``SQL_SLOW_QUERY_MS`` are logged to ``api.sql``. With
+``SQL_EXPLAIN_SLOW_QUERIES`` on PostgreSQL, the slowest SELECT of such a
+request is also queued, at most once per fingerprint and
+``SQL_EXPLAIN_INTERVAL_SECONDS``, for a worker to run again under
+``EXPLAIN (ANALYZE, BUFFERS)`` and keep the plan with the fingerprint.
+Requests never wait for either.
+"""
+import hashlib
+import logging
+import re
+import threading
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import DatabaseError, IntegrityError, connections, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .jobs import JobError, enqueue, job_handler
+from .metrics import route_name
+from .models import SqlFingerprint
+
+logger = logging.getLogger('api.sql')
+
+SQL_STATS_JOB = 'sql_stats'
+SQL_EXPLAIN_JOB = 'sql_explain'
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_RE = re.compile(r"%s|%\(\w+\)s")
+_IN_LIST_RE = re.compile(r"\bIN \((?:\?, )*\?\)", re.IGNORECASE)
+_VALUES_RE = re.compile(r"\bVALUES (\([^()]*\))(?:, \([^()]*\))+", re.IGNORECASE)
+_SPACE_RE = re.compile(r"\s+")
+
+# Django builds the same SQL string for the same queryset shape, so the
+# normalisation of each distinct string is remembered (up to this many).
+MAX_CACHED_STATEMENTS = 4096
+
+_normalised = {}
+
+
+def normalise(sql):
+    """Returns ``(fingerprint, normalised_sql)`` for a statement."""
+    try:
+        return _normalised[sql]
+    except KeyError:
+        pass
+    text = _SPACE_RE.sub(' ', sql).strip()
+    text = _STRING_RE.sub('?', text)
+    text = _PLACEHOLDER_RE.sub('?', text)
+    text = _NUMBER_RE.sub('?', text)
+    text = _IN_LIST_RE.sub('IN (...)', text)
+    text = _VALUES_RE.sub(r'VALUES \1, ...', text)
+    result = (hashlib.sha1(text.encode()).hexdigest()[:16], text)
+    if len(_normalised) < MAX_CACHED_STATEMENTS:
+        _normalised[sql] = result
+    return result
+
+
+class _Totals:
+    __slots__ = ('sql', 'calls', 'total_ms', 'max_ms', 'slow_calls')
+
+    def __init__(self, sql):
+        self.sql = sql
+        self.calls = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.slow_calls = 0
+
+
+_lock = threading.Lock()
+_totals = {}
+_explained = {}
+_last_flush = time.monotonic()
+
+
+def record(view, statements):
+    """Adds a request's ``(sql, milliseconds)`` pairs to the pending totals."""
+    slow_ms = settings.SQL_SLOW_QUERY_MS
+    with _lock:
+        for sql, elapsed_ms in statements:
+            fingerprint, text = normalise(sql)
+            totals = _totals.get((fingerprint, view))
+            if totals is None:
+                totals = _totals[(fingerprint, view)] = _Totals(text)
+            totals.calls += 1
+            totals.total_ms += elapsed_ms
+            totals.max_ms = max(totals.max_ms, elapsed_ms)
+            if elapsed_ms >= slow_ms:
+                totals.slow_calls += 1
+
+
+def take_pending():
+    """Removes and returns the pending totals as JSON-ready dicts."""
+    global _totals, _last_flush
+    with _lock:
+        pending, _totals = _totals, {}
+        _last_flush = time.monotonic()
+    return [
+        {'fingerprint': fingerprint, 'view': view, 'sql': totals.sql, 'calls': totals.calls,
+         'total_ms': totals.total_ms, 'max_ms': totals.max_ms, 'slow_calls': totals.slow_calls}
+        for (fingerprint, view), totals in pending.items()
+    ]
+
+
+def _upsert(fingerprint, view, sql, changes, **initial):
+    rows = SqlFingerprint.objects.filter(fingerprint=fingerprint, view=view)
+    if rows.update(**changes):
+        return
+    try:
+        with transaction.atomic():
+            SqlFingerprint.objects.create(fingerprint=fingerprint, view=view, sql=sql, **initial)
+    except IntegrityError:
+        # Another process created the row in the meantime.
+        rows.update(**changes)
+
+
+def save_totals(pending):
+    """Adds totals from ``take_pending`` to the ``SqlFingerprint`` table."""
+    now = timezone.now()
+    for totals in pending:
+        changes = {
+            'calls': F('calls') + totals['calls'],
+            'total_ms': F('total_ms') + totals['total_ms'],
+            'max_ms': Greatest(F('max_ms'), Value(totals['max_ms'])),
+            'slow_calls': F('slow_calls') + totals['slow_calls'],
+            'last_seen': now,
+        }
+        _upsert(
+            totals['fingerprint'], totals['view'], totals['sql'], changes,
+            calls=totals['calls'], total_ms=totals['total_ms'], max_ms=totals['max_ms'],
+            slow_calls=totals['slow_calls'], last_seen=now,
+        )
+    return len(pending)
+
+
+def flush():
+    """Adds this process's pending totals to the ``SqlFingerprint`` table right away."""
+    return save_totals(take_pending())
+
+
+@job_handler(SQL_STATS_JOB, internal=True)
+def save_totals_job(job):
+    return {'fingerprints': save_totals(job.payload['totals'])}
+
+
+def _explainable(connection, sql, many):
+    if many or connection.vendor != 'postgresql':
+        return False
+    statement = sql.lstrip().upper()
+    # ANALYZE runs the statement: only plain reads may be repeated.
+    return statement.startswith('SELECT') and ' FOR UPDATE' not in statement and ' FOR SHARE' not in statement
+
+
+def explain(connection, sql, params=None):
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS) {sql}", params)
+        return "\n".join(row[0] for row in cursor.fetchall())
+
+
+def _queue_plan(view, worst):
+    connection, sql, params, elapsed_ms = worst
+    fingerprint, _ = normalise(sql)
+    now = time.monotonic()
+    with _lock:
+        last = _explained.get(fingerprint)
+        if last is not None and now - last < settings.SQL_EXPLAIN_INTERVAL_SECONDS:
+            return
+        _explained[fingerprint] = now
+
+    # The worker runs the statement on its own connection, so the parameters
+    # travel inlined as literals.
+    enqueue(
+        SQL_EXPLAIN_JOB, database=connection.alias, fingerprint=fingerprint, view=view,
+        sql=connection.ops.compose_sql(sql, params), elapsed_ms=elapsed_ms,
+    )
+
+
+@job_handler(SQL_EXPLAIN_JOB, internal=True)
+def explain_job(job):
+    payload = job.payload
+    fingerprint, view = payload['fingerprint'], payload['view']
+    try:
+        plan = explain(connections[payload['database']], payload['sql'])
+    except DatabaseError as e:
+        raise JobError(f"No se pudo explicar la consulta {fingerprint}: {e}") from e
+    logger.warning("Plan for slow query %s (%.1fms, %s):\n%s", fingerprint, payload['elapsed_ms'], view, plan)
+
+    now = timezone.now()
+    changes = {'explain': plan, 'explained_at': now}
+    _upsert(fingerprint, view, normalise(payload['sql'])[1], changes, last_seen=now, **changes)
+    return {'fingerprint': fingerprint, 'view': view}
+
+
+class _Recorder:
+    def __init__(self):
+        self.statements = []
+        self.slow = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self.statements.append((sql, elapsed_ms))
+            if elapsed_ms >= settings.SQL_SLOW_QUERY_MS:
+                self.slow.append((context['connection'], sql, params, many, elapsed_ms))
+
+
+class SqlStatsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.SQL_STATS_ENABLED:
+            return self.get_response(request)
+
+        recorder = _Recorder()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            response = self.get_response(request)
+
+        try:
+            self.process_statements(request, recorder)
+        except Exception:
+            # Instrumentation must never fail a request.
+            logger.exception("Could not record SQL statistics")
+        return response
+
+    def process_statements(self, request, recorder):
+        view = route_name(request)
+        record(view, recorder.statements)
+
+        for connection, sql, params, many, elapsed_ms in recorder.slow:
+            logger.warning("Slow query (%.1fms) in %s: %s", elapsed_ms, view, normalise(sql)[1])
+
+        candidates = [
+            (connection, sql, params, elapsed_ms)
+            for connection, sql, params, many, elapsed_ms in recorder.slow
+            if settings.SQL_EXPLAIN_SLOW_QUERIES and _explainable(connection, sql, many)
+        ]
+        if candidates:
+            _queue_plan(view, max(candidates, key=lambda candidate: candidate[3]))
+
+        if time.monotonic() - _last_flush >= settings.SQL_STATS_FLUSH_SECONDS:
+            pending = take_pending()
+            if pending:
+                enqueue(SQL_STATS_JOB, totals=pending)
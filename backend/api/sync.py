@@ -0,0 +1,89 @@
+"""
+Delta sync.
+
+Every synced model carries an indexed ``updated_at`` and deletions leave a
+``Tombstone`` behind, so ``/api/sync/?since=<cursor>`` can answer with only
+the rows that changed since the client's last visit.
+
+API representations embed related rows (a company carries its contacts, a
+meeting its documents, ...). When one of those changes, the rows embedding it
+are touched too, otherwise clients would keep stale copies.
+"""
+import datetime
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import (
+    User, Company, CompanyContact, Contract, WorkCenter,
+    Project, ProjectDocument, Meeting, DocumentTemplate, MeetingDocument,
+    FollowUpMeeting, FollowUpMeetingConfig, Tombstone
+)
+
+# Top-level resources returned by ``/api/sync/``.
+SYNCED_MODELS = {
+    User: 'users',
+    Company: 'companies',
+    WorkCenter: 'work_centers',
+    Contract: 'contracts',
+    DocumentTemplate: 'templates',
+    Project: 'projects',
+    ProjectDocument: 'documents',
+    Meeting: 'meetings',
+    FollowUpMeeting: 'follow_up_meetings',
+}
+
+# model -> [(parent model, lookup from parent to model)] for every serializer
+# that nests ``model`` inside ``parent`` by default. Objects only nested on
+# ``?expand=`` (everything a project embeds) are not tracked: clients that
+# expand them fetch the related resources' own changes instead.
+EMBEDDED_IN = {
+    CompanyContact: [(Company, 'contacts')],
+    MeetingDocument: [(Meeting, 'documents')],
+    FollowUpMeetingConfig: [(FollowUpMeeting, 'config')],
+}
+
+# Rows saved just before a cursor was issued may commit just after it; each
+# sync re-sends this much history so that no such row is ever missed.
+OVERLAP = datetime.timedelta(seconds=30)
+
+EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+def has_updated_at(model):
+    return any(f.name == 'updated_at' for f in model._meta.concrete_fields)
+
+
+def touch(queryset):
+    """Bumps ``updated_at`` without firing signals (so touches never cascade)."""
+    return queryset.update(updated_at=timezone.now())
+
+
+def touch_embedding(instance):
+    touch_embeddings(type(instance), [instance.pk])
+
+
+def touch_embeddings(model, pks):
+    """Touches the rows embedding any of the ``model`` rows in ``pks``."""
+    for parent, lookup in EMBEDDED_IN.get(model, ()):
+        touch(parent.objects.filter(**{f'{lookup}__in': pks}))
+
+
+def record_deletion(instance):
+    resource = SYNCED_MODELS.get(type(instance))
+    if resource is not None:
+        Tombstone.objects.create(resource=resource, object_id=instance.pk)
+
+
+def tombstone_horizon():
+    return timezone.now() - datetime.timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS)
+
+
+def encode_cursor(moment):
+    """Cursors are opaque to clients: microseconds since the epoch."""
+    return str((moment - EPOCH) // datetime.timedelta(microseconds=1))
+
+
+def decode_cursor(value):
+    """Returns the datetime in a cursor, or raises ValueError."""
+    return EPOCH + datetime.timedelta(microseconds=int(value))
@@ -1,3 +1,1654 @@
-from django.test import TestCase
+import datetime
+import decimal
+import io
+import os
+import tempfile
+import socketserver
+import threading
+import base64
+import hashlib
+import math
+from importlib import import_module
 
-# Create your tests here.
+from django.apps import apps as django_apps
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.files.uploadedfile import SimpleUploadedFile
+from docx import Document
+from PIL import Image, ImageDraw
+from django.db import DatabaseError, connection, transaction
+from django.db.models.deletion import Collector
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.test.utils import CaptureQueriesContext
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from djangorestframework_camel_case.parser import CamelCaseJSONParser
+from djangorestframework_camel_case.render import CamelCaseJSONRenderer
+from rest_framework.test import APITestCase
+
+from .actas import find_follow_up_template
+from .actas_batch import follow_up_meetings_for, generate_follow_up_actas
+from .blobstore import blob_key_from_url, get_blob_store, put_bytes, put_many, read_blob_field
+from .docx_templates import CompiledTemplate, TemplateCache, get_compiled_template, template_cache
+from .management.commands.benchmark_docx_templates import (
+    REPLACEMENTS, build_acta_template, document_text, legacy_render,
+)
+from .camel_case import CamelCaseORJSONParser, CamelCaseORJSONRenderer
+from . import jobs
+from .jobs import JobError, claim_next, enqueue, job_handler, prune_finished, requeue_stale, run_job, set_progress
+from .outbox import queue_email, send_pending
+from .renditions import RENDITIONS
+from .signatures import SIGNATURE_MAX_WIDTH, normalise_data_uri
+from . import sqlstats
+from .sqlstats import SQL_EXPLAIN_JOB, SQL_STATS_JOB, explain, flush, normalise
+
+from .models import (
+    Blob, User, Company, CompanyContact, Contract, WorkCenter,
+    Project, ProjectDocument, Meeting, DocumentTemplate, MeetingDocument,
+    FollowUpMeeting, FollowUpMeetingConfig, EmailOutbox, SqlFingerprint, DashboardCounter,
+    SearchEntry, Job, Tombstone,
+)
+
+
+def create_project_graph(index):
+    """Creates a project with every relation the list serializers walk."""
+    start = datetime.date(2026, 1, 1)
+    end = datetime.date(2026, 12, 31)
+
+    user = User.objects.create_user(email=f'user{index}@example.com', password='x', name=f'Usuario {index}')
+    company = Company.objects.create(name=f'Empresa {index}', cif=f'B{index:08d}')
+    contacts = [
+        CompanyContact.objects.create(company=company, first_name=f'Contacto {index}-{n}', email=f'c{index}-{n}@example.com')
+        for n in range(2)
+    ]
+    contract = Contract.objects.create(
+        code=f'C-{index}', description='Contrato', start_date=start, end_date=end,
+        client_name='Cliente', amount=1000, coordinator=user,
+    )
+    work_center = WorkCenter.objects.create(
+        name=f'Centro {index}', type='OFICINA', address='Calle 1', zip_code='29001',
+        phone='900000000', province='MÁLAGA', risk_info_url='data:application/pdf;base64,JVBERi0=',
+    )
+    project = Project.objects.create(
+        contract=contract, code=f'P-{index}', description='Obra', start_date=start, end_date=end,
+        work_center=work_center, manager=user, fecha_solicitud=start,
+        main_contact=contacts[0], contract_manager=contacts[1],
+    )
+    project.companies.add(company)
+    project.contacts.add(*contacts)
+
+    ProjectDocument.objects.create(
+        project=project, name='doc.pdf', url='data:application/pdf;base64,JVBERi0=', uploaded_by=user,
+    )
+    meeting = Meeting.objects.create(
+        project=project, start_date=start, end_date=start, time=datetime.time(10, 0),
+        reason='Reunión inicial', location='Oficina', type='PRESENCIAL',
+    )
+    meeting.attendees.add(user)
+    meeting.notification_contacts.add(*contacts)
+    MeetingDocument.objects.create(meeting=meeting, name='anexo.pdf', file_data='data:application/pdf;base64,JVBERi0=')
+    DocumentTemplate.objects.create(
+        name=f'Plantilla {index}', category='Otros', file_data='data:application/pdf;base64,JVBERi0=', file_name='t.pdf',
+    )
+
+    follow_up = FollowUpMeeting.objects.create(
+        contract=contract, reason='Seguimiento', date=start, time=datetime.time(10, 0), type='PRESENCIAL',
+    )
+    follow_up.work_centers.add(work_center)
+    follow_up.companies.add(company)
+    follow_up.notification_contacts.add(contacts[0])
+    FollowUpMeetingConfig.objects.create(meeting=follow_up)
+    return project
+
+
+# Keeps SqlStatsMiddleware from flushing its totals in the middle of a counted request.
+quiet_sql_stats = override_settings(SQL_STATS_FLUSH_SECONDS=3600)
+
+
+def use_temporary_blob_store(test):
+    """Points the blob store at a directory removed when ``test`` ends."""
+    directory = tempfile.TemporaryDirectory()
+    test.addCleanup(directory.cleanup)
+    settings_override = override_settings(BLOB_STORE={
+        'BACKEND': 'api.blobstore.LocalBlobStore', 'OPTIONS': {'location': directory.name},
+    })
+    settings_override.enable()
+    test.addCleanup(settings_override.disable)
+    get_blob_store.cache_clear()
+    test.addCleanup(get_blob_store.cache_clear)
+    return directory.name
+
+
+PDF = b'%PDF-1.4 documento'
+PDF_DATA_URI = 'data:application/pdf;base64,' + base64.b64encode(PDF).decode()
+
+
+@quiet_sql_stats
+class BlobStoreTests(APITestCase):
+    def setUp(self):
+        self.location = use_temporary_blob_store(self)
+        self.project = create_project_graph(0)
+
+    def stored_files(self):
+        return sorted(name for _, _, files in os.walk(self.location) for name in files)
+
+    def test_identical_payloads_share_one_blob(self):
+        first = put_bytes(PDF, 'application/pdf')
+        second = put_bytes(PDF, 'application/pdf')
+        self.assertEqual(first.pk, hashlib.sha256(PDF).hexdigest())
+        self.assertEqual(second.pk, first.pk)
+        self.assertEqual(first.size, len(PDF))
+        self.assertEqual(Blob.objects.count(), 1)
+        self.assertEqual(self.stored_files(), [first.pk])
+
+        keys = put_many([(PDF, 'application/pdf'), (b'otro', None), (b'otro', None)])
+        self.assertEqual(keys[0], first.pk)
+        self.assertEqual(keys[1], keys[2])
+        self.assertEqual(Blob.objects.get(pk=keys[1]).content_type, 'application/octet-stream')
+        self.assertEqual(self.stored_files(), sorted(set(keys)))
+
+    def test_data_uri_is_stored_on_write_and_echo_keeps_it(self):
+        payload = {'projectId': self.project.pk, 'name': 'plan.pdf', 'url': PDF_DATA_URI}
+        response = self.client.post('/api/documents/', payload, format='json')
+        self.assertEqual(response.status_code, 201)
+
+        document = ProjectDocument.objects.get(pk=response.json()['id'])
+        self.assertEqual(document.url, '')
+        self.assertEqual(document.url_blob_id, hashlib.sha256(PDF).hexdigest())
+        self.assertEqual(document.url_blob.content_type, 'application/pdf')
+        self.assertTrue(response.json()['url'].endswith(f'/api/documents/{document.pk}/content/'))
+
+        second = self.client.post('/api/documents/', payload, format='json').json()
+        self.assertEqual(ProjectDocument.objects.get(pk=second['id']).url_blob_id, document.url_blob_id)
+        self.assertEqual(Blob.objects.count(), 1)
+
+        response = self.client.patch(f'/api/documents/{document.pk}/', {'url': response.json()['url']}, format='json')
+        self.assertEqual(response.status_code, 200)
+        document.refresh_from_db()
+        self.assertEqual((document.url, document.url_blob_id), ('', hashlib.sha256(PDF).hexdigest()))
+
+        response = self.client.patch(f'/api/documents/{document.pk}/', {'url': 'https://example.com/plan.pdf'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        document.refresh_from_db()
+        self.assertEqual((document.url, document.url_blob_id), ('https://example.com/plan.pdf', None))
+        self.assertEqual(response.json()['url'], 'https://example.com/plan.pdf')
+
+    def test_echoed_links_to_unmigrated_content_leave_the_column_alone(self):
+        document = self.project.documents.get()
+        ProjectDocument.objects.filter(pk=document.pk).update(url=PDF_DATA_URI, url_blob=None)
+        link = self.client.get(f'/api/documents/{document.pk}/').json()['url']
+        self.assertIsNone(blob_key_from_url(link))
+
+        response = self.client.patch(f'/api/documents/{document.pk}/', {'url': link, 'name': 'b.pdf'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        document.refresh_from_db()
+        self.assertEqual((document.url, document.url_blob_id, document.name), (PDF_DATA_URI, None, 'b.pdf'))
+        self.assertEqual((Blob.objects.count(), self.stored_files()), (0, []))
+
+        call_command('migrate_blobs', model=['api.ProjectDocument'], stdout=io.StringIO())
+        self.assertEqual(blob_key_from_url(link), hashlib.sha256(PDF).hexdigest())
+
+    def test_migrate_blobs_moves_data_uris_and_bare_base64_once(self):
+        documents = ProjectDocument.objects.filter(project=self.project)
+        documents.update(url=PDF_DATA_URI)
+        bare = documents.create(project=self.project, name='antiguo.pdf', url=base64.b64encode(PDF).decode())
+        link = documents.create(project=self.project, name='enlace.pdf', url='https://example.com/enlace.pdf')
+        template = DocumentTemplate.objects.get()
+        template.file_data = base64.b64encode(b'PK\x03\x04plantilla').decode()
+        template.save()
+
+        output = io.StringIO()
+        call_command('migrate_blobs', model=['api.ProjectDocument', 'api.DocumentTemplate'], stdout=output)
+        self.assertIn('api.ProjectDocument.url: done, 2 moved, 1 skipped.', output.getvalue())
+        self.assertIn('api.DocumentTemplate.file_data: done, 1 moved, 0 skipped.', output.getvalue())
+
+        key = hashlib.sha256(PDF).hexdigest()
+        self.assertEqual(set(documents.exclude(pk=link.pk).values_list('url', 'url_blob')), {('', key)})
+        bare.refresh_from_db()
+        self.assertEqual(bare.url_blob.content_type, 'application/pdf')
+        link.refresh_from_db()
+        self.assertEqual((link.url, link.url_blob_id), ('https://example.com/enlace.pdf', None))
+        template.refresh_from_db()
+        self.assertEqual(template.file_data_blob.content_type,
+                         'application/vnd.openxmlformats-officedocument.wordprocessingml.document')
+        self.assertEqual(read_blob_field(template, 'file_data'), b'PK\x03\x04plantilla')
+
+        output = io.StringIO()
+        call_command('migrate_blobs', model=['api.ProjectDocument', 'api.DocumentTemplate'], stdout=output)
+        self.assertIn('api.ProjectDocument.url: done, 0 moved, 1 skipped.', output.getvalue())
+        self.assertIn('api.DocumentTemplate.file_data: done, 0 moved, 0 skipped.', output.getvalue())
+        self.assertEqual(Blob.objects.count(), 2)
+
+
+@quiet_sql_stats
+class ContentRouteTests(APITestCase):
+    def setUp(self):
+        use_temporary_blob_store(self)
+        self.project = create_project_graph(0)
+        self.document = ProjectDocument.objects.get(project=self.project)
+        self.document.url_blob = put_bytes(PDF, 'application/pdf')
+        self.document.url = ''
+        self.document.save()
+        self.url = f'/api/documents/{self.document.pk}/content/'
+
+    def get(self, url, **headers):
+        response = self.client.get(url, **headers)
+        body = b''.join(response.streaming_content) if response.streaming else response.content
+        return response, body
+
+    def test_full_and_partial_content(self):
+        response, body = self.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(body, PDF)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertEqual(response['Content-Length'], str(len(PDF)))
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(response['ETag'], f'"{self.document.url_blob_id}"')
+
+        response, body = self.get(self.url, HTTP_RANGE='bytes=2-5')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(body, PDF[2:6])
+        self.assertEqual(response['Content-Range'], f'bytes 2-5/{len(PDF)}')
+        self.assertEqual(response['Content-Length'], '4')
+
+        response, body = self.get(self.url, HTTP_RANGE='bytes=-3')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(body, PDF[-3:])
+        self.assertEqual(response['Content-Range'], f'bytes {len(PDF) - 3}-{len(PDF) - 1}/{len(PDF)}')
+
+        response, body = self.get(self.url, HTTP_RANGE='bytes=10-1000')
+        self.assertEqual(response['Content-Range'], f'bytes 10-{len(PDF) - 1}/{len(PDF)}')
+        self.assertEqual(body, PDF[10:])
+
+    def test_unsatisfiable_range(self):
+        for header in (f'bytes={len(PDF)}-', 'bytes=5-2', 'bytes=-0', 'bytes=x-y'):
+            with self.subTest(header=header):
+                response, _ = self.get(self.url, HTTP_RANGE=header)
+                self.assertEqual(response.status_code, 416)
+                self.assertEqual(response['Content-Range'], f'bytes */{len(PDF)}')
+
+    def test_legacy_inline_values_are_served(self):
+        ProjectDocument.objects.filter(pk=self.document.pk).update(url=PDF_DATA_URI, url_blob=None)
+        response, body = self.get(self.url, HTTP_RANGE='bytes=0-3')
+        self.assertEqual((response.status_code, body), (206, PDF[:4]))
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+
+        ProjectDocument.objects.filter(pk=self.document.pk).update(url=base64.b64encode(PDF).decode())
+        response, body = self.get(self.url)
+        self.assertEqual((response.status_code, body), (200, PDF))
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertEqual(response['Content-Length'], str(len(PDF)))
+
+        ProjectDocument.objects.filter(pk=self.document.pk).update(url='https://example.com/plan.pdf')
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+    def test_lists_link_to_content_without_reading_payloads(self):
+        documents = ProjectDocument.objects.filter(pk=self.document.pk)
+        cases = [
+            (PDF_DATA_URI, f'/api/documents/{self.document.pk}/content/'),
+            (base64.b64encode(PDF).decode(), f'/api/documents/{self.document.pk}/content/'),
+            ('https://example.com/plan.pdf', 'https://example.com/plan.pdf'),
+            ('', ''),
+        ]
+        for value, expected in cases:
+            with self.subTest(value=value[:20]):
+                documents.update(url=value, url_blob=None)
+                with CaptureQueriesContext(connection) as queries:
+                    item = self.client.get('/api/documents/').json()['results'][0]
+                self.assertEqual(item['url'].replace('http://testserver', ''), expected)
+                sql = next(q['sql'] for q in queries.captured_queries if 'LIMIT' in q['sql'])
+                columns = sql.split(' CASE ')[0]
+                self.assertNotIn('"api_projectdocument"."url",', columns)
+
+
+@quiet_sql_stats
+class ListQueryTests(APITestCase):
+    def setUp(self):
+        self.projects = [create_project_graph(index) for index in range(5)]
+        for index, project in enumerate(self.projects):
+            project.start_date = datetime.date(2026, 1, 10 - index % 3)
+            project.company_status = ['INACTIVA', 'ACTIVA', 'TERMINADO'][index % 3]
+            project.save()
+
+    def ids(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, response.content)
+        return [item['id'] for item in response.json()['results']]
+
+    def walk(self, url):
+        pages = []
+        while url:
+            body = self.client.get(url).json()
+            pages.append([item['id'] for item in body['results']])
+            url = body['next']
+        return pages
+
+    def test_cursor_pages_cover_every_row_once(self):
+        ids = sorted((project.pk for project in self.projects), reverse=True)
+        pages = self.walk('/api/projects/?page_size=2&fields=id')
+        self.assertEqual(pages, [ids[0:2], ids[2:4], ids[4:]])
+
+        body = self.client.get('/api/projects/?page_size=2&fields=id').json()
+        second = self.client.get(body['next']).json()
+        self.assertIn('fields=id', body['next'])
+        self.assertEqual([item['id'] for item in self.client.get(second['previous']).json()['results']], ids[0:2])
+
+    def test_filters_accept_camel_and_snake_case(self):
+        active = [project.pk for project in self.projects if project.company_status == 'ACTIVA']
+        for query in ('companyStatus=ACTIVA', 'company_status=ACTIVA'):
+            with self.subTest(query=query):
+                self.assertEqual(sorted(self.ids(f'/api/projects/?{query}')), sorted(active))
+
+        expected = sorted(p.pk for p in self.projects if p.company_status in ('ACTIVA', 'TERMINADO'))
+        self.assertEqual(sorted(self.ids('/api/projects/?companyStatus=ACTIVA,TERMINADO')), expected)
+        self.assertEqual(self.ids(f'/api/projects/?workCenter={self.projects[2].work_center_id}'), [self.projects[2].pk])
+
+        on_or_after_9 = sorted(p.pk for p in self.projects if p.start_date >= datetime.date(2026, 1, 9))
+        for query in ('startDateFrom=2026-01-09', 'start_date_from=2026-01-09'):
+            with self.subTest(query=query):
+                self.assertEqual(sorted(self.ids(f'/api/projects/?{query}')), on_or_after_9)
+        self.assertEqual(self.ids('/api/projects/?startDateFrom=2026-01-09&startDateTo=2026-01-09'),
+                         sorted((p.pk for p in self.projects if p.start_date == datetime.date(2026, 1, 9)), reverse=True))
+
+        today = timezone.localdate().isoformat()
+        self.assertEqual(len(self.ids(f'/api/projects/?createdAtFrom={today}&createdAtTo={today}')), 5)
+        self.assertEqual(self.ids(f'/api/projects/?createdAtFrom={today}T23:59:59Z'), [])
+
+    def test_invalid_filter_values(self):
+        response = self.client.get('/api/projects/?startDateFrom=ayer')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('startDateFrom', response.json())
+        self.assertEqual(self.client.get('/api/projects/?contract=abc').status_code, 400)
+        self.assertEqual(self.client.get('/api/projects/?companyStatus=').status_code, 200)
+
+    def test_ordering(self):
+        by_start = sorted(self.projects, key=lambda p: (p.start_date, p.pk))
+        for query in ('ordering=startDate', 'ordering=start_date'):
+            with self.subTest(query=query):
+                pages = self.walk(f'/api/projects/?{query}&page_size=2')
+                self.assertEqual(sum(pages, []), [p.pk for p in by_start])
+
+        by_start_desc = sorted(self.projects, key=lambda p: (p.start_date, p.pk), reverse=True)
+        self.assertEqual(self.ids('/api/projects/?ordering=-startDate'), [p.pk for p in by_start_desc])
+        # Fields outside ``ordering_fields`` are ignored.
+        self.assertEqual(self.ids('/api/projects/?ordering=description'), sorted((p.pk for p in self.projects), reverse=True))
+
+
+@quiet_sql_stats
+class ListQueryCountTests(APITestCase):
+    # Queries issued by one list request. These must not grow with the row count.
+    # The first query of each is the ETag version check (max(updated_at), count),
+    # which expanded responses skip.
+    expected_queries = {
+        '/api/users/': 2,
+        '/api/companies/': 3,
+        '/api/contacts/': 2,
+        '/api/contracts/': 2,
+        '/api/workcenters/': 2,
+        '/api/projects/': 4,
+        '/api/projects/?expand=contract,workCenter,manager,companies,contacts': 5,
+        '/api/projects/?fields=id,code,description,companyStatus': 2,
+        '/api/documents/': 2,
+        '/api/meetings/': 5,
+        '/api/meeting-documents/': 2,
+        '/api/templates/': 2,
+        '/api/follow-up-meetings/': 5,
+        '/api/follow-up-meetings/?fields=id,date,config,workCenterIds': 3,
+        '/api/follow-up-configs/': 2,
+    }
+
+    def assert_query_counts(self):
+        for url, expected in self.expected_queries.items():
+            with self.subTest(url=url), self.assertNumQueries(expected):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+
+    def test_list_query_counts_do_not_depend_on_row_count(self):
+        create_project_graph(0)
+        self.assert_query_counts()
+
+        for index in range(1, 6):
+            create_project_graph(index)
+        self.assert_query_counts()
+
+
+@quiet_sql_stats
+class SparseFieldsetTests(APITestCase):
+    def setUp(self):
+        self.project = create_project_graph(0)
+
+    def test_nested_objects_are_opt_in(self):
+        item = self.client.get('/api/projects/').json()['results'][0]
+        self.assertNotIn('contract', item)
+        self.assertNotIn('companies', item)
+        self.assertEqual(item['companyIds'], [self.project.companies.get().pk])
+
+        item = self.client.get('/api/projects/?expand=contract,companies').json()['results'][0]
+        self.assertEqual(item['contract']['code'], 'C-0')
+        self.assertEqual(len(item['companies'][0]['contacts']), 2)
+        self.assertNotIn('manager', item)
+
+    def test_fields_restricts_payload_and_columns(self):
+        with self.assertNumQueries(2) as queries:
+            response = self.client.get(f'/api/projects/{self.project.pk}/?fields=id,code,companyStatus')
+        self.assertEqual(response.json(), {'id': self.project.pk, 'code': 'P-0', 'companyStatus': 'INACTIVA'})
+        self.assertNotIn('"description"', queries.captured_queries[-1]['sql'])
+
+        item = self.client.get('/api/meetings/?fields=id,documentData').json()['results'][0]
+        self.assertEqual(set(item), {'id', 'documentData'})
+
+    def test_writes_ignore_fields(self):
+        response = self.client.patch(f'/api/projects/{self.project.pk}/?fields=id', {'code': 'P-X'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['code'], 'P-X')
+
+
+def docx_data_uri(*paragraphs):
+    document = Document()
+    for text in paragraphs:
+        document.add_paragraph(text)
+    output = io.BytesIO()
+    document.save(output)
+    return 'data:application/vnd.openxmlformats-officedocument.wordprocessingml.document;base64,' + base64.b64encode(output.getvalue()).decode()
+
+
+class DocxTemplateTests(TestCase):
+    def setUp(self):
+        template_cache.clear()
+        self.addCleanup(template_cache.clear)
+
+    def test_split_placeholders_render_like_the_previous_engine(self):
+        source = build_acta_template(sections=3, table_rows=4)
+        compiled = CompiledTemplate(source)
+        rendered = document_text(compiled.render(REPLACEMENTS))
+
+        self.assertEqual(rendered, document_text(legacy_render(source, REPLACEMENTS)))
+        self.assertIn('Fecha: 17/10/2026', rendered)
+        self.assertIn('Acta de seguimiento nº 4', rendered)
+        self.assertIn('Embalse de la Concepción, Oficina Málaga', rendered)
+        # Unknown placeholders are left as they are.
+        self.assertIn('{tablaFirmas}', rendered)
+        # Each render starts from the compiled document, not the previous render.
+        self.assertIn('Hora: 09:00', document_text(compiled.render({**REPLACEMENTS, '{horaReunion}': '09:00'})))
+
+    def test_cache_evicts_least_recently_used_over_budget(self):
+        compiled = [CompiledTemplate(base64.b64decode(docx_data_uri(f'Plantilla {n} {{lugar}}').split(',')[1])) for n in range(3)]
+        # Room for two of them: DOCX_TEMPLATE_CACHE_BYTES is the budget of the process-wide instance.
+        lru = TemplateCache(compiled[0].size + compiled[1].size + compiled[2].size // 2)
+        lru.put((1, 'v1'), compiled[0])
+        lru.put((2, 'v1'), compiled[1])
+        self.assertIs(lru.get((1, 'v1')), compiled[0])
+
+        lru.put((3, 'v1'), compiled[2])
+        self.assertIsNone(lru.get((2, 'v1')))
+        self.assertIs(lru.get((1, 'v1')), compiled[0])
+        self.assertIs(lru.get((3, 'v1')), compiled[2])
+
+        small = TemplateCache(compiled[0].size - 1)
+        small.put((1, 'v1'), compiled[0])
+        self.assertIsNone(small.get((1, 'v1')))
+
+    def test_saving_or_deleting_a_template_invalidates_it(self):
+        template = DocumentTemplate.objects.create(
+            name='Acta', category='Acta Seguimiento', file_data=docx_data_uri('Reunión en {lugar}'), file_name='acta.docx',
+        )
+        first = get_compiled_template(template)
+        old_key = (template.pk, template.updated_at)
+        self.assertIs(template_cache.get(old_key), first)
+        self.assertIs(get_compiled_template(DocumentTemplate.objects.get(pk=template.pk)), first)
+
+        template.file_data = docx_data_uri('Nueva reunión en {lugar}')
+        template.save()
+        self.assertIsNone(template_cache.get(old_key))
+        second = get_compiled_template(template)
+        self.assertEqual(document_text(second.render({'{lugar}': 'Málaga'}))[0], 'Nueva reunión en Málaga')
+
+        key = (template.pk, template.updated_at)
+        template.delete()
+        self.assertIsNone(template_cache.get(key))
+
+
+@quiet_sql_stats
+class JobQueueTests(APITestCase):
+    def register(self, kind, func):
+        job_handler(kind)(func)
+        self.addCleanup(jobs._handlers.pop, kind, None)
+
+    def run_failing(self):
+        with self.assertLogs('api.jobs', 'ERROR'):
+            return run_job(claim_next())
+
+    def test_claim_takes_the_oldest_due_job_once(self):
+        self.register('prueba', lambda job: {'ok': True})
+        later = Job.objects.create(kind='prueba', run_after=timezone.now() + datetime.timedelta(minutes=5))
+        due = enqueue('prueba')
+
+        job = claim_next(worker='w1')
+        self.assertEqual(job.pk, due.pk)
+        self.assertEqual((job.status, job.attempts, job.locked_by), (jobs.RUNNING, 1, 'w1'))
+        self.assertIsNone(claim_next(worker='w2'))
+
+        run_job(job)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.progress, job.result), (jobs.DONE, 100, {'ok': True}))
+        self.assertIsNone(job.locked_by)
+        self.assertIsNotNone(job.finished_at)
+        self.assertEqual(Job.objects.get(pk=later.pk).status, jobs.PENDING)
+        with self.assertRaises(ValueError):
+            enqueue('desconocida')
+
+    def test_failures_back_off_until_max_attempts(self):
+        def busy(job):
+            raise RuntimeError("Servidor ocupado")
+        self.register('prueba', busy)
+        job = enqueue('prueba')
+
+        for attempt, delay in enumerate(jobs.RETRY_DELAYS[:job.max_attempts - 1], start=1):
+            before = timezone.now()
+            self.run_failing()
+            job.refresh_from_db()
+            self.assertEqual((job.status, job.attempts), (jobs.PENDING, attempt))
+            self.assertIn("Servidor ocupado", job.error)
+            self.assertIsNone(job.locked_at)
+            self.assertGreaterEqual(job.run_after, before + datetime.timedelta(seconds=delay))
+            self.assertLess(job.run_after, timezone.now() + datetime.timedelta(seconds=delay))
+            # Not due yet.
+            self.assertIsNone(claim_next())
+            Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+
+        self.run_failing()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (jobs.FAILED, job.max_attempts))
+        self.assertIsNotNone(job.finished_at)
+        self.assertIsNone(claim_next())
+
+    def test_job_error_fails_at_once(self):
+        def missing(job):
+            raise JobError("Plantilla no encontrada")
+        self.register('prueba', missing)
+        job = enqueue('prueba')
+
+        self.run_failing()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (jobs.FAILED, 1))
+        self.assertIn("Plantilla no encontrada", job.error)
+
+    def test_stale_locks_are_requeued_or_failed(self):
+        self.register('prueba', lambda job: None)
+        stale = timezone.now() - datetime.timedelta(minutes=20)
+        retry = Job.objects.create(kind='prueba', status=jobs.RUNNING, attempts=1, locked_by='w1', locked_at=stale)
+        exhausted = Job.objects.create(kind='prueba', status=jobs.RUNNING, attempts=3, locked_by='w1', locked_at=stale)
+        fresh = Job.objects.create(kind='prueba', status=jobs.RUNNING, attempts=1, locked_by='w2', locked_at=timezone.now())
+
+        self.assertEqual(requeue_stale(timeout=15 * 60), 1)
+        retry.refresh_from_db()
+        exhausted.refresh_from_db()
+        fresh.refresh_from_db()
+        self.assertEqual((retry.status, retry.locked_by), (jobs.PENDING, None))
+        self.assertEqual((exhausted.status, exhausted.locked_by), (jobs.FAILED, None))
+        self.assertIsNotNone(exhausted.finished_at)
+        self.assertEqual((fresh.status, fresh.locked_by), (jobs.RUNNING, 'w2'))
+        self.assertEqual(claim_next().pk, retry.pk)
+
+    def test_progress_keeps_the_lock_and_requeued_jobs_finish_once(self):
+        self.register('prueba', lambda job: {'worker': job.locked_by})
+        job = enqueue('prueba')
+        first = claim_next(worker='w1')
+        stale = timezone.now() - datetime.timedelta(minutes=20)
+
+        # A job reporting progress is still alive.
+        Job.objects.filter(pk=job.pk).update(locked_at=stale)
+        set_progress(first, 50)
+        self.assertEqual(requeue_stale(timeout=15 * 60), 0)
+
+        # One that stopped reporting goes to another worker; the first one's outcome is dropped.
+        Job.objects.filter(pk=job.pk).update(locked_at=stale)
+        self.assertEqual(requeue_stale(timeout=15 * 60), 1)
+        second = claim_next(worker='w2')
+        with self.assertLogs('api.jobs', 'WARNING'):
+            run_job(first)
+        set_progress(first, 90)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.locked_by, job.attempts, job.progress), (jobs.RUNNING, 'w2', 2, 50))
+
+        run_job(second)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.result, job.locked_by), (jobs.DONE, {'worker': 'w2'}, None))
+
+    def test_finished_jobs_are_pruned(self):
+        self.register('prueba', lambda job: None)
+        old = timezone.now() - datetime.timedelta(days=8)
+        expired = [Job.objects.create(kind='prueba', status=status, finished_at=old) for status in (jobs.DONE, jobs.FAILED)]
+        recent = Job.objects.create(kind='prueba', status=jobs.DONE, finished_at=timezone.now())
+        pending = Job.objects.create(kind='prueba')
+
+        self.assertEqual(prune_finished(7 * 24 * 3600), len(expired))
+        self.assertEqual(set(Job.objects.values_list('pk', flat=True)), {recent.pk, pending.pk})
+
+    def test_generate_acta_answers_202_and_the_job_reports_the_result(self):
+        use_temporary_blob_store(self)
+        template_cache.clear()
+        self.addCleanup(template_cache.clear)
+        project = create_project_graph(0)
+        follow_up = FollowUpMeeting.objects.get(contract=project.contract)
+        FollowUpMeeting.objects.filter(pk=follow_up.pk).update(location='Oficina')
+        url = f'/api/follow-up-meetings/{follow_up.pk}/generate_acta/'
+
+        self.assertEqual(self.client.post(url).status_code, 404)
+        DocumentTemplate.objects.create(
+            name='Acta', category='Acta Seguimiento', file_data=docx_data_uri('Reunión en {lugar}'), file_name='acta.docx',
+        )
+        response = self.client.post(url)
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()['status'], jobs.PENDING)
+        self.assertEqual(self.client.get(response['Location']).json()['status'], jobs.PENDING)
+
+        run_job(claim_next())
+        job = self.client.get(response['Location']).json()
+        self.assertEqual((job['status'], job['progress'], job['attempts']), (jobs.DONE, 100, 1))
+        self.assertTrue(job['resultUrl'].endswith(f'/api/follow-up-meetings/{follow_up.pk}/content/'))
+        content = b''.join(self.client.get(job['resultUrl']).streaming_content)
+        self.assertEqual(document_text(Document(io.BytesIO(content)))[0], 'Reunión en Oficina')
+
+
+@quiet_sql_stats
+class ActaBatchTests(APITestCase):
+    def setUp(self):
+        use_temporary_blob_store(self)
+        template_cache.clear()
+        self.addCleanup(template_cache.clear)
+        for index in range(3):
+            create_project_graph(index)
+        self.meetings = list(FollowUpMeeting.objects.order_by('id'))
+        FollowUpMeeting.objects.update(updated_at=datetime.datetime(2020, 1, 1, tzinfo=datetime.timezone.utc))
+        FollowUpMeetingConfig.objects.update(otros_temas='Ninguno')
+        DocumentTemplate.objects.create(
+            name='Acta', category='Acta Seguimiento', file_data=docx_data_uri('Temas: {temas}'), file_name='acta.docx',
+        )
+
+    def acta_text(self, meeting):
+        return document_text(Document(io.BytesIO(read_blob_field(meeting, 'document_data'))))[0]
+
+    @override_settings(ACTA_BATCH_WORKERS=1)
+    def test_batch_job_stores_every_acta_that_renders(self):
+        broken = self.meetings[1]
+        # A pasted control character cannot be written to the DOCX XML.
+        FollowUpMeetingConfig.objects.filter(meeting=broken).update(otros_temas='Ninguno\x01')
+
+        response = self.client.post('/api/follow-up-meetings/generate_actas/', {'dateFrom': '2026-01-01'}, format='json')
+        self.assertEqual(response.status_code, 202)
+        with CaptureQueriesContext(connection) as queries, self.assertLogs('api.actas_batch', 'WARNING'):
+            run_job(claim_next())
+        # Both stored actas are written back with one statement.
+        updates = [q['sql'] for q in queries.captured_queries if q['sql'].startswith('UPDATE "api_followupmeeting"')]
+        self.assertEqual(len(updates), 1)
+
+        job = self.client.get(response['Location']).json()
+        self.assertEqual(job['status'], jobs.DONE)
+        self.assertEqual((job['result']['count'], job['result']['workers']), (2, 1))
+        self.assertEqual([failure['id'] for failure in job['result']['failed']], [broken.pk])
+        self.assertIn('XML compatible', job['result']['failed'][0]['error'])
+
+        for meeting in FollowUpMeeting.objects.order_by('id'):
+            if meeting.pk == broken.pk:
+                self.assertIsNone(meeting.document_data_blob_id)
+                self.assertEqual(meeting.updated_at.year, 2020)
+            else:
+                self.assertIn(meeting.document_data, ('', None))
+                self.assertGreater(meeting.updated_at.year, 2020)
+                self.assertEqual(self.acta_text(meeting), 'Temas: Ninguno')
+
+    def test_pool_renders_the_same_actas(self):
+        report = generate_follow_up_actas(follow_up_meetings_for(date_from='2026-01-01'), workers=2)
+        self.assertEqual((report['count'], report['workers'], report['failed']), (3, 2, []))
+        pooled = {meeting.pk: read_blob_field(meeting, 'document_data') for meeting in FollowUpMeeting.objects.all()}
+
+        out = io.StringIO()
+        call_command('generate_actas', '--from', '2026-01-01', '--workers', '1', stdout=out)
+        self.assertIn('Actas:      3', out.getvalue())
+        self.assertIn('Failed:     0', out.getvalue())
+        for meeting in FollowUpMeeting.objects.all():
+            self.assertEqual(self.acta_text(meeting), 'Temas: Ninguno')
+            self.assertEqual(meeting.document_data_blob_id, hashlib.sha256(pooled[meeting.pk]).hexdigest())
+
+
+class CamelCaseJSONTests(SimpleTestCase):
+    def test_output_matches_stock_renderer(self):
+        documents = [
+            {'follow_up_meeting': {'is_notified': True, 'work_center_ids': [1, 2], 'config': None}},
+            {'created_at': datetime.datetime(2026, 10, 17, 10, 30, 0, 123456, tzinfo=datetime.timezone.utc),
+             'date': datetime.date(2026, 10, 17), 'time': datetime.time(10, 30)},
+            {'amount': decimal.Decimal('1e20'), 'ratio': 0.1, 'tiny': 1e-7, 'huge': 1e16, 'big': 2 ** 70},
+            {'text': 'Málaga \u2028 "línea" \\ \x00\t', 'keys': {1: 'a', 'a_1': 'b', 'x_y_z': ('t', 'u')}},
+            ['plain', {'nested_list': [{'deep_key': None}]}],
+        ]
+        for data in documents:
+            with self.subTest(data=data):
+                self.assertEqual(CamelCaseORJSONRenderer().render(data), CamelCaseJSONRenderer().render(data))
+
+        indented = 'application/json; indent=2'
+        self.assertEqual(
+            CamelCaseORJSONRenderer().render(documents[0], indented),
+            CamelCaseJSONRenderer().render(documents[0], indented),
+        )
+
+    def test_parser_matches_stock_parser(self):
+        body = '{"isNotified": true, "workCenterIds": [1], "config": {"numeroReunion": 3, "a1B": NaN}, "n": 12345678901234567890123}'
+        self.assertEqual(
+            repr(CamelCaseORJSONParser().parse(io.BytesIO(body.encode()))),
+            repr(CamelCaseJSONParser().parse(io.BytesIO(body.encode()))),
+        )
+
+
+@quiet_sql_stats
+@override_settings(METRICS_TOKEN='secreto')
+class MetricsTests(APITestCase):
+    def sample(self, body, name, **labels):
+        selector = ",".join(f'{key}="{value}"' for key, value in labels.items())
+        prefix = f"{name}{{{selector}}} " if labels else f"{name} "
+        for line in body.splitlines():
+            if line.startswith(prefix):
+                return float(line[len(prefix):])
+        return 0.0
+
+    def scrape(self):
+        response = self.client.get('/api/metrics/', HTTP_AUTHORIZATION='Bearer secreto')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        return response.content.decode()
+
+    def test_request_metrics_per_route(self):
+        create_project_graph(0)
+        before = self.scrape()
+        self.client.get('/api/projects/')
+        self.client.get('/api/projects/')
+        after = self.scrape()
+
+        labels = {'method': 'GET', 'route': 'project-list'}
+        count = 'cae_http_request_duration_seconds_count'
+        self.assertEqual(self.sample(after, count, **labels, status=200) - self.sample(before, count, **labels, status=200), 2)
+        queries = self.sample(after, 'cae_http_request_db_queries_sum', **labels) - self.sample(before, 'cae_http_request_db_queries_sum', **labels)
+        self.assertEqual(queries, 8)
+        self.assertGreater(self.sample(after, 'cae_http_response_bytes_sum', **labels), 0)
+        self.assertNotIn('route="metrics"', after)
+
+    def test_rejected_actions_are_counted(self):
+        project = create_project_graph(0)
+        meeting = project.meetings.get()
+        meeting.notification_contacts.clear()
+        project.main_contact = None
+        project.save()
+
+        before = self.sample(self.scrape(), 'cae_request_failures_total', action='notify')
+        self.assertEqual(self.client.post(f'/api/meetings/{meeting.pk}/notify/').status_code, 400)
+        self.assertEqual(self.sample(self.scrape(), 'cae_request_failures_total', action='notify') - before, 1)
+
+    def test_token(self):
+        self.assertEqual(self.client.get('/api/metrics/').status_code, 403)
+        self.assertEqual(self.client.get('/api/metrics/', HTTP_AUTHORIZATION='Bearer otro').status_code, 403)
+        self.assertEqual(self.client.get('/api/metrics/', HTTP_AUTHORIZATION='Bearer secreto').status_code, 200)
+
+        with override_settings(METRICS_TOKEN=''):
+            self.assertEqual(self.client.get('/api/metrics/').status_code, 403)
+            with override_settings(DEBUG=True):
+                self.assertEqual(self.client.get('/api/metrics/').status_code, 200)
+
+
+class ProfilerTests(APITestCase):
+    def setUp(self):
+        create_project_graph(0)
+        self.staff = User.objects.create_user(email='staff@example.com', password='x', is_staff=True)
+
+    def test_only_staff_get_a_report(self):
+        response = self.client.get('/api/projects/?profile=1')
+        self.assertEqual(response['Content-Type'], 'application/json')
+
+        self.client.force_login(User.objects.get(email='user0@example.com'))
+        response = self.client.get('/api/projects/?profile=1')
+        self.assertEqual(response['Content-Type'], 'application/json')
+
+    def test_report_with_jwt_and_storage(self):
+        token = self.client.post('/api/token/', {'email': 'staff@example.com', 'password': 'x'}, format='json').json()['access']
+        with tempfile.TemporaryDirectory() as directory, self.settings(PROFILE_DIR=directory):
+            response = self.client.get('/api/projects/', HTTP_AUTHORIZATION=f'Bearer {token}', HTTP_X_PROFILE='1')
+            self.assertEqual(sorted(os.listdir(directory)), [response['X-Profile-File'] + '.prof', response['X-Profile-File'] + '.txt'])
+
+        report = response.content.decode()
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        self.assertEqual(response['X-Profiled-Status'], '200')
+        # The user looked up by the middleware is reused by the view.
+        self.assertIn('SQL: 4 queries', report)
+        self.assertIn('FROM "api_project"', report)
+        self.assertIn('== Call tree', report)
+
+
+@quiet_sql_stats
+class CachedAuthenticationTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='tecnico@example.com', password='x', name='Técnico')
+        token = self.client.post('/api/token/', {'email': 'tecnico@example.com', 'password': 'x'}, format='json').json()['access']
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def user_lookups(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get('/api/contracts/').status_code, 200)
+        return sum('FROM "api_user"' in query['sql'] for query in queries.captured_queries)
+
+    def test_user_is_loaded_once(self):
+        self.assertEqual(self.user_lookups(), 1)
+        self.assertEqual(self.user_lookups(), 0)
+
+    def test_saving_the_user_invalidates_the_cache(self):
+        self.user_lookups()
+        self.user.set_password('y')
+        self.user.save()
+        self.assertEqual(self.user_lookups(), 1)
+
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get('/api/contracts/').status_code, 401)
+
+    def test_deleting_the_user_invalidates_the_cache(self):
+        self.user_lookups()
+        self.user.delete()
+        self.assertEqual(self.client.get('/api/contracts/').status_code, 401)
+
+
+class SqlStatsTests(APITestCase):
+    def test_fingerprint_folds_literals_and_lists(self):
+        first = normalise('SELECT "a"."id" FROM "a" WHERE "a"."id" IN (%s, %s, %s) AND "a"."name" = \'x\' LIMIT 21')
+        second = normalise('SELECT  "a"."id" FROM "a"\nWHERE "a"."id" IN (%s) AND "a"."name" = \'y\' LIMIT 101')
+        self.assertEqual(first, second)
+        self.assertEqual(first[1], 'SELECT "a"."id" FROM "a" WHERE "a"."id" IN (...) AND "a"."name" = ? LIMIT ?')
+
+    def run_queued(self, kind):
+        statuses = [run_job(claim_next()).status for _ in Job.objects.filter(kind=kind)]
+        # Internal jobs leave no row behind once they succeed.
+        self.assertFalse(Job.objects.filter(kind=kind, status=jobs.DONE).exists())
+        return statuses.count(jobs.DONE)
+
+    @override_settings(SQL_STATS_FLUSH_SECONDS=0)
+    def test_totals_per_view(self):
+        create_project_graph(0)
+        flush()
+        SqlFingerprint.objects.all().delete()
+        self.client.get('/api/projects/')
+        self.client.get('/api/projects/')
+
+        # Requests only queue their totals.
+        self.assertFalse(SqlFingerprint.objects.exists())
+        self.assertEqual(self.run_queued(SQL_STATS_JOB), 2)
+        rows = SqlFingerprint.objects.filter(view='project-list')
+        self.assertEqual(rows.count(), 4)
+        self.assertEqual({row.calls for row in rows}, {2})
+        self.assertTrue(rows.filter(sql__startswith='SELECT MAX("api_project"."updated_at")').exists())
+
+        # Those jobs are the app's bookkeeping, not something /api/jobs/ lists.
+        self.assertEqual(self.client.get('/api/jobs/').json()['results'], [])
+        queued = Job.objects.get(kind=SQL_STATS_JOB)
+        self.assertEqual(self.client.get(f'/api/jobs/{queued.pk}/').status_code, 404)
+
+    @override_settings(SQL_SLOW_QUERY_MS=0, SQL_EXPLAIN_SLOW_QUERIES=True)
+    def test_slow_queries_are_explained_by_a_worker(self):
+        create_project_graph(0)
+        sqlstats._explained.clear()
+        self.addCleanup(sqlstats._explained.clear)
+        with self.assertLogs('api.sql', 'WARNING'):
+            self.client.get('/api/projects/')
+
+        # The slowest statement, with its parameters inlined.
+        queued = Job.objects.get(kind=SQL_EXPLAIN_JOB)
+        self.assertTrue(queued.payload['sql'].startswith('SELECT'))
+        self.assertNotIn('%s', queued.payload['sql'])
+        self.assertFalse(SqlFingerprint.objects.exclude(explain=None).exists())
+
+        with self.assertLogs('api.sql', 'WARNING'):
+            self.assertEqual(self.run_queued(SQL_EXPLAIN_JOB), 1)
+        row = SqlFingerprint.objects.get(fingerprint=queued.payload['fingerprint'], view='project-list')
+        self.assertIn('Execution Time', row.explain)
+        self.assertIsNotNone(row.explained_at)
+
+    def test_explain(self):
+        plan = explain(connection, 'SELECT "id" FROM "api_project" WHERE "id" = %s', [1])
+        self.assertIn('Execution Time', plan)
+        self.assertIn('Buffers', plan)
+
+
+def plan_index_names(sql):
+    """Names of the indexes PostgreSQL's plan for ``sql`` reads."""
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}")
+        plan = cursor.fetchone()[0]
+    names = set()
+    nodes = [plan[0]['Plan']]
+    while nodes:
+        node = nodes.pop()
+        if 'Index Name' in node:
+            names.add(node['Index Name'])
+        nodes.extend(node.get('Plans', ()))
+    return names
+
+
+@quiet_sql_stats
+class IndexPlanTests(APITestCase):
+    """
+    Seeds enough rows for the planner to prefer indexes, then checks that the
+    hot list filters and the template lookup are served by the indexes built
+    for them. A dropped or mismatched index shows up here as a sequential scan.
+    """
+    rows = 30000
+    # Templates are narrow rows: a sequential scan stays cheaper for longer.
+    template_rows = 100000
+
+    @classmethod
+    def setUpTestData(cls):
+        day = datetime.date(2024, 1, 1)
+        user = User.objects.create_user(email='planner@example.com', password='x')
+        work_center = WorkCenter.objects.create(
+            name='Centro', type='OFICINA', address='Calle 1', zip_code='29001', phone='900000000', province='MÁLAGA',
+        )
+        contracts = Contract.objects.bulk_create(
+            Contract(code=f'C-{n}', description='Contrato', start_date=day, end_date=day,
+                     client_name='Cliente', amount=1000, coordinator=user)
+            for n in range(200)
+        )
+        projects = Project.objects.bulk_create(
+            Project(contract=contracts[n % 200], code=f'P-{n}', description='Obra', start_date=day, end_date=day,
+                    work_center=work_center, manager=user, fecha_solicitud=day)
+            for n in range(500)
+        )
+        statuses = ['BORRADOR', 'PRESENTADO', 'ACEPTADO', 'RECHAZADO']
+        ProjectDocument.objects.bulk_create(
+            ProjectDocument(project=projects[n % 500], name='doc.pdf', url='', status=statuses[n % 4],
+                            category=f'Categoría {n % 10}', uploaded_by=user)
+            for n in range(cls.rows)
+        )
+        meeting_statuses = ['PROGRAMADA', 'EN_CURSO', 'REALIZADA', 'CANCELADA']
+        Meeting.objects.bulk_create(
+            Meeting(project=projects[n % 500], start_date=day + datetime.timedelta(days=n % 1000),
+                    end_date=day, time=datetime.time(10, 0), reason='Reunión', location='Oficina',
+                    type='PRESENCIAL', status=meeting_statuses[n % 4])
+            for n in range(cls.rows)
+        )
+        FollowUpMeeting.objects.bulk_create(
+            FollowUpMeeting(contract=contracts[n % 200], reason='Seguimiento', time=datetime.time(10, 0),
+                            date=day + datetime.timedelta(days=n % 1000), type='PRESENCIAL')
+            for n in range(cls.rows)
+        )
+        DocumentTemplate.objects.bulk_create(
+            DocumentTemplate(name=f'Plantilla {n}', category=f'Otros {n}', file_data='', file_name='t.docx')
+            for n in range(cls.template_rows)
+        )
+        DocumentTemplate.objects.create(name='Acta', category='Acta Seguimiento', file_data='x', file_name='a.docx')
+
+        cls.project = projects[7]
+        cls.contract = contracts[3]
+        with connection.cursor() as cursor:
+            for model in (ProjectDocument, Meeting, FollowUpMeeting, DocumentTemplate):
+                cursor.execute(f'ANALYZE "{model._meta.db_table}"')
+
+    def page_query(self, url, table):
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        return next(q['sql'] for q in queries.captured_queries if f'FROM "{table}"' in q['sql'] and 'LIMIT' in q['sql'])
+
+    def test_list_filters_use_their_indexes(self):
+        cases = [
+            (f'/api/documents/?project={self.project.pk}&status=ACEPTADO', 'api_projectdocument',
+             'api_doc_project_status_cat_idx'),
+            (f'/api/meetings/?project={self.project.pk}&start_date_from=2024-03-01', 'api_meeting',
+             'api_meeting_project_start_idx'),
+            ('/api/meetings/?status=PROGRAMADA&start_date_from=2024-03-01&start_date_to=2024-03-10&ordering=start_date',
+             'api_meeting', 'api_meeting_status_start_idx'),
+            (f'/api/follow-up-meetings/?contract={self.contract.pk}&date_from=2024-01-01&date_to=2024-06-30',
+             'api_followupmeeting', 'api_followup_contract_date_idx'),
+            ('/api/follow-up-meetings/', 'api_followupmeeting', 'api_followup_created_idx'),
+        ]
+        for url, table, index in cases:
+            with self.subTest(url=url):
+                self.assertIn(index, plan_index_names(self.page_query(url, table)))
+
+    def test_calendar_range_uses_the_date_indexes(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/calendar/?from=2024-03-01&to=2024-03-07')
+        self.assertEqual(len(response.json()['events']), 420)
+        for table, index in (('api_meeting', 'api_meeting_start_idx'), ('api_followupmeeting', 'api_followup_date_idx')):
+            with self.subTest(table=table):
+                sql = next(q['sql'] for q in queries.captured_queries if f'FROM "{table}"' in q['sql'])
+                self.assertIn(index, plan_index_names(sql))
+
+    def test_template_icontains_uses_trigram_index(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(find_follow_up_template().category, 'Acta Seguimiento')
+        # One row, read through the trigram index rather than by walking the primary key.
+        self.assertTrue(queries.captured_queries[0]['sql'].endswith('LIMIT 1'))
+        self.assertIn('api_template_category_trgm_idx', plan_index_names(queries.captured_queries[0]['sql']))
+
+
+class FakeSMTPHandler(socketserver.StreamRequestHandler):
+    """Just enough SMTP for ``smtplib``: no TLS, no auth, every message accepted."""
+
+    def reply(self, line):
+        self.wfile.write(line.encode() + b"\r\n")
+
+    def handle(self):
+        self.server.connections += 1
+        self.reply("220 fake ESMTP")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode().strip().split(" ", 1)[0].upper()
+            if command in ("EHLO", "HELO"):
+                self.reply("250 fake")
+            elif command == "DATA":
+                self.reply("354 go ahead")
+                while self.rfile.readline() not in (b".\r\n", b""):
+                    pass
+                self.server.messages += 1
+                self.reply("250 queued")
+            elif command == "QUIT":
+                self.reply("221 bye")
+                return
+            else:
+                self.reply("250 ok")
+
+
+class FakeSMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), FakeSMTPHandler)
+        self.connections = 0
+        self.messages = 0
+
+
+class EmailOutboxTests(TestCase):
+    def setUp(self):
+        self.smtp = FakeSMTPServer()
+        threading.Thread(target=self.smtp.serve_forever, daemon=True).start()
+        self.addCleanup(self.smtp.server_close)
+        self.addCleanup(self.smtp.shutdown)
+        settings_override = override_settings(
+            EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend',
+            EMAIL_HOST='127.0.0.1', EMAIL_PORT=self.smtp.server_address[1],
+            EMAIL_USE_TLS=False, EMAIL_HOST_USER='', EMAIL_HOST_PASSWORD='',
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_batch_reuses_one_connection(self):
+        project = create_project_graph(0)
+        meeting = project.meetings.get()
+        count = 200
+        for n in range(count):
+            queue_email(f"Convocatoria {n}", "Cuerpo", [f"to{n}@example.com"], source=meeting)
+
+        sent, failed = send_pending(batch_size=count)
+
+        self.assertEqual((sent, failed), (count, 0))
+        self.assertEqual(self.smtp.messages, count)
+        self.assertEqual(self.smtp.connections, 1)
+        self.assertFalse(EmailOutbox.objects.exclude(status='ENVIADO').exists())
+        meeting.refresh_from_db()
+        self.assertTrue(meeting.is_notified)
+
+    def test_unreachable_server_schedules_retry(self):
+        outbox = queue_email("Convocatoria", "Cuerpo", ["to@example.com"])
+        with override_settings(EMAIL_PORT=1):
+            self.assertEqual(send_pending(), (0, 1))
+
+        outbox.refresh_from_db()
+        self.assertEqual(outbox.status, 'PENDIENTE')
+        self.assertEqual(outbox.attempts, 1)
+        self.assertIsNotNone(outbox.last_error)
+        self.assertGreater(outbox.next_attempt_at, outbox.created_at)
+        self.assertEqual(send_pending(), (0, 0))
+
+    def test_notify_returns_immediately_with_status(self):
+        project = create_project_graph(0)
+        follow_up = FollowUpMeeting.objects.get(contract=project.contract)
+
+        response = self.client.post(f'/api/follow-up-meetings/{follow_up.pk}/notify/')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()['outbox']['status'], 'PENDIENTE')
+        self.assertEqual(self.smtp.messages, 0)
+
+        send_pending()
+        status = self.client.get(response['Location']).json()['status']
+        self.assertEqual(status, 'ENVIADO')
+        follow_up.refresh_from_db()
+        self.assertTrue(follow_up.is_notified)
+
+
+def signature_data_uri(width=1500, height=500):
+    """A full-canvas signature as SignaturePad sends it: antialiased ink on white."""
+    scale = 2
+    image = Image.new('RGBA', (width * scale, height * scale), 'white')
+    points = [
+        (scale * (width // 4 + i * 3), scale * (height // 2 + int(height / 6 * math.sin(i / 9))))
+        for i in range(width // 6)
+    ]
+    ImageDraw.Draw(image).line(points, fill='black', width=3 * scale, joint='curve')
+    image = image.resize((width, height), Image.Resampling.LANCZOS)
+    output = io.BytesIO()
+    image.save(output, format='PNG')
+    return 'data:image/png;base64,' + base64.b64encode(output.getvalue()).decode()
+
+
+def decode_png(data_uri):
+    return Image.open(io.BytesIO(base64.b64decode(data_uri.split(',', 1)[1])))
+
+
+class SignatureTests(APITestCase):
+    def test_normalise_crops_scales_and_quantises(self):
+        original = signature_data_uri()
+        normalised = normalise_data_uri(original)
+
+        image = decode_png(normalised)
+        self.assertEqual(image.mode, 'P')
+        self.assertEqual(image.width, SIGNATURE_MAX_WIDTH)
+        self.assertLess(image.height, 200)
+        self.assertLess(len(normalised) * 4, len(original))
+        self.assertEqual(normalise_data_uri(normalised), normalised)
+        self.assertEqual(normalise_data_uri('https://example.com/firma.png'), 'https://example.com/firma.png')
+
+    def test_signatures_are_normalised_on_write(self):
+        follow_up = create_project_graph(0).contract.follow_up_meetings.get()
+        signature = {'company': 'Empresa', 'name': 'Firmante', 'role': 'Jefe de obra', 'data': signature_data_uri()}
+
+        response = self.client.patch(f'/api/follow-up-configs/{follow_up.config.pk}/', {'signatures': [signature]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        stored = FollowUpMeetingConfig.objects.get(pk=follow_up.config.pk).signatures
+        self.assertEqual(stored, [{**signature, 'data': normalise_data_uri(signature['data'])}])
+        self.assertEqual(response.json()['signatures'], stored)
+
+
+class ImageRenditionTests(APITestCase):
+    def setUp(self):
+        media, renditions = tempfile.TemporaryDirectory(), tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.addCleanup(renditions.cleanup)
+        self.renditions = renditions.name
+        settings = self.settings(MEDIA_ROOT=media.name, IMAGE_RENDITIONS_ROOT=renditions.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def upload(self, company, size=(1600, 900)):
+        output = io.BytesIO()
+        Image.new('RGB', size, 'navy').save(output, format='PNG')
+        return self.client.patch(
+            f'/api/companies/{company.pk}/', {'avatar': SimpleUploadedFile('logo.png', output.getvalue())},
+            format='multipart',
+        )
+
+    def test_variants_are_rendered_once_and_cached_for_good(self):
+        company = Company.objects.create(name='Empresa', cif='B00000001')
+        response = self.upload(company)
+        self.assertEqual(response.status_code, 200)
+        urls = response.json()['avatar']
+        self.assertEqual(set(urls), {'webp', 'png'})
+        self.assertEqual(set(urls['webp']), set(RENDITIONS))
+        self.assertRegex(Company.objects.get(pk=company.pk).avatar.name, r'^company_logos/[0-9a-f]{64}\.png$')
+
+        response = self.client.get(urls['webp']['small'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/webp')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertEqual(Image.open(io.BytesIO(response.content)).size, (128, 72))
+        cached = sum(len(files) for _, _, files in os.walk(self.renditions))
+        self.assertEqual(cached, 1)
+
+        self.assertEqual(self.client.get(urls['webp']['small']).content, response.content)
+        self.assertEqual(sum(len(files) for _, _, files in os.walk(self.renditions)), cached)
+        png = self.client.get(urls['png']['thumb'])
+        self.assertEqual(Image.open(io.BytesIO(png.content)).format, 'PNG')
+
+    def test_replaced_image_redirects_and_echo_keeps_it(self):
+        company = Company.objects.create(name='Empresa', cif='B00000001')
+        old = self.upload(company).json()['avatar']
+        new = self.upload(company, size=(300, 300)).json()['avatar']
+        self.assertNotEqual(old, new)
+
+        response = self.client.get(old['webp']['medium'])
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(response['Location'], new['webp']['medium'])
+
+        response = self.client.put(
+            f'/api/companies/{company.pk}/', {'name': 'Empresa', 'cif': 'B00000001', 'avatar': new}, format='json',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['avatar'], new)
+
+
+@quiet_sql_stats
+class DashboardTests(APITestCase):
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.projects = [create_project_graph(index) for index in range(2)]
+        self.coordinator = User.objects.get(email='user0@example.com')
+        self.manager = User.objects.create_user(email='gestor@example.com', password='x', role='MANAGER')
+
+    def dashboard(self, user, queries=4):
+        self.client.force_authenticate(user)
+        with self.assertNumQueries(queries):
+            response = self.client.get('/api/dashboard/')
+        self.assertEqual(response.status_code, 200)
+        self.assertLess(len(response.content), 1024)
+        return response.json()
+
+    def test_counts_are_scoped_to_the_role(self):
+        data = self.dashboard(self.manager)
+        self.assertEqual(data['contracts'], 2)
+        self.assertEqual(data['projects'], {'total': 2, 'byStatus': {'INACTIVA': 2}})
+        self.assertEqual(data['documents'], {'total': 2, 'byStatus': {'BORRADOR': 2}})
+        self.assertEqual(data['followUps']['byStatus'], {'PROGRAMADA': 2})
+
+        data = self.dashboard(self.coordinator)
+        self.assertEqual(data['contracts'], 1)
+        self.assertEqual(data['meetings'], {'total': 1, 'byStatus': {'PROGRAMADA': 1}, 'upcoming': 0})
+
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.get('/api/dashboard/').status_code, 401)
+
+    def test_counters_follow_writes(self):
+        project = self.projects[0]
+        with self.captureOnCommitCallbacks(execute=True):
+            document = project.documents.get()
+            document.status = 'ACEPTADO'
+            document.save()
+            Meeting.objects.create(
+                project=project, start_date=datetime.date.today() + datetime.timedelta(days=7),
+                end_date=datetime.date.today() + datetime.timedelta(days=7), time=datetime.time(9, 0),
+                reason='Seguimiento', location='Obra', type='PRESENCIAL',
+            )
+            moved = self.projects[1]
+            old_contract = moved.contract
+            moved.contract = project.contract
+            moved.save()
+
+        data = self.dashboard(self.coordinator)
+        self.assertEqual(data['projects']['total'], 2)
+        self.assertEqual(data['documents']['byStatus'], {'ACEPTADO': 1, 'BORRADOR': 1})
+        self.assertEqual(data['meetings']['upcoming'], 1)
+        self.assertFalse(DashboardCounter.objects.filter(contract=old_contract).exclude(metric='follow_ups').exists())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            project.delete()
+        data = self.dashboard(self.coordinator)
+        self.assertEqual(data['documents'], {'total': 1, 'byStatus': {'BORRADOR': 1}})
+        self.assertEqual(data['meetings']['upcoming'], 0)
+
+    def test_rolled_back_savepoints_do_not_lose_later_changes(self):
+        first, second = (project.documents.get() for project in self.projects)
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(DatabaseError), transaction.atomic():
+                first.status = 'ACEPTADO'
+                first.save()
+                raise DatabaseError
+            second.status = 'ACEPTADO'
+            second.save()
+
+        data = self.dashboard(self.manager)
+        self.assertEqual(data['documents']['byStatus'], {'ACEPTADO': 1, 'BORRADOR': 1})
+
+
+class CalendarTests(APITestCase):
+    def setUp(self):
+        self.project = create_project_graph(0)
+        self.other = create_project_graph(1)
+        day = datetime.date(2026, 1, 1)
+        Meeting.objects.create(
+            project=self.other, start_date=day, end_date=day, time=datetime.time(9, 0),
+            reason='Temprana', location='Obra', type='PRESENCIAL',
+        )
+        FollowUpMeeting.objects.filter(contract=self.other.contract).update(date=datetime.date(2026, 2, 1))
+
+    def calendar(self, query=''):
+        response = self.client.get(f'/api/calendar/?from=2026-01-01&to=2026-01-31{query}')
+        self.assertEqual(response.status_code, 200)
+        return [(event['kind'], event['reason'], event['time']) for event in response.json()['events']]
+
+    def test_events_are_merged_in_time_order(self):
+        self.assertEqual(self.calendar(), [
+            ('meeting', 'Temprana', '09:00:00'),
+            ('follow_up', 'Seguimiento', '10:00:00'),
+            ('meeting', 'Reunión inicial', '10:00:00'),
+            ('meeting', 'Reunión inicial', '10:00:00'),
+        ])
+        event = self.client.get('/api/calendar/?from=2026-01-01&to=2026-01-01').json()['events'][0]
+        self.assertEqual(set(event), {'kind', 'id', 'date', 'time', 'reason', 'status', 'type', 'location', 'contractId', 'projectId'})
+
+    def test_filters(self):
+        company = self.project.companies.get()
+        self.assertEqual(self.calendar(f'&company={company.pk}'), [
+            ('follow_up', 'Seguimiento', '10:00:00'),
+            ('meeting', 'Reunión inicial', '10:00:00'),
+        ])
+        self.assertEqual(self.calendar(f'&work_center={self.other.work_center_id}'), [
+            ('meeting', 'Temprana', '09:00:00'),
+            ('meeting', 'Reunión inicial', '10:00:00'),
+        ])
+        self.assertEqual(len(self.calendar('&province=MÁLAGA')), 4)
+        self.assertEqual(self.calendar('&province=SEVILLA'), [])
+
+    def test_invalid_ranges(self):
+        for query, param in (('', 'from'), ('?from=2026-01-01&to=2025-12-31', 'to'),
+                             ('?from=2026-01-01&to=2027-06-01', 'to'),
+                             ('?from=2026-01-01&to=2026-01-31&company=x', 'company')):
+            with self.subTest(query=query):
+                response = self.client.get(f'/api/calendar/{query}')
+                self.assertEqual(response.status_code, 400)
+                self.assertIn(param, response.json())
+
+
+class SearchTests(APITestCase):
+    def setUp(self):
+        self.project = create_project_graph(0)
+        self.company = Company.objects.create(name='Construcciones García Peñíscola', cif='B99999999')
+        self.contact = CompanyContact.objects.create(
+            company=self.company, first_name='José', last_name='Pérez', email='jose.perez@obras.es',
+        )
+
+    def search(self, query):
+        response = self.client.get('/api/search/', query)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def found(self, q, **params):
+        return [(r['type'], r['id']) for r in self.search({'q': q, **params})['results']]
+
+    def test_matches_ignore_accents_and_case(self):
+        for q in ('garcia', 'GARCÍA', 'peniscola', 'Peñíscola'):
+            with self.subTest(q=q):
+                self.assertEqual(self.found(q), [('company', self.company.pk)])
+        self.assertEqual(self.found('perez'), [('contact', self.contact.pk)])
+        self.assertEqual(self.found('b99999999'), [('company', self.company.pk)])
+        self.assertEqual(self.found('"construcciones garcia" -perez'), [('company', self.company.pk)])
+
+    def test_results_are_ranked_and_paginated(self):
+        self.contact.last_name = 'García'
+        self.contact.save()
+        first = self.search({'q': 'garcia', 'limit': 1})
+        self.assertEqual([r['id'] for r in first['results']], [self.company.pk])
+        self.assertEqual(set(first['results'][0]), {'type', 'id', 'parentId', 'title', 'subtitle', 'rank'})
+        self.assertIsNone(first['previous'])
+        second = self.client.get(first['next']).json()
+        self.assertEqual([(r['type'], r['id'], r['parentId']) for r in second['results']],
+                         [('contact', self.contact.pk, self.company.pk)])
+        self.assertIsNone(second['next'])
+        self.assertEqual(self.found('garcia', type='company'), [('company', self.company.pk)])
+
+    def test_entries_follow_the_source_rows(self):
+        document = self.project.documents.get()
+        document.name = 'Plan de seguridad'
+        document.save(update_fields=['name'])
+        self.assertEqual(self.found('seguridad'), [('document', document.pk)])
+        self.project.contract.delete()
+        self.assertEqual(self.found('seguridad'), [])
+        self.assertFalse(SearchEntry.objects.filter(kind__in=['project', 'contract', 'document']).exists())
+
+    def test_migration_indexes_rows_like_the_signals(self):
+        def entries():
+            return list(SearchEntry.objects.order_by('kind', 'object_id').values_list(
+                'kind', 'object_id', 'parent_id', 'title', 'subtitle', 'vector'))
+
+        indexed = entries()
+        SearchEntry.objects.all().delete()
+        import_module('api.migrations.0025_search_entries').index_existing_rows(django_apps, None)
+        self.assertEqual(entries(), indexed)
+
+    def test_invalid_parameters(self):
+        for query, param in (({}, 'q'), ({'q': 'x', 'type': 'meeting'}, 'type'), ({'q': 'x', 'limit': '0'}, 'limit'),
+                             ({'q': 'x', 'offset': '-1'}, 'offset')):
+            with self.subTest(query=query):
+                response = self.client.get('/api/search/', query)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn(param, response.json())
+
+
+@quiet_sql_stats
+class AutocompleteTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.project = create_project_graph(0)
+        self.garcia = Company.objects.create(name='Construcciones García', cif='B99999999')
+        self.garaje = Company.objects.create(name='Garaje Norte', cif='B88888888')
+        self.contact = CompanyContact.objects.create(
+            company=self.garcia, first_name='José', last_name='Pérez', email='jose.perez@obras.es',
+        )
+
+    def suggest(self, resource, query):
+        response = self.client.get(f'/api/autocomplete/{resource}/', query)
+        self.assertEqual(response.status_code, 200)
+        return [(s['id'], s['label']) for s in response.json()]
+
+    def test_suggestions_ignore_case_and_accents(self):
+        self.assertEqual(self.suggest('companies', {'q': 'GARCIA'}), [(self.garcia.pk, 'Construcciones García')])
+        self.assertEqual(self.suggest('companies', {'q': 'b9999'}), [(self.garcia.pk, 'Construcciones García')])
+        self.assertEqual(self.suggest('contacts', {'q': 'jose per'}), [(self.contact.pk, 'José Pérez')])
+        self.assertEqual(self.suggest('contacts', {'q': 'jose', 'company': self.project.companies.get().pk}), [])
+        self.assertEqual(self.suggest('workcenters', {'q': 'centro', 'province': 'MÁLAGA'}),
+                         [(self.project.work_center_id, 'Centro 0')])
+        self.assertEqual(self.suggest('users', {'q': 'usuario'}), [(self.project.manager_id, 'Usuario 0')])
+        self.assertEqual(self.suggest('companies', {'q': 'g'}), [])
+
+    def test_prefix_matches_come_first_and_limit(self):
+        self.assertEqual(self.suggest('companies', {'q': 'ga'}), [
+            (self.garaje.pk, 'Garaje Norte'), (self.garcia.pk, 'Construcciones García'),
+        ])
+        self.assertEqual(self.suggest('companies', {'q': 'ga', 'limit': 1}), [(self.garaje.pk, 'Garaje Norte')])
+
+    def test_answers_are_cached_until_the_resource_changes(self):
+        self.suggest('companies', {'q': 'gar'})
+        with CaptureQueriesContext(connection) as queries:
+            self.suggest('companies', {'q': 'GAR'})
+        self.assertFalse(any('FROM "api_company"' in q['sql'] for q in queries.captured_queries))
+
+        other = Company.objects.create(name='Garrido', cif='B77777777')
+        self.assertIn((other.pk, 'Garrido'), self.suggest('companies', {'q': 'gar'}))
+
+    def test_invalid_requests(self):
+        self.assertEqual(self.client.get('/api/autocomplete/meetings/', {'q': 'ga'}).status_code, 404)
+        for query, param in (({'q': 'ga', 'limit': 'x'}, 'limit'), ({'q': 'ga', 'company': 'x'}, 'company')):
+            with self.subTest(query=query):
+                response = self.client.get('/api/autocomplete/contacts/', query)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn(param, response.json())
+
+
+@quiet_sql_stats
+class BulkWriteTests(APITestCase):
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.project = create_project_graph(0)
+
+    def project_item(self, code, **fields):
+        project = self.project
+        return {
+            'code': code, 'description': 'Obra', 'startDate': '2026-01-01', 'endDate': '2026-12-31',
+            'fechaSolicitud': '2026-01-01', 'contractId': project.contract_id, 'workCenterId': project.work_center_id,
+            'managerId': project.manager_id, 'companyIds': [project.companies.get().pk],
+            'contactIds': list(project.contacts.values_list('pk', flat=True)), **fields,
+        }
+
+    def test_create_writes_each_table_once(self):
+        items = [self.project_item(f'P-BULK-{n}') for n in range(5)]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post('/api/projects/bulk/', items, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([p['code'] for p in response.json()], [item['code'] for item in items])
+        self.assertEqual(response.json()[0]['contactIds'], items[0]['contactIds'])
+        inserts = [q['sql'] for q in queries.captured_queries if q['sql'].startswith('INSERT INTO "api_project')]
+        self.assertEqual(len(inserts), 3)  # The projects and the two many-to-many tables.
+
+        documents = [
+            {'projectId': self.project.pk, 'name': f'd{n}.pdf', 'url': 'data:application/pdf;base64,JVBERi0=', 'category': 'Otros'}
+            for n in range(3)
+        ]
+        response = self.client.post('/api/documents/bulk/', documents, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.project.documents.count(), 4)
+
+    def test_invalid_items_save_nothing(self):
+        items = [
+            self.project_item('P-BULK-0'),
+            self.project_item('P-0'),
+            self.project_item('P-BULK-1', contractId=999999),
+            self.project_item('P-BULK-0'),
+        ]
+        response = self.client.post('/api/projects/bulk/', items, format='json')
+        self.assertEqual(response.status_code, 400)
+        errors = response.json()
+        self.assertEqual(len(errors), 4)
+        self.assertIn('code', errors[0])
+        self.assertIn('code', errors[1])
+        self.assertIn('contractId', errors[2])
+        self.assertEqual(Project.objects.count(), 1)
+
+        for body in ({}, []):
+            with self.subTest(body=body):
+                response = self.client.post('/api/projects/bulk/', body, format='json')
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('nonFieldErrors', response.json())
+        self.assertEqual(self.client.put('/api/contacts/bulk/', [{}], format='json').status_code, 405)
+
+    def test_update_and_upsert(self):
+        document = self.project.documents.get()
+        response = self.client.patch(
+            '/api/documents/bulk/', [{'id': document.pk, 'status': 'ACEPTADO'}, {'id': 0, 'status': 'ACEPTADO'}],
+            format='json',
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()[0], {})
+        response = self.client.patch(
+            '/api/documents/bulk/', [{'id': document.pk, 'status': 'ACEPTADO'}, {'id': document.pk, 'name': 'b.pdf'}],
+            format='json',
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), [{'id': ["Repetido en la lista."]}] * 2)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch('/api/documents/bulk/', [{'id': document.pk, 'status': 'ACEPTADO'}],
+                                         format='json')
+        self.assertEqual(response.status_code, 200)
+        document.refresh_from_db()
+        self.assertEqual((document.status, document.name), ('ACEPTADO', 'doc.pdf'))
+        self.assertTrue(DashboardCounter.objects.filter(metric='documents', key='ACEPTADO', count=1).exists())
+
+        items = [self.project_item('P-0', description='Seguridad vial'), self.project_item('P-NUEVO')]
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.put('/api/projects/bulk/', items, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()[0]['id'], self.project.pk)
+        self.assertEqual(dict(Project.objects.values_list('code', 'description')),
+                         {'P-0': 'Seguridad vial', 'P-NUEVO': 'Obra'})
+        self.assertEqual(SearchEntry.objects.get(kind='project', object_id=self.project.pk).subtitle, 'Seguridad vial')
+        self.assertTrue(DashboardCounter.objects.filter(metric='projects', count=2).exists())
+
+        response = self.client.put('/api/projects/bulk/', [items[1], items[1]], format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()[1], {'code': ["Repetido en la lista."]})
+
+    def test_config_post_updates_the_meetings_config(self):
+        meeting = FollowUpMeeting.objects.get()
+        meeting.config.delete()
+        for fields, created in (({'emergencia': 'Nada'}, True), ({'otrosTemas': 'Andamios'}, False)):
+            response = self.client.post('/api/follow-up-configs/', {'meeting': meeting.pk, **fields}, format='json')
+            self.assertEqual(response.status_code, 201 if created else 200)
+        config = FollowUpMeetingConfig.objects.get()
+        self.assertEqual((config.emergencia, config.otros_temas), ('Nada', 'Andamios'))
+
+
+class SyncTests(APITestCase):
+    def sync(self, cursor=None):
+        response = self.client.get('/api/sync/', {'since': cursor} if cursor else {})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_changes_and_deletions_since_cursor(self):
+        project = create_project_graph(0)
+        first = self.sync()
+        self.assertTrue(first['full'])
+        self.assertEqual([p['id'] for p in first['changes']['projects']], [project.pk])
+
+        # Rows outside the overlap window are not sent again.
+        Project.objects.update(updated_at=datetime.datetime(2020, 1, 1, tzinfo=datetime.timezone.utc))
+        Company.objects.update(updated_at=datetime.datetime(2020, 1, 1, tzinfo=datetime.timezone.utc))
+        cursor = first['cursor']
+        self.assertNotIn('projects', self.sync(cursor)['changes'])
+
+        # A contact is embedded in its company; projects only embed it on ?expand=.
+        contact = CompanyContact.objects.first()
+        contact.phone = '600000000'
+        contact.save()
+        delta = self.sync(cursor)
+        self.assertFalse(delta['full'])
+        self.assertEqual([c['id'] for c in delta['changes']['companies']], [contact.company_id])
+        self.assertNotIn('projects', delta['changes'])
+
+        document_id = ProjectDocument.objects.get().pk
+        ProjectDocument.objects.filter(pk=document_id).delete()
+        self.assertEqual(self.sync(cursor)['deleted'], {'documents': [document_id]})
+
+    def test_invalid_cursor(self):
+        self.assertEqual(self.client.get('/api/sync/', {'since': 'ayer'}).status_code, 400)
+
+    def test_untracked_models_are_deleted_in_one_statement(self):
+        for model in (Tombstone, Job, SqlFingerprint, Blob):
+            with self.subTest(model=model.__name__):
+                for signal in (pre_delete, post_delete, pre_save, post_save):
+                    self.assertFalse(signal.has_listeners(model))
+        # Blobs are still collected for the foreign keys pointing at them.
+        for model in (Tombstone, Job, SqlFingerprint):
+            self.assertTrue(Collector(using='default').can_fast_delete(model.objects.all()))
+        self.assertTrue(post_delete.has_listeners(Project))
+
+        Tombstone.objects.bulk_create(Tombstone(resource='documents', object_id=n) for n in range(50))
+        Tombstone.objects.update(deleted_at=datetime.datetime(2020, 1, 1, tzinfo=datetime.timezone.utc))
+        with self.assertNumQueries(1):
+            call_command('prune_tombstones', stdout=io.StringIO())
+        self.assertFalse(Tombstone.objects.exists())
+
+
+@quiet_sql_stats
+class ConditionalGetTests(APITestCase):
+    def test_list_not_modified_skips_serialization(self):
+        create_project_graph(0)
+        response = self.client.get('/api/projects/')
+        etag = response['ETag']
+
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/projects/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+        # Changing an embedded contact changes the company list's version.
+        response = self.client.get('/api/companies/')
+        contact = CompanyContact.objects.first()
+        contact.phone = '600000000'
+        contact.save()
+        self.assertEqual(self.client.get('/api/companies/', HTTP_IF_NONE_MATCH=response['ETag']).status_code, 200)
+        self.assertEqual(self.client.get('/api/projects/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        # Projects do not track what they only embed on request.
+        response = self.client.get('/api/projects/', {'expand': 'contacts'})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('ETag', response)
+
+        # So does deleting a row, through the count.
+        response = self.client.get('/api/documents/')
+        ProjectDocument.objects.all().delete()
+        self.assertEqual(self.client.get('/api/documents/', HTTP_IF_NONE_MATCH=response['ETag']).status_code, 200)
+
+    def test_detail_last_modified(self):
+        create_project_graph(0)
+        template = DocumentTemplate.objects.get()
+        response = self.client.get(f'/api/templates/{template.pk}/')
+        self.assertIn('Last-Modified', response)
+
+        response = self.client.get(
+            f'/api/templates/{template.pk}/', HTTP_IF_MODIFIED_SINCE=response['Last-Modified'],
+        )
+        self.assertEqual(response.status_code, 304)
@@ -4,11 +4,14 @@ from rest_framework_simplejwt.views import (
     TokenObtainPairView,
     TokenRefreshView,
 )
+from .metrics import metrics_view
 from .views import (
     UserViewSet, CompanyViewSet, CompanyContactViewSet, ContractViewSet, 
     WorkCenterViewSet, ProjectViewSet, ProjectDocumentViewSet, 
     MeetingViewSet, DocumentTemplateViewSet, MeetingDocumentViewSet,
-    FollowUpMeetingViewSet, FollowUpMeetingConfigViewSet
+    FollowUpMeetingViewSet, FollowUpMeetingConfigViewSet, BlobViewSet, JobViewSet,
+    EmailOutboxViewSet, SyncViewSet, DashboardViewSet, CalendarViewSet, SearchViewSet,
+    AutocompleteViewSet
 )
 
 router = DefaultRouter()
@@ -24,9 +27,18 @@ router.register(r'meeting-documents', MeetingDocumentViewSet)
 router.register(r'templates', DocumentTemplateViewSet)
 router.register(r'follow-up-meetings', FollowUpMeetingViewSet)
 router.register(r'follow-up-configs', FollowUpMeetingConfigViewSet)
+router.register(r'blobs', BlobViewSet)
+router.register(r'jobs', JobViewSet)
+router.register(r'outbox', EmailOutboxViewSet)
+router.register(r'sync', SyncViewSet, basename='sync')
+router.register(r'dashboard', DashboardViewSet, basename='dashboard')
+router.register(r'calendar', CalendarViewSet, basename='calendar')
+router.register(r'search', SearchViewSet, basename='search')
+router.register(r'autocomplete', AutocompleteViewSet, basename='autocomplete')
 
 urlpatterns = [
     path('', include(router.urls)),
     path('token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('metrics/', metrics_view, name='metrics'),
 ]
@@ -1,170 +1,441 @@
-from rest_framework import viewsets, status
+from rest_framework import mixins, serializers, viewsets, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import MethodNotAllowed
+from rest_framework.permissions import SAFE_METHODS, IsAuthenticated
 from rest_framework.response import Response
-from django.core.mail import send_mail
+from rest_framework.utils.urls import replace_query_param
 from django.conf import settings
-import io
-import base64
-from docx import Document
-from docx.shared import Inches
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from django.http import Http404, HttpResponse, HttpResponseRedirect, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils.http import content_disposition_header
+from django.db import transaction
+from django.utils import timezone
+from .actas import (
+    FOLLOW_UP_ACTA_BATCH_JOB, FOLLOW_UP_ACTA_JOB, FOLLOW_UP_TEMPLATE_MISSING, INITIAL_ACTA_JOB,
+    find_follow_up_template
+)
+from .autocomplete import RESOURCES as AUTOCOMPLETE_RESOURCES, cached_suggest, parse_params as parse_autocomplete_params
+from .bulk import CREATE, UPDATE, UPSERT, BulkValidationError, write as bulk_write
+from .blobstore import defer_blob_fields, get_blob_store, parse_legacy_payload
+from .calendar_events import events as calendar_events, parse_filters as parse_calendar_filters, parse_range
+from .conditional import ConditionalGetMixin, conditional_response, make_etag, set_validators
+from .dashboard import summary as dashboard_summary
+from .jobs import INTERNAL_KINDS, enqueue
+from .metrics import REQUEST_FAILURES
+from .outbox import queue_email
+from .renditions import FORMATS, RENDITIONS, get_rendition, rendition_urls, source_version
+from .search import parse_params as parse_search_params, search
+from .sync import OVERLAP, decode_cursor, encode_cursor, tombstone_horizon
 from .models import (
-    User, Company, CompanyContact, Contract, WorkCenter, 
+    Blob, User, Company, CompanyContact, Contract, WorkCenter, 
     Project, ProjectDocument, Meeting, DocumentTemplate, MeetingDocument,
-    FollowUpMeeting, FollowUpMeetingConfig
+    FollowUpMeeting, FollowUpMeetingConfig, Job, EmailOutbox, Tombstone
 )
 from .serializers import (
-    UserSerializer, CompanySerializer, CompanyContactSerializer, ContractSerializer, 
+    BlobContentField, UserSerializer, CompanySerializer, CompanyContactSerializer, ContractSerializer, 
     WorkCenterSerializer, ProjectSerializer, ProjectDocumentSerializer, 
     MeetingSerializer, DocumentTemplateSerializer, MeetingDocumentSerializer,
-    FollowUpMeetingSerializer, FollowUpMeetingConfigSerializer
+    FollowUpMeetingSerializer, FollowUpMeetingConfigSerializer, JobSerializer,
+    EmailOutboxSerializer, ActaBatchSerializer
 )
 
 
-# ── Shared DOCX template helpers ──
+# ── Shared content streaming helpers ──
+
+def parse_range_header(header, size):
+    """
+    Parses a single ``bytes=`` range against a payload of ``size`` bytes.
+    Returns ``(start, end)`` inclusive, None when the whole payload should be
+    sent, or raises ValueError when the range cannot be satisfied.
+    """
+    if not header or not header.startswith('bytes=') or ',' in header:
+        return None
+    first, _, last = header[len('bytes='):].strip().partition('-')
+    try:
+        if first:
+            start = int(first)
+            end = int(last) if last else size - 1
+        else:
+            suffix = int(last)
+            if suffix <= 0:
+                raise ValueError("Empty suffix range")
+            start, end = max(size - suffix, 0), size - 1
+    except ValueError:
+        if first or last:
+            raise
+        return None
+    if start >= size or end < start:
+        raise ValueError("Unsatisfiable range")
+    return start, min(end, size - 1)
+
+
+def ranged_response(request, size, content_type, iter_range, filename=None):
+    """
+    Streams ``iter_range(start, length)`` honouring a single HTTP Range request.
+    """
+    try:
+        byte_range = parse_range_header(request.META.get('HTTP_RANGE'), size)
+    except ValueError:
+        response = HttpResponse(status=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+        response['Content-Range'] = f"bytes */{size}"
+        return response
+
+    if byte_range is None:
+        start, end = 0, size - 1
+        response = StreamingHttpResponse(iter_range(0, size), content_type=content_type)
+    else:
+        start, end = byte_range
+        response = StreamingHttpResponse(
+            iter_range(start, end - start + 1), content_type=content_type,
+            status=status.HTTP_206_PARTIAL_CONTENT,
+        )
+        response['Content-Range'] = f"bytes {start}-{end}/{size}"
+
+    response['Content-Length'] = max(end - start + 1, 0)
+    response['Accept-Ranges'] = 'bytes'
+    if filename:
+        response['Content-Disposition'] = content_disposition_header(False, filename)
+    return response
+
+
+def blob_field_response(request, instance, field, filename=None):
+    """Streams the bytes behind one of ``instance.BLOB_FIELDS``."""
+    blob = getattr(instance, f'{field}_blob')
+    if blob is not None:
+        store = get_blob_store()
+        return ranged_response(
+            request, blob.size, blob.content_type,
+            lambda start, length: store.iter_range(blob.sha256, start, length),
+            filename,
+        )
+
+    # Rows not migrated by ``migrate_blobs`` yet still carry a data URI or bare base64.
+    payload = parse_legacy_payload(getattr(instance, field))
+    if payload is None:
+        raise Http404
+    content_type, data = payload
+    return ranged_response(
+        request, len(data), content_type,
+        lambda start, length: [data[start:start + length]],
+        filename,
+    )
+
+
+class BlobContentMixin:
+    """
+    Adds a ``/content/`` route streaming the object's blob field. List and
+    detail querysets defer the payload columns, so only this route reads them.
+    """
+    blob_field = None
+
+    def get_content_filename(self, instance):
+        return None
+
+    @action(detail=True, methods=['get'])
+    def content(self, request, pk=None):
+        instance = self.get_object()
+
+        key = getattr(instance, f'{self.blob_field}_blob_id')
+        etag = f'"{key}"' if key else make_etag('content', instance.pk, getattr(instance, 'updated_at', None))
+        last_modified = instance.updated_at if getattr(self, 'last_modified_header', False) else None
+        response = conditional_response(request, etag, last_modified)
+        if response is not None:
+            return response
+
+        response = blob_field_response(request, instance, self.blob_field, self.get_content_filename(instance))
+        if response.status_code in (status.HTTP_200_OK, status.HTTP_206_PARTIAL_CONTENT):
+            set_validators(response, etag, last_modified)
+        return response
+
+
+def _columns_for(model, fields):
+    """
+    Columns to load for rendering ``fields``, or None when some field reads
+    something that cannot be traced back to a column.
+    """
+    columns = {model._meta.pk.name}
+    for field in fields.values():
+        if field.write_only:
+            continue
+        if isinstance(field, BlobContentField):
+            columns.add(f'{field.field_name}_blob')
+            continue
+        if field.source == '*' or '.' in field.source:
+            return None
+        try:
+            model_field = model._meta.get_field(field.source)
+        except FieldDoesNotExist:
+            return None
+        if model_field.concrete and not model_field.many_to_many:
+            columns.add(model_field.name)
+    return columns
+
+
+class FieldPlanMixin:
+    """
+    Loads only what the serializer is going to render. ``select_related_fields``
+    and ``prefetch_fields`` map a serializer field to the relations it reads,
+    which are joined/prefetched only while that field is rendered (see
+    ``?fields=``/``?expand=`` in ``DynamicFieldsMixin``). A read restricted
+    with ``?fields=`` also narrows the columns with ``only()``.
+    """
+    select_related_fields = {}
+    prefetch_fields = {}
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        request = self.request
+        restrict = request is not None and request.method in SAFE_METHODS and 'fields' in request.query_params
+        return self.plan_queryset(queryset, self.get_serializer().fields, restrict_columns=restrict)
+
+    @classmethod
+    def plan_queryset(cls, queryset, fields, restrict_columns=False):
+        related = []
+        prefetches = {}
+        for name in fields:
+            related.extend(cls.select_related_fields.get(name, ()))
+            for lookup in cls.prefetch_fields.get(name, ()):
+                if isinstance(lookup, str):
+                    lookup = Prefetch(lookup)
+                # The first plan for a relation wins; expanded fields come first.
+                prefetches.setdefault(lookup.prefetch_to, lookup)
+
+        if related:
+            queryset = queryset.select_related(*related)
+        if prefetches:
+            queryset = queryset.prefetch_related(*prefetches.values())
+        if restrict_columns:
+            columns = _columns_for(queryset.model, fields)
+            if columns is not None:
+                queryset = queryset.only(*columns, *related)
+        return queryset
+
+
+def _rejected(action, error, status_code):
+    REQUEST_FAILURES.labels(action).inc()
+    return Response({"error": error}, status=status_code)
+
+
+class NotifyMixin:
+    def _queued_response(self, outbox):
+        """The message goes out through the outbox worker; report where to follow it."""
+        serializer = EmailOutboxSerializer(outbox, context=self.get_serializer_context())
+        return Response(
+            {"message": "Notificación en cola de envío.", "outbox": serializer.data},
+            status=status.HTTP_202_ACCEPTED,
+            headers={'Location': serializer.data['url']},
+        )
+
+
+class BulkWriteMixin:
+    """
+    Adds a ``/bulk/`` route taking a list of objects (see ``bulk``): ``POST``
+    creates them, ``PATCH`` updates them by ``id`` and, when ``upsert_field``
+    is set, ``PUT`` creates or updates them by that field. All or nothing:
+    if an item is invalid the response holds one error dict per item.
+    """
+    upsert_field = None
+
+    @action(detail=False, methods=['post', 'patch', 'put'], url_path='bulk')
+    def bulk(self, request):
+        mode = {'POST': CREATE, 'PATCH': UPDATE, 'PUT': UPSERT}[request.method]
+        if mode == UPSERT and self.upsert_field is None:
+            raise MethodNotAllowed(request.method)
+        try:
+            rows = bulk_write(
+                self.get_serializer_class(), request.data, self.get_serializer_context(), mode, self.upsert_field,
+            )
+        except BulkValidationError as e:
+            return Response(e.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        saved = self.get_queryset().in_bulk([row.pk for row in rows])
+        serializer = self.get_serializer([saved[row.pk] for row in rows], many=True)
+        return Response(serializer.data, status=status.HTTP_201_CREATED if mode == CREATE else status.HTTP_200_OK)
+
 
-def replace_in_paragraph(para, replacements_dict):
+class ImageRenditionsMixin:
     """
-    Replaces placeholder keys in a paragraph while preserving run-level formatting.
+    Adds ``/<field>/<version>/<variant>.<format>/`` routes serving the resized
+    variants of the object's ``image_fields`` (see ``renditions``).
     """
-    full_text = para.text
-    if not any(key in full_text for key in replacements_dict):
-        return
-
-    runs = list(para.runs)
-    if not runs:
-        return
-
-    run_spans = []
-    pos = 0
-    for run in runs:
-        run_spans.append((pos, pos + len(run.text), run))
-        pos += len(run.text)
-
-    for key, val in replacements_dict.items():
-        search_start = 0
-        while True:
-            idx = full_text.find(key, search_start)
-            if idx == -1:
-                break
-            key_end = idx + len(key)
-
-            overlapping = [
-                (s, e, r) for (s, e, r) in run_spans
-                if s < key_end and e > idx
-            ]
-
-            if overlapping:
-                first_s, first_e, first_run = overlapping[0]
-
-                if len(overlapping) > 1:
-                    merged = "".join(r.text for (_, _, r) in overlapping)
-                    first_run.text = merged
-                    for (_, _, r) in overlapping[1:]:
-                        r._element.getparent().remove(r._element)
-
-                first_run.text = first_run.text.replace(key, str(val))
-
-                run_spans = []
-                pos2 = 0
-                for r in para.runs:
-                    run_spans.append((pos2, pos2 + len(r.text), r))
-                    pos2 += len(r.text)
-                full_text = para.text
-
-            search_start = idx + 1
-
-
-def replace_in_blocks(blocks, replacements_dict):
-    for p in blocks.paragraphs:
-        replace_in_paragraph(p, replacements_dict)
-    for table in blocks.tables:
-        for row in table.rows:
-            for cell in row.cells:
-                for p in cell.paragraphs:
-                    replace_in_paragraph(p, replacements_dict)
-
-
-class UserViewSet(viewsets.ModelViewSet):
+    image_fields = ()
+
+    @action(
+        detail=True, methods=['get'], url_name='rendition',
+        url_path=(
+            r'(?P<field>[a-z_]+)/(?P<version>[0-9a-f]+)/'
+            rf'(?P<variant>{"|".join(RENDITIONS)})\.(?P<fmt>{"|".join(FORMATS)})'
+        ),
+    )
+    def rendition(self, request, pk=None, field=None, version=None, variant=None, fmt=None):
+        if field not in self.image_fields:
+            raise Http404
+        # Only the image column: this route is hit once per variant and client.
+        instance = get_object_or_404(self.queryset.model.objects.only('pk', field), pk=pk)
+        self.check_object_permissions(request, instance)
+        field_file = getattr(instance, field)
+        if not field_file:
+            raise Http404
+        if source_version(field_file.name) != version:
+            # A link to a replaced image: send the client to the current one.
+            return HttpResponseRedirect(rendition_urls(field_file, request)[fmt][variant])
+
+        try:
+            data = get_rendition(field_file, variant, fmt)
+        except OSError:
+            # Missing from storage or not an image Pillow can read.
+            raise Http404
+        response = HttpResponse(data, content_type=FORMATS[fmt])
+        # The version in the URL is derived from the uploaded bytes.
+        response['Cache-Control'] = 'private, max-age=31536000, immutable'
+        return response
+
+
+class BlobViewSet(mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    """Serves the raw bytes of a stored blob by its SHA-256 digest."""
+    queryset = Blob.objects.all()
+    lookup_value_regex = '[0-9a-f]{64}'
+
+    def retrieve(self, request, pk=None):
+        blob = self.get_object()
+        store = get_blob_store()
+        response = ranged_response(
+            request, blob.size, blob.content_type,
+            lambda start, length: store.iter_range(blob.sha256, start, length),
+        )
+        # Content-addressed: the bytes behind a digest never change.
+        response['Cache-Control'] = 'private, max-age=31536000, immutable'
+        return response
+
+
+class JobViewSet(viewsets.ReadOnlyModelViewSet):
+    """Status of background jobs: poll until ``status`` is COMPLETADO or ERROR."""
+    queryset = Job.objects.all()
+    serializer_class = JobSerializer
+    filter_fields = {'kind': 'kind', 'status': 'status'}
+    ordering_fields = ['id', 'created_at']
+
+    def get_queryset(self):
+        # The app's own bookkeeping jobs are not the users' business.
+        return super().get_queryset().exclude(kind__in=INTERNAL_KINDS)
+
+
+class EmailOutboxViewSet(viewsets.ReadOnlyModelViewSet):
+    """Delivery status of queued notifications."""
+    queryset = EmailOutbox.objects.all()
+    serializer_class = EmailOutboxSerializer
+    filter_fields = {'status': 'status'}
+    ordering_fields = ['id', 'created_at']
+
+
+class UserViewSet(ConditionalGetMixin, FieldPlanMixin, ImageRenditionsMixin, viewsets.ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
+    image_fields = ('avatar',)
+    filter_fields = {'role': 'role', 'email': 'email__iexact'}
 
-class CompanyViewSet(viewsets.ModelViewSet):
+class CompanyViewSet(ConditionalGetMixin, FieldPlanMixin, ImageRenditionsMixin, viewsets.ModelViewSet):
     queryset = Company.objects.all()
     serializer_class = CompanySerializer
+    image_fields = ('avatar',)
+    prefetch_fields = {'contacts': ['contacts']}
+    filter_fields = {'cif': 'cif__iexact', 'project': 'projects'}
 
-class CompanyContactViewSet(viewsets.ModelViewSet):
+class CompanyContactViewSet(ConditionalGetMixin, FieldPlanMixin, BulkWriteMixin, viewsets.ModelViewSet):
     queryset = CompanyContact.objects.all()
     serializer_class = CompanyContactSerializer
+    filter_fields = {'company': 'company_id', 'project': 'projects'}
 
-class ContractViewSet(viewsets.ModelViewSet):
+class ContractViewSet(ConditionalGetMixin, FieldPlanMixin, viewsets.ModelViewSet):
     queryset = Contract.objects.all()
     serializer_class = ContractSerializer
+    filter_fields = {'coordinator': 'coordinator_id', 'code': 'code'}
+    date_range_fields = {'start_date': 'start_date', 'end_date': 'end_date'}
+    ordering_fields = ['id', 'start_date', 'end_date']
 
-class WorkCenterViewSet(viewsets.ModelViewSet):
-    queryset = WorkCenter.objects.all()
+class WorkCenterViewSet(ConditionalGetMixin, FieldPlanMixin, BlobContentMixin, viewsets.ModelViewSet):
+    queryset = defer_blob_fields(WorkCenter.objects.all())
     serializer_class = WorkCenterSerializer
+    blob_field = 'risk_info_url'
+    filter_fields = {'type': 'type', 'province': 'province'}
+
+    def get_content_filename(self, instance):
+        return instance.risk_info_file_name
 
-class ProjectViewSet(viewsets.ModelViewSet):
+class ProjectViewSet(ConditionalGetMixin, FieldPlanMixin, BulkWriteMixin, viewsets.ModelViewSet):
     queryset = Project.objects.all()
     serializer_class = ProjectSerializer
-
-class ProjectDocumentViewSet(viewsets.ModelViewSet):
-    queryset = ProjectDocument.objects.all()
+    upsert_field = 'code'
+    select_related_fields = {'contract': ['contract'], 'manager': ['manager']}
+    prefetch_fields = {
+        'work_center': [Prefetch('work_center', queryset=defer_blob_fields(WorkCenter.objects.all()))],
+        'companies': [Prefetch('companies', queryset=Company.objects.prefetch_related('contacts'))],
+        'contacts': ['contacts'],
+        'company_ids': [Prefetch('companies', queryset=Company.objects.only('id'))],
+        'contact_ids': [Prefetch('contacts', queryset=CompanyContact.objects.only('id'))],
+    }
+    filter_fields = {
+        'contract': 'contract_id',
+        'work_center': 'work_center_id',
+        'manager': 'manager_id',
+        'company': 'companies',
+        'company_status': 'company_status',
+        'documentation_status': 'documentation_status',
+    }
+    date_range_fields = {'start_date': 'start_date', 'end_date': 'end_date', 'created_at': 'created_at'}
+    ordering_fields = ['id', 'start_date', 'created_at']
+
+class ProjectDocumentViewSet(ConditionalGetMixin, FieldPlanMixin, BlobContentMixin, BulkWriteMixin, viewsets.ModelViewSet):
+    queryset = defer_blob_fields(ProjectDocument.objects.all())
     serializer_class = ProjectDocumentSerializer
-
-class MeetingViewSet(viewsets.ModelViewSet):
-    queryset = Meeting.objects.all()
+    blob_field = 'url'
+    last_modified_header = True
+    filter_fields = {
+        'project': 'project_id',
+        'contract': 'project__contract_id',
+        'work_center': 'project__work_center_id',
+        'company': 'project__companies',
+        'status': 'status',
+        'category': 'category',
+    }
+    date_range_fields = {'uploaded_at': 'uploaded_at'}
+    ordering_fields = ['id', 'uploaded_at']
+
+    def get_content_filename(self, instance):
+        return instance.name
+
+class MeetingViewSet(ConditionalGetMixin, FieldPlanMixin, NotifyMixin, BlobContentMixin, viewsets.ModelViewSet):
+    queryset = defer_blob_fields(Meeting.objects.all())
     serializer_class = MeetingSerializer
+    prefetch_fields = {
+        'documents': [Prefetch('documents', queryset=defer_blob_fields(MeetingDocument.objects.all()))],
+        'attendees': [Prefetch('attendees', queryset=User.objects.only('id'))],
+        'notification_contacts': ['notification_contacts'],
+    }
+    blob_field = 'document_data'
+    filter_fields = {
+        'project': 'project_id',
+        'contract': 'project__contract_id',
+        'work_center': 'project__work_center_id',
+        'company': 'project__companies',
+        'status': 'status',
+        'type': 'type',
+    }
+    date_range_fields = {'start_date': 'start_date'}
+    ordering_fields = ['id', 'start_date']
+
+    def create(self, request, *args, **kwargs):
+        response = super().create(request, *args, **kwargs)
+        # The acta is rendered by the job worker; clients can follow it here.
+        response.data['acta_job'] = self.acta_job.pk
+        return response
 
     def perform_create(self, serializer):
-        meeting = serializer.save()
-        try:
-            self._generate_meeting_document(meeting)
-        except Exception as e:
-            print(f"Error generating meeting document: {e}")
-
-    def _generate_meeting_document(self, meeting):
-        template = DocumentTemplate.objects.filter(name__icontains="Acta inicial", category="Acta Inicial").first()
-        if not template:
-            template = DocumentTemplate.objects.filter(category="Acta Inicial").first()
-
-        if template and template.file_data:
-            file_data = template.file_data
-            if "," in file_data:
-                base64_data = file_data.split(",")[1]
-            else:
-                base64_data = file_data
-
-            doc_bytes = base64.b64decode(base64_data)
-            doc = Document(io.BytesIO(doc_bytes))
-
-            project = meeting.project
-            companies = ", ".join([c.name for c in project.companies.all()])
-            
-            replacements = {
-                "{Empresa}": companies,
-                "{fechaReunion}": meeting.start_date.strftime("%d/%m/%Y") if meeting.start_date else "",
-                "{centro}": project.work_center.name if project.work_center else "",
-                "{objetoContrato}": project.description if project.description else "",
-                "{fechaInicio}": project.start_date.strftime("%d/%m/%Y") if project.start_date else "",
-                "{responsable}": f"{project.contract_manager.first_name} {project.contract_manager.last_name or ''}".strip() if project.contract_manager else "",
-                "{contactoPrincipal}": f"{project.main_contact.first_name} {project.main_contact.last_name or ''}".strip() if project.main_contact else "",
-                "{tipoCentro}": project.work_center.type if project.work_center else "",
-            }
-
-            replace_in_blocks(doc, replacements)
-
-            for section in doc.sections:
-                replace_in_blocks(section.header, replacements)
-                replace_in_blocks(section.footer, replacements)
-
-            output_stream = io.BytesIO()
-            doc.save(output_stream)
-            output_base64 = base64.b64encode(output_stream.getvalue()).decode('utf-8')
-
-            mime_type = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
-            meeting.document_data = f"data:{mime_type};base64,{output_base64}"
-            meeting.save(update_fields=['document_data'])
+        with transaction.atomic():
+            meeting = serializer.save()
+            self.acta_job = enqueue(INITIAL_ACTA_JOB, meeting_id=meeting.pk)
 
     @action(detail=True, methods=['post'])
     def notify(self, request, pk=None):
@@ -175,11 +446,11 @@ class MeetingViewSet(viewsets.ModelViewSet):
             if meeting.project.main_contact:
                 contacts = [meeting.project.main_contact]
             else:
-                return Response({"error": "No hay destinatarios configurados."}, status=status.HTTP_400_BAD_REQUEST)
+                return _rejected('notify', "No hay destinatarios configurados.", status.HTTP_400_BAD_REQUEST)
 
         emails = [contact.email for contact in contacts if contact.email]
         if not emails:
-            return Response({"error": "Los contactos seleccionados no tienen correo electrónico."}, status=status.HTTP_400_BAD_REQUEST)
+            return _rejected('notify', "Los contactos seleccionados no tienen correo electrónico.", status.HTTP_400_BAD_REQUEST)
 
         subject = f"Convocatoria de Reunión: {meeting.reason}"
         message = (
@@ -192,137 +463,77 @@ class MeetingViewSet(viewsets.ModelViewSet):
             f"Por favor, revisa la plataforma para más detalles.\n"
         )
 
-        try:
-            send_mail(
-                subject=subject,
-                message=message,
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                recipient_list=emails,
-                fail_silently=False,
-            )
-            return Response({"message": "Notificación enviada con éxito."}, status=status.HTTP_200_OK)
-        except Exception as e:
-            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        return self._queued_response(queue_email(subject, message, emails, source=meeting))
 
-class DocumentTemplateViewSet(viewsets.ModelViewSet):
-    queryset = DocumentTemplate.objects.all()
+class DocumentTemplateViewSet(ConditionalGetMixin, FieldPlanMixin, BlobContentMixin, viewsets.ModelViewSet):
+    queryset = defer_blob_fields(DocumentTemplate.objects.all())
     serializer_class = DocumentTemplateSerializer
+    blob_field = 'file_data'
+    last_modified_header = True
+    filter_fields = {'category': 'category'}
+
+    def get_content_filename(self, instance):
+        return instance.file_name
 
-class MeetingDocumentViewSet(viewsets.ModelViewSet):
-    queryset = MeetingDocument.objects.all()
+class MeetingDocumentViewSet(ConditionalGetMixin, FieldPlanMixin, BlobContentMixin, viewsets.ModelViewSet):
+    queryset = defer_blob_fields(MeetingDocument.objects.all())
     serializer_class = MeetingDocumentSerializer
+    blob_field = 'file_data'
+    filter_fields = {'meeting': 'meeting_id'}
 
-class FollowUpMeetingViewSet(viewsets.ModelViewSet):
-    queryset = FollowUpMeeting.objects.all().order_by('-created_at')
+    def get_content_filename(self, instance):
+        return instance.name
+
+class FollowUpMeetingViewSet(ConditionalGetMixin, FieldPlanMixin, NotifyMixin, BlobContentMixin, viewsets.ModelViewSet):
+    queryset = defer_blob_fields(FollowUpMeeting.objects.all())
     serializer_class = FollowUpMeetingSerializer
+    select_related_fields = {'config': ['config']}
+    prefetch_fields = {
+        'work_center_ids': [Prefetch('work_centers', queryset=WorkCenter.objects.only('id'))],
+        'company_ids': [Prefetch('companies', queryset=Company.objects.only('id'))],
+        'notification_contacts': ['notification_contacts'],
+    }
+    blob_field = 'document_data'
+    filter_fields = {
+        'contract': 'contract_id',
+        'work_center': 'work_centers',
+        'company': 'companies',
+        'status': 'status',
+        'type': 'type',
+    }
+    date_range_fields = {'date': 'date'}
+    ordering = ['-created_at']
+    ordering_fields = ['id', 'created_at', 'date']
 
     @action(detail=True, methods=['post'])
     def generate_acta(self, request, pk=None):
         meeting = self.get_object()
 
-        template = DocumentTemplate.objects.filter(category__icontains="seguimiento").first()
-        if not template or not template.file_data:
-            return Response(
-                {"error": "No se encontró la plantilla 'Acta Seguimiento'. Suba la plantilla primero."},
-                status=status.HTTP_404_NOT_FOUND
-            )
+        if find_follow_up_template() is None:
+            return _rejected('generate_acta', FOLLOW_UP_TEMPLATE_MISSING, status.HTTP_404_NOT_FOUND)
 
-        file_data = template.file_data
-        if "," in file_data:
-            base64_data = file_data.split(",")[1]
-        else:
-            base64_data = file_data
+        job = enqueue(FOLLOW_UP_ACTA_JOB, meeting_id=meeting.pk)
+        return self._job_response(job)
 
-        try:
-            doc_bytes = base64.b64decode(base64_data)
-            doc = Document(io.BytesIO(doc_bytes))
-        except Exception as e:
-            return Response({"error": f"Error decodificando plantilla: {e}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-
-        config = getattr(meeting, 'config', None)
-
-        centros = ", ".join([wc.name for wc in meeting.work_centers.all()])
-        provincias = ", ".join(meeting.provinces) if meeting.provinces else ""
-
-        replacements = {
-            "{fechaReunion}": meeting.date.strftime("%d/%m/%Y") if meeting.date else "",
-            "{horaReunión}": meeting.time.strftime("%H:%M") if meeting.time else "",
-            "{horaReunion}": meeting.time.strftime("%H:%M") if meeting.time else "",
-            "{revision}": config.revision_informacion or "" if config else "",
-            "{observacion}": config.observaciones_intercambio or "" if config else "",
-            "{concurrencia}": config.solapes_empresas or "" if config else "",
-            "{accidentes}": config.accidentes_trabajo or "" if config else "",
-            "{emergencia}": config.emergencia or "" if config else "",
-            "{temas}": config.otros_temas or "" if config else "",
-            "{preguntas}": config.ruegos_preguntas or "" if config else "",
-            "{numeroReunion}": config.numero_reunion if config else "",
-            "{anoReunion}": meeting.date.year if meeting.date else "",
-            "{lugar}": meeting.location or "",
-            "{centros}": centros,
-            "{provincias}": provincias,
-        }
-
-        replace_in_blocks(doc, replacements)
-
-        for section in doc.sections:
-            replace_in_blocks(section.header, replacements)
-            replace_in_blocks(section.footer, replacements)
-
-        # Process {tablaFirmas}
-        found_p = None
-        for p in doc.paragraphs:
-            if "{tablaFirmas}" in p.text:
-                found_p = p
-                break
-
-        if found_p:
-            signatures = config.signatures if config and hasattr(config, 'signatures') and config.signatures else []
-            table = doc.add_table(rows=len(signatures) + 1, cols=4)
-            table.style = 'Table Grid'
-            table.autofit = False
-            
-            # Set column widths
-            widths = [Inches(2.1), Inches(1.4), Inches(1.4), Inches(1.2)]
-            for i, width in enumerate(widths):
-                for cell in table.columns[i].cells:
-                    cell.width = width
-
-            hdr_cells = table.rows[0].cells
-            hdr_cells[0].text = "Empresa"
-            hdr_cells[1].text = "Nombre"
-            hdr_cells[2].text = "Cargo"
-            hdr_cells[3].text = "Firma"
-            
-            for i, sig in enumerate(signatures):
-                row_cells = table.rows[i + 1].cells
-                row_cells[0].text = sig.get('company', '')
-                row_cells[1].text = sig.get('name', '')
-                row_cells[2].text = sig.get('role', '')
-                
-                sig_data = sig.get('data', '')
-                if sig_data and "," in sig_data:
-                    try:
-                        img_base64 = sig_data.split(",")[1]
-                        img_bytes = base64.b64decode(img_base64)
-                        img_stream = io.BytesIO(img_bytes)
-                        r = row_cells[3].paragraphs[0].add_run()
-                        r.add_picture(img_stream, width=Inches(1.2))
-                    except Exception as e:
-                        print(f"Error inserting signature image: {e}")
-            
-            found_p._p.addnext(table._tbl)
-            found_p.clear()
-
-        output_stream = io.BytesIO()
-        doc.save(output_stream)
-        output_base64 = base64.b64encode(output_stream.getvalue()).decode('utf-8')
-
-        mime_type = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
-        meeting.document_data = f"data:{mime_type};base64,{output_base64}"
-        meeting.save(update_fields=['document_data'])
-
-        serializer = self.get_serializer(meeting)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+    @action(detail=False, methods=['post'])
+    def generate_actas(self, request):
+        """Regenerates every acta of a contract and/or date range in one background job."""
+        selection = ActaBatchSerializer(data=request.data)
+        selection.is_valid(raise_exception=True)
+
+        if find_follow_up_template() is None:
+            return _rejected('generate_actas', FOLLOW_UP_TEMPLATE_MISSING, status.HTTP_404_NOT_FOUND)
+
+        job = enqueue(FOLLOW_UP_ACTA_BATCH_JOB, **selection.job_payload())
+        return self._job_response(job)
+
+    def _job_response(self, job):
+        serializer = JobSerializer(job, context=self.get_serializer_context())
+        return Response(
+            serializer.data,
+            status=status.HTTP_202_ACCEPTED,
+            headers={'Location': serializer.data['url']},
+        )
 
     @action(detail=True, methods=['post'])
     def notify(self, request, pk=None):
@@ -330,17 +541,15 @@ class FollowUpMeetingViewSet(viewsets.ModelViewSet):
         contacts = list(meeting.notification_contacts.all())
 
         if not contacts:
-            return Response(
-                {"error": "No hay destinatarios configurados. Configure los contactos de notificación primero."},
-                status=status.HTTP_400_BAD_REQUEST
+            return _rejected(
+                'notify',
+                "No hay destinatarios configurados. Configure los contactos de notificación primero.",
+                status.HTTP_400_BAD_REQUEST,
             )
 
         emails = [contact.email for contact in contacts if contact.email]
         if not emails:
-            return Response(
-                {"error": "Los contactos seleccionados no tienen correo electrónico."},
-                status=status.HTTP_400_BAD_REQUEST
-            )
+            return _rejected('notify', "Los contactos seleccionados no tienen correo electrónico.", status.HTTP_400_BAD_REQUEST)
 
         contract = meeting.contract
         subject = f"Convocatoria de Reunión de Seguimiento: {meeting.reason}"
@@ -354,34 +563,152 @@ class FollowUpMeetingViewSet(viewsets.ModelViewSet):
             f"Por favor, revisa la plataforma para más detalles.\n"
         )
 
-        try:
-            send_mail(
-                subject=subject,
-                message=message,
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                recipient_list=emails,
-                fail_silently=False,
-            )
-            meeting.is_notified = True
-            meeting.save(update_fields=['is_notified'])
-            return Response({"message": "Notificación enviada con éxito."}, status=status.HTTP_200_OK)
-        except Exception as e:
-            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        return self._queued_response(queue_email(subject, message, emails, source=meeting))
 
-class FollowUpMeetingConfigViewSet(viewsets.ModelViewSet):
+class FollowUpMeetingConfigViewSet(ConditionalGetMixin, FieldPlanMixin, BulkWriteMixin, viewsets.ModelViewSet):
     queryset = FollowUpMeetingConfig.objects.all()
     serializer_class = FollowUpMeetingConfigSerializer
+    filter_fields = {'meeting': 'meeting_id'}
+    upsert_field = 'meeting'
 
     def create(self, request, *args, **kwargs):
-        meeting_id = request.data.get('meeting')
-        if meeting_id:
-            # Check if a config already exists for this meeting
-            existing = FollowUpMeetingConfig.objects.filter(meeting_id=meeting_id).first()
-            if existing:
-                # If it exists, update it instead of creating a new one
-                serializer = self.get_serializer(existing, data=request.data, partial=True)
-                serializer.is_valid(raise_exception=True)
-                serializer.save()
-                return Response(serializer.data, status=status.HTTP_200_OK)
-        
-        return super().create(request, *args, **kwargs)
+        # A meeting has one config: posting it again updates the fields sent,
+        # in the same INSERT ... ON CONFLICT statement.
+        try:
+            row, = bulk_write(
+                self.get_serializer_class(), [request.data], self.get_serializer_context(), UPSERT, self.upsert_field,
+            )
+        except BulkValidationError as e:
+            raise serializers.ValidationError(e.errors[0])
+        serializer = self.get_serializer(self.get_queryset().get(pk=row.pk))
+        return Response(serializer.data, status=status.HTTP_201_CREATED if row._created else status.HTTP_200_OK)
+
+
+class CalendarViewSet(viewsets.ViewSet):
+    """
+    ``GET /api/calendar/?from=AAAA-MM-DD&to=AAAA-MM-DD``: initial and follow-up
+    meetings starting in the range, merged in time order. Optional filters:
+    ``work_center``, ``province`` and ``company``, comma separated.
+    """
+
+    def list(self, request):
+        try:
+            start, end = parse_range(request.query_params)
+            filters = parse_calendar_filters(request.query_params)
+        except ValueError as e:
+            raise serializers.ValidationError(e.args[0])
+        return Response({'from': start, 'to': end, 'events': calendar_events(start, end, **filters)})
+
+
+class AutocompleteViewSet(viewsets.ViewSet):
+    """
+    ``GET /api/autocomplete/<resource>/?q=``: up to ``limit`` ``{id, label}``
+    suggestions for a picker (see ``autocomplete``). ``resource`` is one of
+    companies, contacts, workcenters or users; contacts take a ``company``
+    filter, work centers ``province`` and ``type``, users ``role``.
+    """
+    lookup_field = 'resource'
+    lookup_value_regex = '[a-z]+'
+
+    def retrieve(self, request, resource=None):
+        if resource not in AUTOCOMPLETE_RESOURCES:
+            raise Http404
+        try:
+            q, limit, filters = parse_autocomplete_params(resource, request.query_params)
+        except ValueError as e:
+            raise serializers.ValidationError(e.args[0])
+        response = Response(cached_suggest(resource, q, limit, filters))
+        response['Cache-Control'] = f'private, max-age={settings.AUTOCOMPLETE_CACHE_SECONDS}'
+        return response
+
+
+class SearchViewSet(viewsets.ViewSet):
+    """
+    ``GET /api/search/?q=``: projects, contracts, companies, contacts and
+    documents matching ``q``, best match first, ignoring accents (see
+    ``search``). ``type`` restricts the kinds (comma separated); ``limit`` and
+    ``offset`` page through the results.
+    """
+
+    def list(self, request):
+        try:
+            q, kinds, limit, offset = parse_search_params(request.query_params)
+        except ValueError as e:
+            raise serializers.ValidationError(e.args[0])
+        results, more = search(q, kinds, limit, offset)
+        url = request.build_absolute_uri()
+        return Response({
+            'next': replace_query_param(url, 'offset', offset + limit) if more else None,
+            'previous': replace_query_param(url, 'offset', max(offset - limit, 0)) if offset else None,
+            'results': results,
+        })
+
+
+class DashboardViewSet(viewsets.ViewSet):
+    """
+    ``GET /api/dashboard/``: counts of contracts, projects, documents, meetings
+    and follow-up meetings by status, limited to the contracts the user
+    coordinates unless they are a manager (see ``dashboard``).
+    """
+    permission_classes = [IsAuthenticated]
+
+    def list(self, request):
+        return Response(dashboard_summary(request.user))
+
+
+class SyncViewSet(viewsets.ViewSet):
+    """
+    Delta sync for the client-side cache.
+
+    ``GET /api/sync/`` returns every row of every resource plus a ``cursor``.
+    ``GET /api/sync/?since=<cursor>`` returns only the rows created or changed
+    since then (``changes``) and the ids deleted since then (``deleted``).
+    ``full`` is true when the client must replace its cache instead of merging,
+    i.e. on the first sync or when the cursor predates the tombstone history.
+    """
+    resources = {
+        'users': UserViewSet,
+        'companies': CompanyViewSet,
+        'work_centers': WorkCenterViewSet,
+        'contracts': ContractViewSet,
+        'templates': DocumentTemplateViewSet,
+        'projects': ProjectViewSet,
+        'documents': ProjectDocumentViewSet,
+        'meetings': MeetingViewSet,
+        'follow_up_meetings': FollowUpMeetingViewSet,
+    }
+
+    def list(self, request):
+        now = timezone.now()
+        since = request.query_params.get('since')
+        full = True
+        if since:
+            try:
+                moment = decode_cursor(since)
+            except (ValueError, OverflowError):
+                raise serializers.ValidationError({'since': ["Cursor no válido."]})
+            full = moment < tombstone_horizon()
+
+        context = {'request': request, 'view': self, 'format': self.format_kwarg}
+        changes = {}
+        deleted = {}
+        for resource, viewset in self.resources.items():
+            fields = viewset.serializer_class(context=context).fields
+            queryset = viewset.plan_queryset(viewset.queryset.all(), fields)
+            if not full:
+                queryset = queryset.filter(updated_at__gte=moment - OVERLAP)
+            rows = viewset.serializer_class(queryset, many=True, context=context).data
+            if rows:
+                changes[resource] = rows
+
+        if not full:
+            tombstones = Tombstone.objects.filter(deleted_at__gte=moment - OVERLAP)
+            for resource, object_id in tombstones.values_list('resource', 'object_id'):
+                deleted.setdefault(resource, []).append(object_id)
+
+        return Response({
+            'cursor': encode_cursor(now),
+            'full': full,
+            'changes': changes,
+            'deleted': deleted,
+        })
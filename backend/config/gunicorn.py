@@ -0,0 +1,13 @@
+"""
+gunicorn settings (``gunicorn -c config/gunicorn.py``).
+
+See ``api.metrics``: with ``PROMETHEUS_MULTIPROC_DIR`` set, the samples of a
+worker that exits are merged into the totals and its live files removed.
+"""
+import os
+
+
+def child_exit(server, worker):
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
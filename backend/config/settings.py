@@ -51,12 +51,15 @@ INSTALLED_APPS = [
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
+    'django.contrib.postgres',
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
 ]
 
 MIDDLEWARE = [
+    'api.metrics.MetricsMiddleware',
+    'api.sqlstats.SqlStatsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
@@ -64,6 +67,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'api.profiling.ProfilerMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -139,23 +143,99 @@ USE_TZ = True
 STATIC_URL = 'static/'
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 
+# Binary payloads (documents, templates, generated actas) are stored by SHA-256
+# in the blob store instead of as base64 text in the database.
+if os.environ.get('BLOB_STORE_S3_BUCKET'):
+    BLOB_STORE = {
+        'BACKEND': 'api.blobstore.S3BlobStore',
+        'OPTIONS': {
+            'bucket': os.environ.get('BLOB_STORE_S3_BUCKET'),
+            'prefix': os.environ.get('BLOB_STORE_S3_PREFIX', 'blobs/'),
+            'endpoint_url': os.environ.get('BLOB_STORE_S3_ENDPOINT_URL'),
+            'region_name': os.environ.get('BLOB_STORE_S3_REGION'),
+            'access_key_id': os.environ.get('BLOB_STORE_S3_ACCESS_KEY_ID'),
+            'secret_access_key': os.environ.get('BLOB_STORE_S3_SECRET_ACCESS_KEY'),
+        },
+    }
+else:
+    BLOB_STORE = {
+        'BACKEND': 'api.blobstore.LocalBlobStore',
+        'OPTIONS': {
+            'location': os.environ.get('BLOB_STORE_LOCATION', os.path.join(BASE_DIR, 'blobs')),
+        },
+    }
+
+# Where resized avatars and logos are cached (see api.renditions).
+IMAGE_RENDITIONS_ROOT = os.environ.get('IMAGE_RENDITIONS_ROOT', os.path.join(BASE_DIR, 'renditions'))
+
+# Upper bound for the per-process cache of compiled DOCX templates.
+DOCX_TEMPLATE_CACHE_BYTES = int(os.environ.get('DOCX_TEMPLATE_CACHE_BYTES', 32 * 1024 * 1024))
+
+# Processes used to render actas in bulk. 0 means one per CPU.
+ACTA_BATCH_WORKERS = int(os.environ.get('ACTA_BATCH_WORKERS', 0))
+
+# Days deletions are remembered for /api/sync/; older cursors get a full resync.
+SYNC_TOMBSTONE_RETENTION_DAYS = int(os.environ.get('SYNC_TOMBSTONE_RETENTION_DAYS', 90))
+
+# Bearer token Prometheus must send to /api/metrics/; when empty the endpoint
+# is only served with DEBUG on.
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+# Where ?profile=1 reports are kept (see api.profiling); unset keeps none.
+PROFILE_DIR = os.environ.get('PROFILE_DIR') or None
+
+# SQL fingerprint statistics (see api.sqlstats and manage.py sql_top). Totals
+# and plans are written by manage.py run_jobs, never inside a request.
+SQL_STATS_ENABLED = os.environ.get('SQL_STATS_ENABLED', 'True') == 'True'
+SQL_STATS_FLUSH_SECONDS = int(os.environ.get('SQL_STATS_FLUSH_SECONDS', 60))
+SQL_SLOW_QUERY_MS = float(os.environ.get('SQL_SLOW_QUERY_MS', 200))
+SQL_EXPLAIN_SLOW_QUERIES = os.environ.get('SQL_EXPLAIN_SLOW_QUERIES', 'False') == 'True'
+SQL_EXPLAIN_INTERVAL_SECONDS = int(os.environ.get('SQL_EXPLAIN_INTERVAL_SECONDS', 3600))
+
+# Redis shared by all processes when REDIS_URL is set; per-process memory otherwise.
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ.get('REDIS_URL'),
+            'KEY_PREFIX': 'cae',
+        },
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        },
+    }
+
+# Seconds an authenticated user is reused from the cache (see api.authentication).
+AUTH_USER_CACHE_SECONDS = int(os.environ.get('AUTH_USER_CACHE_SECONDS', 60))
+
+# Seconds a typeahead answer is reused from the cache (see api.autocomplete).
+AUTOCOMPLETE_CACHE_SECONDS = int(os.environ.get('AUTOCOMPLETE_CACHE_SECONDS', 30))
+
 CORS_ALLOW_ALL_ORIGINS = True # Allow all origins for Vercel demo, or you could list Vercel domains in CORS_ALLOWED_ORIGINS
 
 AUTH_USER_MODEL = 'api.User'
 
 REST_FRAMEWORK = {
     'DEFAULT_RENDERER_CLASSES': (
-        'djangorestframework_camel_case.render.CamelCaseJSONRenderer',
+        'api.camel_case.CamelCaseORJSONRenderer',
         'djangorestframework_camel_case.render.CamelCaseBrowsableAPIRenderer',
     ),
     'DEFAULT_PARSER_CLASSES': (
-        'djangorestframework_camel_case.parser.CamelCaseJSONParser',
+        'api.camel_case.CamelCaseORJSONParser',
         'djangorestframework_camel_case.parser.CamelCaseMultiPartParser',
         'djangorestframework_camel_case.parser.CamelCaseFormParser',
     ),
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
-    )
+        'api.authentication.CachedJWTAuthentication',
+    ),
+    'DEFAULT_PAGINATION_CLASS': 'api.pagination.StableCursorPagination',
+    'DEFAULT_FILTER_BACKENDS': (
+        'api.filters.QueryParamFilterBackend',
+        'api.filters.StableOrderingFilter',
+    ),
 }
 
 from datetime import timedelta
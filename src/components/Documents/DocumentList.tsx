@@ -3,6 +3,7 @@ import { useApp } from '../../context/AppContext';
 import type { ProjectDocument, DocumentStatus } from '../../types';
 import { FileText, Folder, ExternalLink, AlertTriangle, Plus, Users } from 'lucide-react';
 import MeatballMenu from '../UI/MeatballMenu';
+import { openContent } from '../../services/api';
 
 interface DocumentListProps {
     projectId: string;
@@ -181,21 +182,9 @@ const DocumentList: React.FC<DocumentListProps> = ({ projectId }) => {
                                             <button
                                                 onClick={(e) => {
                                                     e.preventDefault();
-                                                    if (workCenter.riskInfoUrl?.startsWith('data:')) {
-                                                        const parts = workCenter.riskInfoUrl.split(';base64,');
-                                                        const contentType = parts[0].split(':')[1];
-                                                        const raw = window.atob(parts[1]);
-                                                        const rawLength = raw.length;
-                                                        const uInt8Array = new Uint8Array(rawLength);
-                                                        for (let i = 0; i < rawLength; ++i) {
-                                                            uInt8Array[i] = raw.charCodeAt(i);
-                                                        }
-                                                        const blob = new Blob([uInt8Array], { type: contentType });
-                                                        const url = URL.createObjectURL(blob);
-                                                        window.open(url, '_blank');
-                                                        setTimeout(() => URL.revokeObjectURL(url), 1000);
-                                                    } else if (workCenter.riskInfoUrl) {
-                                                        window.open(workCenter.riskInfoUrl, '_blank');
+                                                    if (workCenter.riskInfoUrl) {
+                                                        openContent(workCenter.riskInfoUrl, workCenter.riskInfoFileName || 'riesgos')
+                                                            .catch(error => console.error('Error opening document:', error));
                                                     }
                                                 }}
                                                 className="btn btn-sm btn-outline"
@@ -289,23 +278,8 @@ const DocumentList: React.FC<DocumentListProps> = ({ projectId }) => {
                                         <div
                                             key={doc.id}
                                             onClick={() => {
-                                                if (doc.url.startsWith('data:')) {
-                                                    // Convert data URI to blob for better handling of large files
-                                                    const parts = doc.url.split(';base64,');
-                                                    const contentType = parts[0].split(':')[1];
-                                                    const raw = window.atob(parts[1]);
-                                                    const rawLength = raw.length;
-                                                    const uInt8Array = new Uint8Array(rawLength);
-                                                    for (let i = 0; i < rawLength; ++i) {
-                                                        uInt8Array[i] = raw.charCodeAt(i);
-                                                    }
-                                                    const blob = new Blob([uInt8Array], { type: contentType });
-                                                    const url = URL.createObjectURL(blob);
-                                                    window.open(url, '_blank');
-                                                    setTimeout(() => URL.revokeObjectURL(url), 1000);
-                                                } else {
-                                                    window.open(doc.url, '_blank');
-                                                }
+                                                openContent(doc.url, doc.name)
+                                                    .catch(error => console.error('Error opening document:', error));
                                             }}
                                             style={{
                                                 display: 'flex',
@@ -4,6 +4,7 @@ import type { Meeting } from '../../types';
 import { FileText, Plus, CheckCircle, MapPin, Video, Clock, Calendar, Users, Mail, Settings, Upload } from 'lucide-react';
 import Modal from '../UI/Modal';
 import { jsPDF } from 'jspdf';
+import { openContent } from '../../services/api';
 
 interface MeetingListProps {
     projectId: string;
@@ -97,7 +98,7 @@ const MeetingList: React.FC<MeetingListProps> = ({ projectId }) => {
         if (window.confirm("¿Seguro que deseas enviar la convocatoria por correo a los destinatarios configurados?")) {
             const success = await notifyMeeting(meeting.id);
             if (success) {
-                await updateMeeting({ ...meeting, isNotified: true });
+                alert("Notificación en cola de envío.");
             }
         }
     };
@@ -110,14 +111,10 @@ const MeetingList: React.FC<MeetingListProps> = ({ projectId }) => {
         return `${day}/${month}/${year}`;
     };
 
-    const generatePDF = (meeting: Meeting) => {
+    const generatePDF = async (meeting: Meeting) => {
         if (meeting.documentData) {
-            const isPdf = meeting.documentData.includes('application/pdf');
-            const ext = isPdf ? 'pdf' : 'docx';
-            const link = document.createElement('a');
-            link.href = meeting.documentData;
-            link.download = `acta-reunion-${meeting.startDate}.${ext}`;
-            link.click();
+            // Signed actas are PDFs and open in a tab; the generated DOCX is downloaded.
+            await openContent(meeting.documentData, `acta-reunion-${meeting.startDate}.docx`);
             return;
         }
 
@@ -421,32 +418,16 @@ const MeetingList: React.FC<MeetingListProps> = ({ projectId }) => {
                                         <div
                                             style={{ display: 'flex', alignItems: 'center', justifyContent: 'space-between', padding: '0.5rem', backgroundColor: '#F9FAFB', border: '1px solid var(--border)', borderRadius: 'var(--radius-sm)', cursor: 'pointer', transition: 'background-color 0.2s' }}
                                             onClick={() => {
-                                                const isPdf = meeting.documentData!.includes('application/pdf');
-                                                if (isPdf) {
-                                                    const parts = meeting.documentData!.split(';base64,');
-                                                    const contentType = parts[0].split(':')[1];
-                                                    const raw = window.atob(parts[1]);
-                                                    const rawLength = raw.length;
-                                                    const uInt8Array = new Uint8Array(rawLength);
-                                                    for (let i = 0; i < rawLength; ++i) {
-                                                        uInt8Array[i] = raw.charCodeAt(i);
-                                                    }
-                                                    const blob = new Blob([uInt8Array], { type: contentType });
-                                                    const url = URL.createObjectURL(blob);
-                                                    window.open(url, '_blank');
-                                                    setTimeout(() => URL.revokeObjectURL(url), 1000);
-                                                } else {
-                                                    generatePDF(meeting);
-                                                }
+                                                generatePDF(meeting).catch(error => console.error('Error opening acta:', error));
                                             }}
                                             onMouseEnter={(e) => e.currentTarget.style.backgroundColor = '#EEF2FF'}
                                             onMouseLeave={(e) => e.currentTarget.style.backgroundColor = '#F9FAFB'}
-                                            title={meeting.documentData.includes('application/pdf') ? "Click para ver" : "Click para descargar"}
+                                            title="Click para abrir"
                                         >
                                             <div style={{ display: 'flex', alignItems: 'center', gap: '0.5rem' }}>
                                                 <FileText size={14} className="text-secondary" />
                                                 <span style={{ color: 'var(--text-secondary)' }}>
-                                                    {meeting.documentData.includes('application/pdf') ? 'Acta de Reunión.pdf' : 'Acta de Reunión generada.docx'}
+                                                    Acta de Reunión
                                                 </span>
                                             </div>
                                         </div>
@@ -454,33 +435,14 @@ const MeetingList: React.FC<MeetingListProps> = ({ projectId }) => {
 
                                     {/* Uploaded Real Documents Array */}
                                     {meeting.documents?.map(doc => {
-                                        const isDocPdf = doc.fileData.includes('application/pdf') || doc.name.toLowerCase().endsWith('.pdf');
+                                        const isDocPdf = doc.name.toLowerCase().endsWith('.pdf');
                                         return (
                                             <div
                                                 key={doc.id}
                                                 style={{ display: 'flex', alignItems: 'center', justifyContent: 'space-between', padding: '0.5rem', backgroundColor: '#F9FAFB', border: '1px solid var(--border)', borderRadius: 'var(--radius-sm)', cursor: 'pointer', transition: 'background-color 0.2s' }}
                                                 onClick={() => {
-                                                    if (isDocPdf) {
-                                                        const parts = doc.fileData.split(';base64,');
-                                                        const contentType = parts[0].split(':')[1] || 'application/pdf';
-                                                        const raw = window.atob(parts[1]);
-                                                        const rawLength = raw.length;
-                                                        const uInt8Array = new Uint8Array(rawLength);
-                                                        for (let i = 0; i < rawLength; ++i) {
-                                                            uInt8Array[i] = raw.charCodeAt(i);
-                                                        }
-                                                        const blob = new Blob([uInt8Array], { type: contentType });
-                                                        const url = URL.createObjectURL(blob);
-                                                        window.open(url, '_blank');
-                                                        setTimeout(() => URL.revokeObjectURL(url), 1000);
-                                                    } else {
-                                                        const link = document.createElement('a');
-                                                        link.href = doc.fileData;
-                                                        link.download = doc.name;
-                                                        document.body.appendChild(link);
-                                                        link.click();
-                                                        document.body.removeChild(link);
-                                                    }
+                                                    openContent(doc.fileData, doc.name)
+                                                        .catch(error => console.error('Error opening document:', error));
                                                 }}
                                                 onMouseEnter={(e) => e.currentTarget.style.backgroundColor = '#EEF2FF'}
                                                 onMouseLeave={(e) => e.currentTarget.style.backgroundColor = '#F9FAFB'}
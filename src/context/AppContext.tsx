@@ -1,6 +1,6 @@
 import React, { createContext, useContext, useState, useEffect } from 'react';
 import type { User, Company, Project, Contract, ProjectDocument, Signature, DocumentStatus, MeetingStatus, WorkCenter, Meeting, DocumentTemplate, FollowUpMeeting, FollowUpMeetingConfig } from '../types';
-import api from '../services/api';
+import api, { fetchAll, waitForJob, waitForOutbox } from '../services/api';
 
 interface AppState {
     currentUser: User | null;
@@ -55,6 +55,13 @@ interface AppState {
 
 const AppContext = createContext<AppState | undefined>(undefined);
 
+const SYNC_CACHE_KEY = 'syncCache';
+
+interface SyncCache {
+    cursor: string | null;
+    data: Record<string, any[]>;
+}
+
 
 // Helper for LocalStorage
 function usePersistedState<T>(key: string, defaultValue: T) {
@@ -109,55 +116,61 @@ export const AppProvider: React.FC<{ children: React.ReactNode }> = ({ children
 
     // Fetch initial global users (even unauthenticated sometimes for login)
     useEffect(() => {
-        api.get('/users/')
-            .then(response => setUsers(response.data))
+        fetchAll('/users/')
+            .then(data => setUsers(data))
             .catch(err => console.error("Error fetching users:", err));
 
         // Fetch companies which are now separate
-        api.get('/companies/')
-            .then(response => setCompanies(response.data))
+        fetchAll('/companies/')
+            .then(data => setCompanies(data))
             .catch(err => console.error("Error fetching companies:", err));
     }, []);
 
-    // Initial Fetch for Work Centers, Contracts and Templates from Django API
+    // Load everything through the delta-sync feed: the cache in localStorage is
+    // merged with whatever changed on the server since its cursor.
     useEffect(() => {
         // We only want to fetch if the user is authenticated (we have a token)
         if (localStorage.getItem('access_token')) {
-            api.get('/users/')
-                .then(response => setUsers(response.data))
-                .catch(err => console.error("Error fetching users:", err));
-
-            api.get('/companies/')
-                .then(response => setCompanies(response.data))
-                .catch(err => console.error("Error fetching companies:", err));
-
-            api.get('/workcenters/')
-                .then(response => setWorkCenters(response.data))
-                .catch(err => console.error("Error fetching work centers:", err));
-
-            api.get('/contracts/')
-                .then(response => setContracts(response.data))
-                .catch(err => console.error("Error fetching contracts:", err));
-
-            api.get('/templates/')
-                .then(response => setTemplates(response.data))
-                .catch(err => console.error("Error fetching templates:", err));
-
-            api.get('/projects/')
-                .then(response => setProjects(response.data))
-                .catch(err => console.error("Error fetching projects:", err));
-
-            api.get('/documents/')
-                .then(response => setDocuments(response.data))
-                .catch(err => console.error("Error fetching documents:", err));
+            const setters: Record<string, (rows: any[]) => void> = {
+                users: setUsers,
+                companies: setCompanies,
+                workCenters: setWorkCenters,
+                contracts: setContracts,
+                templates: setTemplates,
+                projects: setProjects,
+                documents: setDocuments,
+                meetings: setMeetings,
+                followUpMeetings: setFollowUpMeetings,
+            };
 
-            api.get('/meetings/')
-                .then(response => setMeetings(response.data))
-                .catch(err => console.error("Error fetching meetings:", err));
+            let cache: SyncCache = { cursor: null, data: {} };
+            try {
+                cache = JSON.parse(localStorage.getItem(SYNC_CACHE_KEY) || 'null') || cache;
+            } catch (error) {
+                console.error("Error reading sync cache:", error);
+            }
 
-            api.get('/follow-up-meetings/')
-                .then(response => setFollowUpMeetings(response.data))
-                .catch(err => console.error("Error fetching follow-up meetings:", err));
+            api.get('/sync/', { params: cache.cursor ? { since: cache.cursor } : {} })
+                .then(({ data }) => {
+                    const merged: Record<string, any[]> = data.full ? {} : { ...cache.data };
+                    for (const resource of Object.keys(setters)) {
+                        const changed: any[] = data.changes[resource] || [];
+                        const deleted = new Set<number>(data.deleted[resource] || []);
+                        const byId = new Map<number, any>();
+                        for (const row of merged[resource] || []) {
+                            if (!deleted.has(row.id)) byId.set(row.id, row);
+                        }
+                        for (const row of changed) byId.set(row.id, row);
+                        merged[resource] = Array.from(byId.values());
+                        setters[resource](merged[resource]);
+                    }
+                    try {
+                        localStorage.setItem(SYNC_CACHE_KEY, JSON.stringify({ cursor: data.cursor, data: merged }));
+                    } catch (error) {
+                        console.error("Error writing sync cache. Quota might be exceeded:", error);
+                    }
+                })
+                .catch(err => console.error("Error syncing data:", err));
         }
     }, [currentUser]); // Re-fetch when user logs in
 
@@ -310,14 +323,13 @@ export const AppProvider: React.FC<{ children: React.ReactNode }> = ({ children
                 signatures: []
             }));
 
-            // Since we're refactoring sequentially, we assume documents will be moved to API next,
-            // but for now we create logic to hit the Document endpoint
-            for (const docData of initialDocsToCreate) {
+            // One request for all of them; if one is rejected none is created.
+            if (initialDocsToCreate.length > 0) {
                 try {
-                    const docResp = await api.post('/documents/', docData);
-                    setDocuments(prev => [...prev, docResp.data]);
+                    const docsResp = await api.post('/documents/bulk/', initialDocsToCreate);
+                    setDocuments(prev => [...prev, ...docsResp.data]);
                 } catch (e) {
-                    console.error("Error auto-creating document from template:", e);
+                    console.error("Error auto-creating documents from templates:", e);
                 }
             }
         } catch (error: any) {
@@ -409,6 +421,15 @@ export const AppProvider: React.FC<{ children: React.ReactNode }> = ({ children
 
             const response = await api.post('/meetings/', dataToSubmit);
             setMeetings([...meetings, response.data]);
+
+            // The "Acta inicial" is rendered in the background; refresh the meeting once it is ready.
+            const { actaJob, ...created } = response.data;
+            if (actaJob) {
+                waitForJob(actaJob)
+                    .then(() => api.get(`/meetings/${created.id}/`))
+                    .then(res => setMeetings(prev => prev.map(m => m.id === created.id ? res.data : m)))
+                    .catch(error => console.error("Error generating meeting acta:", error));
+            }
         } catch (error) {
             console.error("Error adding meeting:", error);
         }
@@ -416,7 +437,12 @@ export const AppProvider: React.FC<{ children: React.ReactNode }> = ({ children
 
     const notifyMeeting = async (id: string): Promise<boolean> => {
         try {
-            await api.post(`/meetings/${id}/notify/`);
+            const response = await api.post(`/meetings/${id}/notify/`);
+            // `isNotified` is set by the server once the message is actually sent.
+            waitForOutbox(response.data.outbox.url)
+                .then(() => api.get(`/meetings/${id}/`))
+                .then(res => setMeetings(prev => prev.map(m => String(m.id) === String(id) ? res.data : m)))
+                .catch(error => console.error("Error following meeting notification:", error));
             return true;
         } catch (error: any) {
             console.error("Error notifying meeting:", error);
@@ -591,13 +617,17 @@ export const AppProvider: React.FC<{ children: React.ReactNode }> = ({ children
     const generateFollowUpActa = async (id: string) => {
         try {
             const response = await api.post(`/follow-up-meetings/${id}/generate_acta/`);
+            await waitForJob(response.data.id);
+            const meeting = await api.get(`/follow-up-meetings/${id}/`);
             setFollowUpMeetings(prev => prev.map(m =>
-                String(m.id) === String(id) ? response.data : m
+                String(m.id) === String(id) ? meeting.data : m
             ));
         } catch (error: any) {
             console.error("Error generating follow-up acta:", error);
             if (error.response?.data?.error) {
                 alert(error.response.data.error);
+            } else if (error.message && !error.response) {
+                alert(error.message);
             } else {
                 alert("Error al generar el acta de seguimiento.");
             }
@@ -607,7 +637,14 @@ export const AppProvider: React.FC<{ children: React.ReactNode }> = ({ children
 
     const notifyFollowUpMeeting = async (id: string): Promise<boolean> => {
         try {
-            await api.post(`/follow-up-meetings/${id}/notify/`);
+            const response = await api.post(`/follow-up-meetings/${id}/notify/`);
+            // `isNotified` is set by the server once the message is actually sent.
+            waitForOutbox(response.data.outbox.url)
+                .then(() => api.get(`/follow-up-meetings/${id}/`))
+                .then(res => setFollowUpMeetings(prev => prev.map(m =>
+                    String(m.id) === String(id) ? res.data : m
+                )))
+                .catch(error => console.error("Error following follow-up meeting notification:", error));
             return true;
         } catch (error: any) {
             console.error("Error notifying follow-up meeting:", error);
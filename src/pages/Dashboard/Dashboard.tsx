@@ -1,13 +1,25 @@
+import { useEffect, useState } from 'react';
 import { useApp } from '../../context/AppContext';
-import { FileText, Briefcase, Calendar } from 'lucide-react';
+import api from '../../services/api';
+import type { DashboardSummary } from '../../types';
+import { FileText, Briefcase, Calendar, ClipboardList } from 'lucide-react';
 
 const Dashboard = () => {
-    const { currentUser, contracts, projects, meetings } = useApp();
+    const { currentUser } = useApp();
+    // Counted by the server for the contracts this user can see (GET /api/dashboard/).
+    const [summary, setSummary] = useState<DashboardSummary | null>(null);
+
+    useEffect(() => {
+        api.get<DashboardSummary>('/dashboard/')
+            .then(res => setSummary(res.data))
+            .catch(error => console.error('Error loading dashboard:', error));
+    }, [currentUser?.id]);
 
     const stats = [
-        { label: 'Contratos Activos', value: contracts.length, icon: FileText, color: 'var(--primary)' },
-        { label: 'Proyectos en Curso', value: projects.length, icon: Briefcase, color: 'var(--success)' },
-        { label: 'Reuniones Pendientes', value: meetings.filter(m => m.status === 'PROGRAMADA').length, icon: Calendar, color: 'var(--warning)' },
+        { label: 'Contratos Activos', value: summary?.contracts ?? 0, icon: FileText, color: 'var(--primary)' },
+        { label: 'Proyectos en Curso', value: summary?.projects.total ?? 0, icon: Briefcase, color: 'var(--success)' },
+        { label: 'Reuniones Pendientes', value: summary?.meetings.byStatus.PROGRAMADA ?? 0, icon: Calendar, color: 'var(--warning)' },
+        { label: 'Seguimientos Próximos', value: summary?.followUps.upcoming ?? 0, icon: ClipboardList, color: 'var(--primary)' },
         // { label: 'Usuarios', value: 3, icon: Users, color: 'var(--text-secondary)' }, // Mock count
     ];
 
@@ -2,7 +2,7 @@
 import { useState } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { useApp } from '../../context/AppContext';
-import api from '../../services/api';
+import api, { fetchAll } from '../../services/api';
 
 const Login = () => {
     const { users, setCurrentUser } = useApp();
@@ -38,8 +38,8 @@ const Login = () => {
             } else {
                 // Fetch the specific user since they might not be in the mock initial load
                 try {
-                    const usersRes = await api.get('/users/');
-                    const found = usersRes.data.find((u: any) => u.email === email);
+                    const matches = await fetchAll('/users/', { email });
+                    const found = matches.find((u: any) => u.email === email);
                     if (found) {
                         setCurrentUser(found);
                         navigate('/');
@@ -5,6 +5,7 @@ import type { FollowUpMeeting, FollowUpMeetingConfig } from '../../types';
 import Modal from '../../components/UI/Modal';
 import MultiSearchableSelect from '../../components/UI/MultiSearchableSelect';
 import SignaturePad from '../../components/SignaturePad';
+import { fetchContent, isPdfBlob, saveBlob } from '../../services/api';
 
 const PROVINCES: string[] = ['MÁLAGA', 'SEVILLA', 'JAÉN', 'CÓRDOBA', 'CEUTA', 'MELILLA', 'GRANADA'];
 
@@ -196,12 +197,14 @@ const Seguimiento: React.FC = () => {
         }
     };
 
-    const handleDownloadActa = (m: FollowUpMeeting) => {
+    const handleDownloadActa = async (m: FollowUpMeeting) => {
         if (!m.documentData) return;
-        const link = document.createElement('a');
-        link.href = m.documentData;
-        link.download = `acta-seguimiento-${m.date}.docx`;
-        link.click();
+        try {
+            const content = await fetchContent(m.documentData);
+            saveBlob(content, `acta-seguimiento-${m.date}.${isPdfBlob(content) ? 'pdf' : 'docx'}`);
+        } catch (error) {
+            console.error('Error downloading acta:', error);
+        }
     };
 
     const handleAddSignature = (dataUrl: string) => {
@@ -263,8 +266,7 @@ const Seguimiento: React.FC = () => {
         if (window.confirm("¿Seguro que deseas enviar la convocatoria por correo a los destinatarios configurados?")) {
             const success = await notifyFollowUpMeeting(String(m.id));
             if (success) {
-                await updateFollowUpMeeting({ ...m, isNotified: true });
-                alert("Notificación enviada con éxito.");
+                alert("Notificación en cola de envío.");
             }
         }
     };
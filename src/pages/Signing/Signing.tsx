@@ -1,7 +1,7 @@
 import { useEffect, useState, useRef } from 'react';
 import { useParams, useSearchParams } from 'react-router-dom';
 import { useApp } from '../../context/AppContext';
-import api from '../../services/api';
+import api, { fetchContent } from '../../services/api';
 import { CheckCircle, PenTool } from 'lucide-react';
 import SignaturePad from '../../components/SignaturePad';
 import DraggableSignature from '../../components/DraggableSignature';
@@ -79,14 +79,10 @@ const Signing = () => {
 
             setIsLoadingContent(true);
             try {
-                const base64Data = fileUrl.split(',')[1];
-                const binaryString = window.atob(base64Data);
-                const bytes = new Uint8Array(binaryString.length);
-                for (let i = 0; i < binaryString.length; i++) {
-                    bytes[i] = binaryString.charCodeAt(i);
-                }
+                const content = await fetchContent(fileUrl);
+                const bytes = new Uint8Array(await content.arrayBuffer());
 
-                if (fileUrl.includes('application/vnd.openxmlformats-officedocument.wordprocessingml.document')) {
+                if (content.type === 'application/vnd.openxmlformats-officedocument.wordprocessingml.document') {
                     // It's a DOCX
                     // Improve mammoth style mapping
                     const options = {
@@ -97,7 +93,7 @@ const Signing = () => {
                     };
                     const result = await mammoth.convertToHtml({ arrayBuffer: bytes.buffer }, options);
                     setDocHtml(result.value);
-                } else if (fileUrl.includes('application/pdf')) {
+                } else if (content.type === 'application/pdf') {
                     // It's a PDF
                     const loadingTask = pdfjsLib.getDocument({ data: bytes });
                     const pdf = await loadingTask.promise;
@@ -2,6 +2,7 @@ import React from 'react';
 import { useApp } from '../../context/AppContext';
 import { FileText, Upload, Trash2, Calendar, FileDown } from 'lucide-react';
 import type { DocumentTemplate } from '../../types';
+import { fetchContent, saveBlob } from '../../services/api';
 
 const Templates = () => {
     const { templates, addTemplate, deleteTemplate } = useApp();
@@ -164,10 +165,9 @@ const Templates = () => {
                                     <button
                                         className="btn btn-outline"
                                         onClick={() => {
-                                            const link = document.createElement('a');
-                                            link.href = template.fileData;
-                                            link.download = template.fileName;
-                                            link.click();
+                                            fetchContent(template.fileData)
+                                                .then(content => saveBlob(content, template.fileName))
+                                                .catch(error => console.error('Error downloading template:', error));
                                         }}
                                         title="Descargar"
                                     >
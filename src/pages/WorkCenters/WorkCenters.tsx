@@ -3,6 +3,7 @@ import { Plus, Search, MapPin, Phone, Building2, Trash2, Edit2, FileText } from
 import { useApp } from '../../context/AppContext';
 import type { WorkCenter } from '../../types';
 import WorkCenterForm from './WorkCenterForm';
+import { openContent } from '../../services/api';
 
 const WorkCenters = () => {
     const { workCenters, deleteWorkCenter } = useApp();
@@ -188,21 +189,9 @@ const WorkCenters = () => {
                                 <button
                                     onClick={(e) => {
                                         e.preventDefault();
-                                        if (wc.riskInfoUrl?.startsWith('data:')) {
-                                            const parts = wc.riskInfoUrl.split(';base64,');
-                                            const contentType = parts[0].split(':')[1];
-                                            const raw = window.atob(parts[1]);
-                                            const rawLength = raw.length;
-                                            const uInt8Array = new Uint8Array(rawLength);
-                                            for (let i = 0; i < rawLength; ++i) {
-                                                uInt8Array[i] = raw.charCodeAt(i);
-                                            }
-                                            const blob = new Blob([uInt8Array], { type: contentType });
-                                            const url = URL.createObjectURL(blob);
-                                            window.open(url, '_blank');
-                                            setTimeout(() => URL.revokeObjectURL(url), 1000);
-                                        } else if (wc.riskInfoUrl) {
-                                            window.open(wc.riskInfoUrl, '_blank');
+                                        if (wc.riskInfoUrl) {
+                                            openContent(wc.riskInfoUrl, wc.riskInfoFileName || 'riesgos')
+                                                .catch(error => console.error('Error opening document:', error));
                                         }
                                     }}
                                     style={{
@@ -64,4 +64,106 @@ api.interceptors.response.use(
     }
 );
 
+// List endpoints are cursor-paginated: `{ next, previous, results }`.
+// Follows `next` links until the whole collection has been loaded.
+export async function fetchAll<T = any>(url: string, params?: Record<string, unknown>): Promise<T[]> {
+    const items: T[] = [];
+    let next: string | null = url;
+    let query: Record<string, unknown> | undefined = { page_size: 1000, ...params };
+    while (next) {
+        const response: { data: { next: string | null; results: T[] } } = await api.get(next, { params: query });
+        items.push(...response.data.results);
+        next = response.data.next;
+        // The `next` link already carries the cursor and the original query.
+        query = undefined;
+    }
+    return items;
+}
+
+export interface Job {
+    id: number;
+    url: string;
+    kind: string;
+    status: 'PENDIENTE' | 'EN_CURSO' | 'COMPLETADO' | 'ERROR';
+    progress: number;
+    error: string | null;
+    resultUrl: string | null;
+}
+
+// Slow work (acta generation, ...) runs in a background job: the endpoint
+// answers 202 with the job and we poll `/jobs/<id>/` until it finishes.
+export async function waitForJob(jobId: number, intervalMs = 1000): Promise<Job> {
+    for (;;) {
+        const { data } = await api.get<Job>(`/jobs/${jobId}/`);
+        if (data.status === 'COMPLETADO') return data;
+        if (data.status === 'ERROR') throw new Error(data.error || 'Error en la tarea.');
+        await new Promise(resolve => setTimeout(resolve, intervalMs));
+    }
+}
+
+export interface EmailOutbox {
+    id: number;
+    url: string;
+    status: 'PENDIENTE' | 'ENVIADO' | 'ERROR';
+    attempts: number;
+    lastError: string | null;
+}
+
+// Notifications answer 202 with the queued message; the mailer sends it (and
+// retries it) in the background. Polls `outbox.url` until it is sent or has
+// failed for good, giving up after `timeoutMs` with the last state seen.
+export async function waitForOutbox(url: string, intervalMs = 2000, timeoutMs = 120000): Promise<EmailOutbox> {
+    const deadline = Date.now() + timeoutMs;
+    for (;;) {
+        const { data } = await api.get<EmailOutbox>(url);
+        if (data.status !== 'PENDIENTE' || Date.now() >= deadline) return data;
+        await new Promise(resolve => setTimeout(resolve, intervalMs));
+    }
+}
+
+// Binary fields (`url`, `documentData`, `fileData`, `riskInfoUrl`) come back as
+// links to `/<resource>/<id>/content/`, which need the auth header. Data URIs
+// that have not been uploaded yet are read locally; the Blob's `type` is the
+// Content-Type the server answered with.
+const isContentUrl = (url: string) => url.startsWith('data:') || /\/(content|blobs\/[0-9a-f]{64})\/?$/.test(url);
+
+export async function fetchContent(url: string): Promise<Blob> {
+    if (url.startsWith('data:')) {
+        return (await fetch(url)).blob();
+    }
+    const response = await api.get<Blob>(url, { responseType: 'blob' });
+    const contentType = String(response.headers['content-type'] || '').split(';')[0];
+    return new Blob([response.data], { type: contentType || response.data.type });
+}
+
+export const isPdfBlob = (blob: Blob) => blob.type === 'application/pdf';
+
+export function saveBlob(blob: Blob, filename: string) {
+    const url = URL.createObjectURL(blob);
+    const link = document.createElement('a');
+    link.href = url;
+    link.download = filename;
+    document.body.appendChild(link);
+    link.click();
+    document.body.removeChild(link);
+    setTimeout(() => URL.revokeObjectURL(url), 1000);
+}
+
+// PDFs open in a new tab, anything else is downloaded as `filename`.
+// External links are opened as they are.
+export async function openContent(url: string, filename: string) {
+    if (!isContentUrl(url)) {
+        window.open(url, '_blank');
+        return;
+    }
+    const blob = await fetchContent(url);
+    if (isPdfBlob(blob)) {
+        const objectUrl = URL.createObjectURL(blob);
+        window.open(objectUrl, '_blank');
+        setTimeout(() => URL.revokeObjectURL(objectUrl), 1000);
+    } else {
+        saveBlob(blob, filename);
+    }
+}
+
 export default api;
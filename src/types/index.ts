@@ -1,12 +1,19 @@
 export type Role = 'MANAGER' | 'COORDINATOR' | 'COMPANY';
 
+// Resized variants of an uploaded avatar or logo, by format and size.
+export type ImageVariant = 'thumb' | 'small' | 'medium';
+export interface ImageRenditions {
+    webp: Record<ImageVariant, string>;
+    png: Record<ImageVariant, string>;
+}
+
 export interface Company {
     id: string;
     name: string;
     cif: string;
     email: string;
     phone?: string;
-    avatar?: string;
+    avatar?: ImageRenditions | null;
     contacts?: CompanyContact[];
 }
 
@@ -25,7 +32,7 @@ export interface User {
     name: string;
     email: string;
     role: Role;
-    avatar?: string;
+    avatar?: ImageRenditions | null;
     phone?: string;
     contacts?: CompanyContact[];
 }
@@ -181,3 +188,53 @@ export interface FollowUpMeeting {
     notificationContacts?: string[];
     isNotified?: boolean;
 }
+
+export interface DashboardCounts {
+    total: number;
+    byStatus: Record<string, number>;
+}
+
+// GET /api/dashboard/
+export interface DashboardSummary {
+    contracts: number;
+    projects: DashboardCounts;
+    documents: DashboardCounts;
+    meetings: DashboardCounts & { upcoming: number };
+    followUps: DashboardCounts & { upcoming: number };
+}
+
+// GET /api/calendar/?from=&to=
+export interface CalendarEvent {
+    kind: 'meeting' | 'follow_up';
+    id: number;
+    date: string;
+    time: string;
+    reason: string;
+    status: string;
+    type: 'PRESENCIAL' | 'ONLINE';
+    location?: string | null;
+    contractId: number;
+    projectId: number | null;
+}
+
+export interface SearchResult {
+    type: 'project' | 'contract' | 'company' | 'contact' | 'document';
+    id: number;
+    // Contract of a project, company of a contact, project of a document.
+    parentId: number | null;
+    title: string;
+    subtitle: string;
+    rank: number;
+}
+
+export interface SearchPage {
+    next: string | null;
+    previous: string | null;
+    results: SearchResult[];
+}
+
+// GET /api/autocomplete/<companies|contacts|workcenters|users>/?q=
+export interface AutocompleteOption {
+    id: number;
+    label: string;
+}